@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from app.config.robot_config import BATCH_MAX_WORKERS, BATCH_FILE_EXTENSIONS, LOAD_SEMI_JOIN, PARSE_CACHE_ENABLED
+from app.config.ui_config import EXPORT_FORMAT_OPTIONS, DEFAULT_EXPORT_FORMAT
+from app.controller.robot_controller import RobotController, RobotStatus
+from app.core.file_manager import FileManager
+from app.logs.log_manager import LogManager
+
+# Processamento em lote sem interface: cada dia (um conjunto completo de bases) roda o pipeline
+# inteiro num processo próprio.
+#
+#   python -m app.cli dados/2025-01-02 dados/2025-01-03 --format parquet --workers 4
+#   python -m app.cli --manifest dias.json
+#
+# Diretório por dia: cada arquivo cujo nome (sem extensão) é a chave do FileManager ("cessao.xlsx",
+# "frontAkrk.csv", ...) ou começa com "<chave>_" ("cessao_20250102.xlsx").
+# Manifesto: {"<dia>": {"<chave>": "<caminho>", ...}, ...} (caminhos relativos ao manifesto).
+# Saída em <output-dir>/<dia>/ (logs da execução em <output-dir>/<dia>/logs).
+#
+# Código de saída: 0 = todos os dias finalizados | 1 = algum dia falhou | 2 = argumentos/entrada
+# inválidos | 130 = interrompido (Ctrl+C)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+class BatchInputError(Exception):
+    pass
+
+
+def _file_keys() -> list:
+    return list(FileManager().files)
+
+
+def files_in_dir(path: str) -> dict:
+    files = {}
+    names = sorted(os.listdir(path))
+    for key in _file_keys():
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in BATCH_FILE_EXTENSIONS:
+                continue
+            if stem.lower() == key.lower() or stem.lower().startswith(f"{key.lower()}_"):
+                files[key] = os.path.join(path, name)
+                break
+    return files
+
+
+def days_from_dirs(paths: list) -> dict:
+    days = {}
+    for path in paths:
+        if not os.path.isdir(path):
+            raise BatchInputError(f"diretório não encontrado: {path}")
+        day = os.path.basename(os.path.normpath(path))
+        if day in days:
+            raise BatchInputError(f"dia repetido: {day}")
+        days[day] = files_in_dir(path)
+    return days
+
+
+def days_from_manifest(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise BatchInputError(f"manifesto inválido ({path}): {e}")
+
+    if not isinstance(manifest, dict):
+        raise BatchInputError("manifesto deve ser um objeto {dia: {chave: caminho}}")
+
+    base = os.path.dirname(os.path.abspath(path))
+    valid = set(_file_keys())
+    days = {}
+    for day, files in manifest.items():
+        unknown = sorted(set(files) - valid)
+        if unknown:
+            raise BatchInputError(f"{day}: chave(s) desconhecida(s): {', '.join(unknown)}")
+        days[str(day)] = {key: os.path.join(base, p) for key, p in files.items() if p}
+    return days
+
+
+def run_day(day: str, files: dict, options: dict) -> dict:
+    # roda no processo do pool: monta o FileManager do dia e executa o robô de forma síncrona
+    file_manager = FileManager()
+    for key, path in files.items():
+        file_manager.set_file(key, path)
+
+    output_dir = os.path.join(options["output_dir"], day)
+    errors = []
+    marks = []
+
+    def log(message, level="INFO"):
+        if level == "ERROR":
+            errors.append(message)
+        if options["verbose"]:
+            print(f"[{day}] [{level}] {message}", flush=True)
+
+    robot = RobotController(
+        log_callback=log,
+        progress_callback=lambda current, total, message: marks.append((message, time.perf_counter())),
+        file_manager=file_manager,
+        export_format=options["export_format"],
+        load_executor="thread",  # já estamos num processo do pool
+        pipeline_executor="thread",
+        use_parse_cache=options["use_cache"],
+        semi_join=options["semi_join"],
+        log_manager=LogManager(log_dir=os.path.join(output_dir, "logs")),
+    )
+    robot.output_dir = output_dir
+
+    start = time.perf_counter()
+    status = robot.run()
+    end = time.perf_counter()
+    robot.log_manager.close()
+
+    steps = []
+    for i, (message, at) in enumerate(marks):
+        until = marks[i + 1][1] if i + 1 < len(marks) else end
+        steps.append((message, until - at))
+
+    df_y = robot.dataframes.get("y")
+    return {
+        "day": day,
+        "status": status.value,
+        "ok": status == RobotStatus.FINISHED and robot.export_path is not None,
+        "rows_x": len(robot.dataframes["cessao"]) if "cessao" in robot.dataframes else 0,
+        "rows_y": len(df_y) if df_y is not None else 0,
+        "seconds": end - start,
+        "steps": steps,
+        "output": robot.export_path,
+        "error": errors[0].splitlines()[0] if errors else None,
+        "missing": file_manager.get_missing_files(),
+    }
+
+
+def _summary_line(result: dict) -> str:
+    status = "OK" if result["ok"] else result["status"].upper()
+    if not result["ok"] and result["status"] == RobotStatus.FINISHED.value:
+        status = "SEM_SAIDA"
+    line = (
+        f"{result['day']:<12} {status:<9} X={result['rows_x']:>9} Y={result['rows_y']:>9} "
+        f"{result['seconds']:8.2f}s"
+    )
+    if result["steps"]:
+        line += "  (" + " | ".join(f"{name} {secs:.2f}s" for name, secs in result["steps"]) + ")"
+    if result["output"]:
+        line += f"\n{'':<12} -> {result['output']}"
+    if result["missing"]:
+        line += f"\n{'':<12} arquivos ausentes: {', '.join(result['missing'])}"
+    if result["error"]:
+        line += f"\n{'':<12} erro: {result['error']}"
+    return line
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Processa vários dias de cessão sem interface, um processo por dia.",
+    )
+    parser.add_argument("dirs", nargs="*", help="diretórios de entrada, um por dia")
+    parser.add_argument("--manifest", help="JSON {dia: {chave: caminho}} em vez de diretórios")
+    parser.add_argument("--format", dest="export_format", default=DEFAULT_EXPORT_FORMAT,
+                        choices=[value for label, value in EXPORT_FORMAT_OPTIONS])
+    parser.add_argument("--output-dir", default=os.path.join(os.getcwd(), "output"))
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS)
+    parser.add_argument("--semi-join", action="store_true", default=LOAD_SEMI_JOIN)
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", default=PARSE_CACHE_ENABLED)
+    parser.add_argument("--verbose", action="store_true", help="mostra os logs de cada dia")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if bool(args.dirs) == bool(args.manifest):
+        parser.print_usage(sys.stderr)
+        print("informe diretórios OU --manifest", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        days = days_from_manifest(args.manifest) if args.manifest else days_from_dirs(args.dirs)
+    except BatchInputError as e:
+        print(f"erro: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    if not days:
+        print("erro: nenhum dia para processar", file=sys.stderr)
+        return EXIT_USAGE
+
+    options = {
+        "output_dir": os.path.abspath(args.output_dir),
+        "export_format": args.export_format,
+        "use_cache": args.use_cache,
+        "semi_join": args.semi_join,
+        "verbose": args.verbose,
+    }
+    workers = max(1, min(args.workers, len(days)))
+    print(f">>> {len(days)} dia(s) | {workers} processo(s) | formato {args.export_format}", flush=True)
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_day, day, files, options): day for day, files in days.items()}
+        try:
+            for future in as_completed(futures):
+                day = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        "day": day, "status": "error", "ok": False, "rows_x": 0, "rows_y": 0,
+                        "seconds": 0.0, "steps": [], "output": None, "error": str(e), "missing": [],
+                    }
+                results.append(result)
+                print(f"[{len(results)}/{len(days)}] {day}: {'OK' if result['ok'] else 'FALHOU'}", flush=True)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            print("interrompido", file=sys.stderr)
+            return EXIT_INTERRUPTED
+
+    print("\n>>> Resumo por dia")
+    for result in sorted(results, key=lambda r: r["day"]):
+        print(_summary_line(result))
+
+    failed = [r["day"] for r in results if not r["ok"]]
+    print(f"\n>>> {len(results) - len(failed)}/{len(results)} dia(s) ok em {time.perf_counter() - start:.2f}s")
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
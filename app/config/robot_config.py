@@ -1,3 +1,4 @@
+import os
 
 FILE_PLAN = [
     ("cessao", "Planilha Base (Cessão)", True),
@@ -11,3 +12,53 @@ FILE_PLAN = [
     ("esteirasFunc", "RLE / Esteiras (Função)", True),
 ]
 
+# Carregamento paralelo das bases (Etapa 1)
+# executor: "thread" (padrão) ou "process"
+LOAD_PARALLEL = True
+LOAD_MAX_WORKERS = 4
+LOAD_EXECUTOR = "thread"
+
+# Semi-join no carregamento: lê a X primeiro e, das demais bases, só guarda as linhas cuja chave
+# (nrCCB/nrContrato) aparece na X. As bases são lidas em blocos de LOAD_CHUNK_ROWS linhas.
+LOAD_SEMI_JOIN = False
+LOAD_CHUNK_ROWS = 100_000
+
+# Cache em disco das bases já lidas (chaveado por arquivo + schema)
+PARSE_CACHE_ENABLED = True
+PARSE_CACHE_DIR = "cache"
+PARSE_CACHE_MAX_MB = 2048
+PARSE_CACHE_HASH_CONTENT = False
+
+# Spans por etapa (tempo, CPU, linhas, pico de RSS): gravados na execução e resumidos no log
+TRACING_ENABLED = True
+
+# Execução incremental: guarda a Y e um fingerprint por linha de X em INCREMENTAL_STATE_DIR/<hash do output_dir> e, na
+# próxima execução, só reprocessa as linhas novas/alteradas (ou cujas bases de referência mudaram)
+INCREMENTAL_ENABLED = False
+INCREMENTAL_STATE_DIR = "state"
+
+# Onde o pipeline roda: "thread" (no processo da interface) ou, opcional, "process" (processo filho; a
+# interface não trava e o PARAR encerra o trabalho em até PIPELINE_STOP_GRACE_SECONDS, mesmo no meio de
+# uma leitura, ao custo de subir um interpretador novo e devolver a Y via arquivo a cada execução)
+PIPELINE_EXECUTOR = "thread"
+PIPELINE_STOP_GRACE_SECONDS = 5.0
+
+# Fila de execuções (JobScheduler): até JOB_MAX_CONCURRENT jobs ao mesmo tempo, enquanto a memória
+# estimada dos que estão rodando couber em JOB_MEMORY_BUDGET_MB (um job sozinho sempre roda)
+JOB_MAX_CONCURRENT = 2
+JOB_MEMORY_BUDGET_MB = 4096
+# memória estimada por MB de arquivo de entrada (xlsx é zip: expande bem mais que csv)
+JOB_MEMORY_FACTOR = {".csv": 4, ".xlsx": 15, ".xls": 8}
+
+# Base de referência local (SQLite) para INICIADOS/AVERBADOS/INTEGRADOS/RLE: cada export é ingerido
+# uma vez (upsert por chave) e o Step2 recebe só as linhas das chaves da X
+REFERENCE_STORE_ENABLED = False
+REFERENCE_STORE_PATH = os.path.join("store", "referencias.sqlite")
+
+# Pré-carga na interface: cada arquivo é lido (com schema) em segundo plano assim que é selecionado
+PREFETCH_ENABLED = True
+PREFETCH_MAX_WORKERS = 2
+
+# Processamento em lote sem interface (python -m app.cli): um processo por dia
+BATCH_MAX_WORKERS = 2
+BATCH_FILE_EXTENSIONS = [".csv", ".xlsx", ".xls"]
@@ -1,5 +1,6 @@
 # app/config/rules_config.py
 
+# Dentro do pipeline, vazio é NA (NaN/None); "#N/D" só é escrito na exportação
 DEFAULT_MISSING_VALUE = "#N/D"
 
 # Lista fechada do filtro (operações que você quer manter vindas do FRONT/CRM)
@@ -36,6 +36,10 @@ FILE_SCHEMAS = {
             "TAXA CESSÃO": "vlTaxaCessao",
         },
         "key_field": "nrContratoCred",  # chave pra iniciar o fluxo (depois vira nrContrato em alguns casos)
+        # texto original (com strip) guardado ao lado da chave normalizada: LEFT(nrCCB, 9), a
+        # regra "CCB INVESTIDOR" e o nrCCB/nrContrato exportados usam o texto como veio
+        # (zeros à esquerda, prefixos); a chave normalizada serve só para os joins
+        "raw_keys": ["nrCCB", "nrContratoCred"],
     },
 
     # ---------------------------
@@ -231,6 +235,25 @@ EXPORT_CSV_ENCODING = "utf-8"
 EXPORT_CSV_SEP = ";"
 DEFAULT_MISSING_VALUE = "#N/D"
 
+# Excel: escrita em streaming (openpyxl write_only) com células nativas de data/número.
+# Passando do limite de linhas do Excel, continua em novas abas ("Sheet1_2", ...).
+EXPORT_XLSX_STREAMING = True
+EXPORT_XLSX_SHEET_NAME = "Sheet1"
+EXPORT_NUMBER_FORMATS = {
+    "vlPrestacao": "#,##0.00",
+    "vlPrincipal": "#,##0.00",
+    "vlCessao": "#,##0.00",
+    "vlTaxaCessao": "0.00",
+}
+
+# CSV comprimido (formato -> compressão) e formatos colunares (colunas tipadas, texto como dicionário)
+EXPORT_CSV_COMPRESSION = {
+    "csv.gz": "gzip",
+    "csv.zst": "zstd",
+}
+EXPORT_COLUMNAR_FORMATS = ["parquet", "feather"]
+EXPORT_COLUMNAR_COMPRESSION = "zstd"
+
 # ============================================================
 # ALIASES: se o arquivo vier com nome diferente, padroniza
 # ============================================================
@@ -274,4 +297,60 @@ Y_DATE_COLUMNS = [
     "dtPrimeiroVencimentoAverbacao",
 ]
 
+# chaves de join: normalizadas no DataLoader (Int64, ou texto canônico se houver chave não numérica)
+KEY_COLUMNS = [
+    "nrCCB",
+    "nrContrato",
+    "nrContratoCred",
+]
+
+# chaves reduzidas aos dígitos antes da normalização (o \D+ que o Step2 aplicava no nrCCB)
+DIGIT_KEY_COLUMNS = [
+    "nrCCB",
+]
+
+# coluna com o texto original de uma chave listada em "raw_keys" do schema ("nrCCB" -> "nrCCB_raw")
+RAW_KEY_SUFFIX = "_raw"
+
+# valores monetários: texto do arquivo no pipeline e no export em texto (CSV/XLSX saem como vieram);
+# float (parse_br_number) só no export tipado
+Y_VALUE_COLUMNS = [
+    "vlPrestacao",
+    "vlPrincipal",
+    "vlCessao",
+]
+
+# texto de baixa cardinalidade: lido direto como pd.Categorical
+CATEGORY_COLUMNS = [
+    "dsOperacaoFront",
+    "dsOperacaoCRM",
+    "dsFundo",
+    "dsConvenio",
+    "dsOrigem",
+    "dsEsteira",
+    "dsTipoOperacao",
+    "dsConsignataria",
+]
+
+# ============================================================
+# Tipo de cada coluna (nome final) na leitura; o que não aparece aqui é texto.
+#   key      -> chave de join (Int64 ou texto canônico)
+#   date     -> datetime64 (só a data)
+#   numeric  -> float ("1.234,56" -> 1234.56)
+#   category -> pd.Categorical
+#   text     -> texto, "#N/D" literal vira NA
+# ============================================================
+COLUMN_KINDS = {
+    **{c: "key" for c in KEY_COLUMNS},
+    **{c: "date" for c in Y_DATE_COLUMNS},
+    "vlPrestacaoCalc": "numeric",
+    # poucos valores distintos: convênio, fundo, origem, operação, esteira, tipo, banco
+    **{c: "category" for c in CATEGORY_COLUMNS},
+}
+
+# demais colunas de texto viram categoria quando distintos <= CATEGORY_AUTO_MAX_RATIO * linhas
+# (só em bases com pelo menos CATEGORY_AUTO_MIN_ROWS linhas)
+CATEGORY_AUTO_MAX_RATIO = 0.01
+CATEGORY_AUTO_MIN_ROWS = 10_000
+
 MAX_TAXA_CESSAO_PCT = 10.0
\ No newline at end of file
@@ -13,6 +13,15 @@ FILE_ROWS = [
 EXPORT_FORMAT_OPTIONS = [
     ("Excel (.xlsx)", "xlsx"),
     ("CSV (.csv)", "csv"),
+    ("CSV gzip (.csv.gz)", "csv.gz"),
+    ("CSV zstd (.csv.zst)", "csv.zst"),
+    ("Parquet (.parquet)", "parquet"),
+    ("Feather (.feather)", "feather"),
 ]
 
-DEFAULT_EXPORT_FORMAT = "xlsx"
\ No newline at end of file
+DEFAULT_EXPORT_FORMAT = "xlsx"
+
+# Painel de logs: drenagem em lote a cada N ms, limite de linhas visíveis e nível mínimo
+UI_LOG_FLUSH_MS = 100
+UI_LOG_MAX_LINES = 5000
+UI_LOG_MIN_LEVEL = "INFO"
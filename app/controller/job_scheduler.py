@@ -0,0 +1,263 @@
+import itertools
+import os
+import threading
+from datetime import datetime
+from enum import Enum
+from app.config.robot_config import JOB_MAX_CONCURRENT, JOB_MEMORY_BUDGET_MB, JOB_MEMORY_FACTOR
+from app.controller.robot_controller import RobotController, RobotStatus
+from app.core.file_manager import FileManager
+from app.logs.log_manager import LogManager
+
+# Fila de execuções: cada job é um conjunto de bases (um dia, AKRK/DIG, ...) com o próprio
+# RobotController, ou seja, dataframes, status, execution_id e callbacks isolados.
+#
+#   scheduler = JobScheduler(max_concurrent=2)
+#   job = scheduler.submit(files, name="2025-01-02", export_format="parquet",
+#                          progress_callback=lambda job, current, total, message: ...)
+#   scheduler.wait()
+#
+# Os jobs começam na ordem em que entraram, até max_concurrent ao mesmo tempo e enquanto a memória
+# estimada (tamanho das entradas x JOB_MEMORY_FACTOR) dos que estão rodando couber no orçamento.
+# Um job maior que o orçamento roda sozinho. Cada job usa o executor do robô (PIPELINE_EXECUTOR):
+# em "thread" os jobs simultâneos dividem o GIL do processo da interface; em "process" cada um roda
+# num processo filho, de fato em paralelo.
+# prefetcher: pré-cargas da seleção enfileirada (Prefetcher.detach), usadas pelo robô do job.
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    STOPPED = "stopped"
+    ERROR = "error"
+    CANCELLED = "cancelled"
+
+
+FINAL_JOB_STATUSES = (JobStatus.FINISHED, JobStatus.STOPPED, JobStatus.ERROR, JobStatus.CANCELLED)
+
+
+def estimate_job_mb(files: dict) -> float:
+    total = 0.0
+    for path in files.values():
+        if not path or not os.path.exists(path):
+            continue
+        factor = JOB_MEMORY_FACTOR.get(os.path.splitext(path)[1].lower(), 4)
+        total += os.path.getsize(path) / (1024 * 1024) * factor
+    return total
+
+
+class Job:
+    def __init__(self, job_id: int, name: str, files: dict, export_format: str, output_dir: str,
+                 log_callback=None, progress_callback=None, status_callback=None, prefetcher=None):
+        self.job_id = job_id
+        self.name = name
+        self.files = dict(files)
+        self.export_format = export_format
+        self.output_dir = output_dir
+        self.estimated_mb = estimate_job_mb(self.files)
+        self.prefetcher = prefetcher
+
+        self.status = JobStatus.QUEUED
+        self.execution_id = None
+        self.export_path = None
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.robot = None
+
+        # callbacks por job: recebem o próprio job como primeiro argumento
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.status_callback = status_callback
+
+    def __repr__(self):
+        return f"Job({self.job_id}, {self.name!r}, {self.status.value})"
+
+
+class JobScheduler:
+    def __init__(self, max_concurrent=JOB_MAX_CONCURRENT, memory_budget_mb=JOB_MEMORY_BUDGET_MB, log_manager=None,
+                 robot_options=None, log_callback=None):
+        self.max_concurrent = max(1, min(max_concurrent, os.cpu_count() or 1))
+        self.memory_budget_mb = memory_budget_mb
+        # um LogManager só: execution_id único por job no mesmo índice
+        self.log_manager = log_manager or LogManager()
+        self.robot_options = dict(robot_options or {})
+        self.log_callback = log_callback
+
+        self.jobs = []
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+
+    def _log(self, message, level="INFO"):
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def submit(self, files: dict, name=None, export_format="xlsx", output_dir=None,
+               log_callback=None, progress_callback=None, status_callback=None, prefetcher=None) -> Job:
+        files = {key: path for key, path in files.items() if path}
+        if not files:
+            raise ValueError("Job sem arquivos.")
+
+        with self._cond:
+            job_id = next(self._ids)
+            job = Job(
+                job_id,
+                name or f"job {job_id}",
+                files,
+                export_format,
+                output_dir or os.path.join(os.getcwd(), "output"),
+                log_callback=log_callback,
+                progress_callback=progress_callback,
+                status_callback=status_callback,
+                prefetcher=prefetcher,
+            )
+            self.jobs.append(job)
+
+        self._log(f"[{job.name}] Job na fila (memória estimada {job.estimated_mb:.0f} MB)", "INFO")
+        self._notify_status(job)
+        self._dispatch()
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        with self._cond:
+            job = self._find(job_id)
+            if job is None or job.status in FINAL_JOB_STATUSES:
+                return False
+            if job.status == JobStatus.QUEUED:
+                job.status = JobStatus.CANCELLED
+                job.finished_at = datetime.now()
+                self._cond.notify_all()
+                robot = None
+            else:
+                robot = job.robot
+
+        if robot is not None:
+            robot.stop()
+        else:
+            self._release_prefetch(job)
+            self._log(f"[{job.name}] Job cancelado antes de iniciar", "WARNING")
+            self._notify_status(job)
+        return True
+
+    def stop_all(self):
+        # fila primeiro: assim os que estão rodando, ao parar, não liberam vaga para os da fila
+        with self._cond:
+            queued = [j.job_id for j in self.jobs if j.status == JobStatus.QUEUED]
+            running = [j.job_id for j in self.jobs if j.status == JobStatus.RUNNING]
+        for job_id in queued + running:
+            self.cancel(job_id)
+
+    def wait(self, timeout=None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: all(j.status in FINAL_JOB_STATUSES for j in self.jobs), timeout=timeout
+            )
+
+    def running(self) -> list:
+        with self._cond:
+            return [j for j in self.jobs if j.status == JobStatus.RUNNING]
+
+    def queued(self) -> list:
+        with self._cond:
+            return [j for j in self.jobs if j.status == JobStatus.QUEUED]
+
+    def _find(self, job_id: int) -> Job | None:
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+
+    def _dispatch(self):
+        # FIFO: o primeiro da fila espera vaga/memória; os de trás não passam na frente
+        to_start = []
+        with self._cond:
+            running = [j for j in self.jobs if j.status == JobStatus.RUNNING]
+            used_mb = sum(j.estimated_mb for j in running)
+
+            for job in self.jobs:
+                if job.status != JobStatus.QUEUED:
+                    continue
+                if len(running) >= self.max_concurrent:
+                    break
+                if running and used_mb + job.estimated_mb > self.memory_budget_mb:
+                    break
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.now()
+                running.append(job)
+                used_mb += job.estimated_mb
+                to_start.append(job)
+
+        for job in to_start:
+            self._start(job)
+
+    def _start(self, job: Job):
+        file_manager = FileManager()
+        for key, path in job.files.items():
+            file_manager.set_file(key, path)
+
+        def log(message, level="INFO"):
+            if job.log_callback:
+                job.log_callback(job, message, level)
+
+        def progress(current, total, message):
+            if job.progress_callback:
+                job.progress_callback(job, current, total, message)
+
+        robot = RobotController(
+            log_callback=log,
+            finish_callback=lambda: self._on_finish(job),
+            progress_callback=progress,
+            file_manager=file_manager,
+            export_format=job.export_format,
+            log_manager=self.log_manager,
+            prefetcher=job.prefetcher,
+            **self.robot_options,
+        )
+        robot.output_dir = job.output_dir
+        job.robot = robot
+
+        try:
+            robot.start()
+        except Exception as e:
+            job.status = JobStatus.ERROR
+            job.finished_at = datetime.now()
+            self._log(f"[{job.name}] Falha ao iniciar job: {e}", "ERROR")
+            self._on_finish(job, started=False)
+            return
+
+        job.execution_id = robot.execution_id
+        self._log(f"[{job.name}] Job iniciado (execução {job.execution_id})", "INFO")
+        self._notify_status(job)
+
+    def _on_finish(self, job: Job, started=True):
+        # chamado na thread do robô, depois de gravar o fim da execução
+        self._release_prefetch(job)
+        if started:
+            with self._cond:
+                job.export_path = job.robot.export_path
+                job.finished_at = datetime.now()
+                job.status = {
+                    RobotStatus.FINISHED: JobStatus.FINISHED,
+                    RobotStatus.STOPPED: JobStatus.STOPPED,
+                    RobotStatus.ERROR: JobStatus.ERROR,
+                }.get(job.robot.status, JobStatus.ERROR)
+
+            elapsed = (job.finished_at - job.started_at).total_seconds()
+            level = "SUCCESS" if job.status == JobStatus.FINISHED else "WARNING"
+            self._log(f"[{job.name}] Job {job.status.value} em {elapsed:.1f}s", level)
+
+        with self._cond:
+            self._cond.notify_all()
+        self._notify_status(job)
+        self._dispatch()
+
+    @staticmethod
+    def _release_prefetch(job: Job):
+        # pré-carga que o job não chegou a usar (parou/falhou antes da leitura) sai da memória
+        if job.prefetcher is not None:
+            job.prefetcher.release()
+            job.prefetcher = None
+
+    def _notify_status(self, job: Job):
+        if job.status_callback:
+            job.status_callback(job)
@@ -0,0 +1,292 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from app.config.robot_config import LOAD_CHUNK_ROWS, PREFETCH_MAX_WORKERS
+from app.core.csv_sniffer import file_fingerprint
+from app.core.data_loader import DataLoader
+
+# Pré-carga na interface: cada arquivo começa a ser lido (com schema aplicado) assim que é
+# selecionado, enquanto o usuário escolhe os outros. No INICIAR o robô pega o que já está pronto:
+#   - pipeline em thread (keep_frames=True): leitura em threads e o DataFrame fica em memória até o
+#     robô pegar (take)
+#   - pipeline em processo (keep_frames=False): leitura num processo separado, que só grava a entrada
+#     do ParseCache (o processo da interface não disputa o GIL nem guarda DataFrame); o filho do
+#     pipeline lê do cache e, se a pré-carga de um arquivo ainda estiver rodando, espera só por ele
+#     (on_done) enquanto carrega os outros
+# Trocar o arquivo de uma linha cancela a pré-carga anterior (ou descarta o resultado, se a leitura
+# já tiver começado). ENFILEIRAR entrega as pré-cargas da seleção ao job (detach) em vez de descartá-las.
+# A checagem de cabeçalho da seleção (DataLoader.preflight) também roda aqui, fora da thread do Tk:
+# mesmo tipo de executor da pré-carga, numa fila própria de 1 worker (não espera atrás das leituras).
+
+
+def _prefetch_in_process(key: str, path: str, cache):
+    # roda no processo da pré-carga: o DataFrame vai para o ParseCache e não volta pelo pipe
+    logs = []
+    loader = DataLoader(csv_encoding="utf-8", csv_sep=";", cache=cache, chunk_rows=LOAD_CHUNK_ROWS,
+                        log_callback=lambda message, level="INFO": logs.append((message, level)))
+    start = time.perf_counter()
+    loader.load_with_schema(key, path, use_cache=True)
+    return time.perf_counter() - start, logs
+
+
+def _preflight_in_process(key: str, path: str) -> dict:
+    return DataLoader(csv_encoding="utf-8", csv_sep=";").preflight(key, path)
+
+
+class PrefetchState:
+    QUEUED = "queued"
+    LOADING = "loading"
+    READY = "ready"
+    ERROR = "error"
+    CANCELLED = "cancelled"
+    USED = "used"
+
+
+class _Entry:
+    def __init__(self, key: str, path: str):
+        self.key = key
+        self.path = path
+        self.fingerprint = file_fingerprint(path)
+        self.state = PrefetchState.QUEUED
+        self.seconds = None
+        self.error = None
+        self.df = None
+        self.future = None
+        self.done = threading.Event()
+        # chamados (sem argumentos) quando a leitura termina ou é cancelada
+        self.on_done = []
+        # entregue a um job (detach): a linha da interface já é de outra seleção, não notifica
+        self.detached = False
+
+
+# o que o robô usa das pré-cargas (on_done/take/release), sobre um conjunto de entradas
+class _EntryView:
+    def __init__(self, entries: dict, lock):
+        self._entries = entries
+        self._lock = lock
+
+    def on_done(self, key: str, path: str, callback) -> bool:
+        # callback() quando a pré-carga deste arquivo terminar; False = nada em andamento (não chama)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.path != path or entry.done.is_set():
+                return False
+            entry.on_done.append(callback)
+            return True
+
+    def take(self, key: str, path: str, stop_event=None):
+        # DataFrame pré-carregado deste arquivo (espera se ainda estiver lendo); None = ler normalmente.
+        # Uma vez entregue sai da memória: a próxima execução usa o ParseCache.
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.path != path:
+            return None
+
+        while not entry.done.wait(0.2):
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+        try:
+            if file_fingerprint(path) != entry.fingerprint:
+                # arquivo alterado depois da seleção
+                entry.df = None
+                return None
+        except OSError:
+            return None
+
+        df, entry.df = entry.df, None
+        if df is not None:
+            entry.state = PrefetchState.USED
+            self._notify(entry)
+        return df
+
+    def release(self):
+        # solta os DataFrames que não foram usados (ex.: base pulada pela base de referência)
+        with self._lock:
+            for entry in self._entries.values():
+                entry.df = None
+
+    def _notify(self, entry: _Entry):
+        pass
+
+
+# pré-cargas de uma seleção já enfileirada (Prefetcher.detach): vão com o job para o robô dele
+class PrefetchBatch(_EntryView):
+    pass
+
+
+class Prefetcher(_EntryView):
+    def __init__(self, cache=None, keep_frames=True, max_workers=PREFETCH_MAX_WORKERS, log_callback=None,
+                 state_callback=None):
+        self.cache = cache
+        self.keep_frames = keep_frames
+        self.log_callback = log_callback
+        # state_callback(key, state, seconds, error): chamado da thread da pré-carga
+        self.state_callback = state_callback
+
+        self.loader = DataLoader(csv_encoding="utf-8", csv_sep=";", log_callback=self._loader_log, cache=cache,
+                                 chunk_rows=LOAD_CHUNK_ROWS)
+        self._pool = self._executor(max(1, max_workers), "prefetch")
+        self._preflight_pool = self._executor(1, "preflight")
+        super().__init__({}, threading.Lock())
+
+    def _executor(self, max_workers: int, name: str):
+        if self.keep_frames:
+            return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _log(self, message, level="INFO"):
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _loader_log(self, message, level="INFO"):
+        self._log(f"Pré-carga | {message}", level)
+
+    def submit(self, key: str, path: str):
+        self.cancel(key)
+        try:
+            entry = _Entry(key, path)
+        except OSError as e:
+            self._log(f"[{key}] Pré-carga ignorada: {e}", "WARNING")
+            return
+
+        self._notify(entry)
+        with self._lock:
+            self._entries[key] = entry
+        if self.keep_frames:
+            entry.future = self._pool.submit(self._load, entry)
+        else:
+            entry.future = self._pool.submit(_prefetch_in_process, key, path, self.cache)
+            entry.future.add_done_callback(lambda future, e=entry: self._loaded_in_process(e, future))
+
+    def preflight(self, key: str, path: str, callback):
+        # callback(result) com o resultado de DataLoader.preflight, chamado da thread do executor
+        try:
+            if self.keep_frames:
+                future = self._preflight_pool.submit(self.loader.preflight, key, path)
+            else:
+                future = self._preflight_pool.submit(_preflight_in_process, key, path)
+        except RuntimeError as e:
+            # executor encerrado/quebrado (BrokenProcessPool é RuntimeError)
+            callback(self._preflight_failed(key, path, e))
+            return
+        future.add_done_callback(lambda f: callback(self._preflight_result(key, path, f)))
+
+    def _preflight_result(self, key: str, path: str, future) -> dict:
+        try:
+            return future.result()
+        except Exception as e:
+            return self._preflight_failed(key, path, e)
+
+    @staticmethod
+    def _preflight_failed(key: str, path: str, error) -> dict:
+        # mesma forma do resultado de DataLoader.preflight: arquivo não verificado não entra
+        return {
+            "key": key,
+            "path": path,
+            "status": "error",
+            "message": f"falha na verificação do cabeçalho: {error}",
+            "missing": [],
+            "aliased": {},
+            "header": [],
+            "format": {},
+            "seconds": 0.0,
+        }
+
+    def cancel(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            # leitura em andamento não é interrompida: termina e o resultado é descartado
+            entry.df = None
+            active = entry.state in (PrefetchState.QUEUED, PrefetchState.LOADING)
+            if active:
+                entry.state = PrefetchState.CANCELLED
+
+        if entry.future is not None:
+            entry.future.cancel()
+        if active:
+            self._set_done(entry)
+            self._notify(entry)
+
+    def clear(self):
+        with self._lock:
+            keys = list(self._entries)
+        for key in keys:
+            self.cancel(key)
+
+    def detach(self) -> PrefetchBatch:
+        # entrega as pré-cargas atuais (prontas ou ainda lendo) e começa uma seleção vazia; as leituras
+        # em andamento terminam normalmente, só param de aparecer na interface
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            for entry in entries.values():
+                entry.detached = True
+        return PrefetchBatch(entries, self._lock)
+
+    def state(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.state if entry else None
+
+    def shutdown(self):
+        self.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._preflight_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _load(self, entry: _Entry):
+        with self._lock:
+            if entry.state == PrefetchState.CANCELLED:
+                return
+            entry.state = PrefetchState.LOADING
+        self._notify(entry)
+
+        start = time.perf_counter()
+        df, error = None, None
+        try:
+            df = self.loader.load_with_schema(entry.key, entry.path, use_cache=self.cache is not None)
+        except Exception as e:
+            error = e
+        self._finish(entry, df, error, time.perf_counter() - start)
+
+    def _loaded_in_process(self, entry: _Entry, future):
+        # callback do ProcessPoolExecutor (thread interna do executor)
+        if future.cancelled():
+            return
+        seconds, error = None, future.exception()
+        if error is None:
+            seconds, logs = future.result()
+            for message, level in logs:
+                self._loader_log(message, level)
+        self._finish(entry, None, error, seconds)
+
+    def _finish(self, entry: _Entry, df, error, seconds):
+        with self._lock:
+            cancelled = entry.state == PrefetchState.CANCELLED
+            if not cancelled:
+                entry.seconds = seconds
+                entry.error = error
+                entry.df = df if self.keep_frames else None
+                entry.state = PrefetchState.ERROR if error else PrefetchState.READY
+        self._set_done(entry)
+
+        if cancelled:
+            return
+        if error:
+            self._log(f"[{entry.key}] Falha na pré-carga: {error}", "WARNING")
+        self._notify(entry)
+
+    def _set_done(self, entry: _Entry):
+        with self._lock:
+            if entry.done.is_set():
+                return
+            entry.done.set()
+            callbacks, entry.on_done = entry.on_done, []
+        for callback in callbacks:
+            callback()
+
+    def _notify(self, entry: _Entry):
+        if self.state_callback and not entry.detached:
+            self.state_callback(entry.key, entry.state, entry.seconds, entry.error)
@@ -1,7 +1,12 @@
+import multiprocessing
 import os
+import queue
+import shutil
+import tempfile
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -9,13 +14,34 @@ from enum import Enum
 from app.logs.log_manager import LogManager
 from uuid import uuid4
 from app.core.data_loader import DataLoader, DataLoaderError
-from app.config.robot_config import FILE_PLAN
-from app.config.schemas import Y_DATE_COLUMNS, EXPORT_CSV_SEP, EXPORT_CSV_ENCODING, DEFAULT_MISSING_VALUE
+from app.config.robot_config import (
+    FILE_PLAN, LOAD_PARALLEL, LOAD_MAX_WORKERS, LOAD_EXECUTOR, LOAD_SEMI_JOIN, LOAD_CHUNK_ROWS,
+    PARSE_CACHE_ENABLED, PARSE_CACHE_DIR, PARSE_CACHE_MAX_MB, PARSE_CACHE_HASH_CONTENT, TRACING_ENABLED,
+    INCREMENTAL_ENABLED, INCREMENTAL_STATE_DIR, PIPELINE_EXECUTOR, PIPELINE_STOP_GRACE_SECONDS,
+    REFERENCE_STORE_ENABLED, REFERENCE_STORE_PATH,
+)
+from app.core.file_manager import FileManager
+from app.core.parse_cache import ParseCache
+from app.core.tracing import Tracer
+from app.core.incremental import IncrementalState, FP_COLUMN, row_fingerprints, assemble_y, state_scope
+from app.core.reference_store import ReferenceStore, REFERENCE_GROUPS, reference_group_of
+from app.core.date_normalizer import normalize_dates
+from app.core.br_numbers import format_vl_taxa_cessao, parse_br_number, taxa_points
+from app.core.xlsx_writer import write_xlsx_streaming
+from app.core.export_writers import write_csv_stream, write_columnar
+from app.core.keys import build_key_set, key_set_size
+from app.core.categories import fill_missing
+from app.config.schemas import FILE_SCHEMAS, Y_DATE_COLUMNS, Y_VALUE_COLUMNS, EXPORT_CSV_SEP, EXPORT_CSV_ENCODING, DEFAULT_MISSING_VALUE
+from app.config.schemas import EXPORT_XLSX_STREAMING, EXPORT_XLSX_SHEET_NAME, EXPORT_NUMBER_FORMATS
+from app.config.schemas import EXPORT_CSV_COMPRESSION, EXPORT_COLUMNAR_FORMATS, EXPORT_COLUMNAR_COMPRESSION
 from app.core.processors.step1_builder import Step1Builder
 from openpyxl import load_workbook
 from app.core.processors.step2_enricher import Step2Enricher
 
 
+PARTIAL_EXPORT_TAG = ".parcial"
+
+
 class RobotStatus(Enum):
     IDLE = "idle"
     RUNNING = "running"
@@ -23,40 +49,63 @@ class RobotStatus(Enum):
     FINISHED = "finished"
     ERROR = "error"
 
-def format_vl_taxa_cessao(series: pd.Series, max_pct: float = 3.99) -> pd.Series:
-    raw = series.astype(str).str.strip()
-
-    had_pct = raw.str.contains("%", na=False)
-
-    raw = raw.replace({"#N/D": "", "nan": "", "None": "", "": ""})
-    raw = raw.str.replace("%", "", regex=False)
-    raw = raw.str.replace("\u00a0", " ", regex=False) 
-    raw = raw.str.replace(",", ".", regex=False)
-    raw = raw.str.replace(r"[^0-9\.\-]+", "", regex=True)
-
-    num = pd.to_numeric(raw, errors="coerce")
-
-    pct = pd.Series(index=num.index, dtype="float64")
-    pct[:] = float("nan")
-
-    pct = pct.where(~had_pct, num)
-
-    no_pct = ~had_pct
-    pct = pct.where(~(no_pct & (num > 1)), num)
-    pct = pct.where(~(no_pct & (num > 0) & (num <= 1)), num * 100)
-
-    for _ in range(6):
-        mask = pct.notna() & (pct > max_pct) & (pct <= 1000)
-        if not mask.any():
-            break
-        pct = pct.where(~mask, pct / 10)
-
-    pct = pct.where(pct.notna() & (pct >= 0) & (pct <= 100), float("nan"))
+def _load_file_in_worker(key: str, path: str, csv_encoding: str, csv_sep: str, cache=None, use_cache=True,
+                         keep_keys=None, chunk_rows=LOAD_CHUNK_ROWS, tracing=False):
+    # roda em outro processo: os logs e os spans voltam junto com o DataFrame
+    logs = []
+    tracer = Tracer(enabled=tracing)
+    loader = DataLoader(
+        csv_encoding=csv_encoding,
+        csv_sep=csv_sep,
+        log_callback=lambda message, level="INFO": logs.append((message, level)),
+        cache=cache,
+        chunk_rows=chunk_rows,
+        tracer=tracer,
+    )
+    df = loader.load_with_schema(key, path, use_cache=use_cache, keep_keys=keep_keys)
+    return df, logs, tracer.records
+
+def _run_pipeline_in_worker(options: dict, files: dict, output_dir: str, handoff_dir: str, events, stop_event,
+                            prefetch_waits=None):
+    # roda no processo filho (pipeline_executor="process"): logs e progresso voltam pela fila,
+    # a Y volta como arquivo Arrow em handoff_dir (sem serializar o DataFrame pelo pipe)
+    # prefetch_waits: base -> Event que o pai marca quando a pré-carga dela chega ao ParseCache
+    file_manager = FileManager()
+    for key, path in files.items():
+        file_manager.set_file(key, path)
+
+    robot = RobotController(
+        log_callback=lambda message, level="INFO": events.put(("log", message, level)),
+        progress_callback=lambda current, total, message: events.put(("progress", current, total, message)),
+        file_manager=file_manager,
+        pipeline_executor="thread",
+        **options,
+    )
+    robot._stop_event = stop_event
+    robot.prefetch_waits = prefetch_waits or {}
+    robot.partial_export_callback = lambda path: events.put(("partial", path))
+    robot.output_dir = output_dir
+    robot.status = RobotStatus.RUNNING
+    robot._execute()
+
+    y_path = None
+    df_y = robot.dataframes.get("y")
+    if robot.status == RobotStatus.FINISHED and df_y is not None:
+        y_path = os.path.join(handoff_dir, "y.feather")
+        try:
+            df_y.reset_index(drop=True).to_feather(y_path)
+        except Exception:
+            y_path = None
 
-    return pct.round(2).map(lambda x: f"{x:.2f}" if pd.notna(x) else "#N/D")
+    rows = {key: len(df) for key, df in robot.dataframes.items() if df is not None}
+    events.put(("done", robot.status.value, robot.export_path, y_path, rows, robot.tracer.records))
 
 class RobotController:
-    def __init__(self, log_callback=None, status_callback=None, finish_callback=None, progress_callback=None, file_manager=None, export_format="xlsx"):
+    def __init__(self, log_callback=None, status_callback=None, finish_callback=None, progress_callback=None, file_manager=None, export_format="xlsx",
+                 load_parallel=LOAD_PARALLEL, load_workers=LOAD_MAX_WORKERS, load_executor=LOAD_EXECUTOR,
+                 use_parse_cache=PARSE_CACHE_ENABLED, semi_join=LOAD_SEMI_JOIN, log_manager=None,
+                 tracing=TRACING_ENABLED, incremental=INCREMENTAL_ENABLED, pipeline_executor=PIPELINE_EXECUTOR,
+                 reference_store=REFERENCE_STORE_ENABLED, prefetcher=None):
         self.status = RobotStatus.IDLE
         self._stop_event = threading.Event()
         self.log = log_callback
@@ -66,28 +115,67 @@ class RobotController:
         self.status_callback = status_callback
         self._thread = None
 
+        self.tracer = Tracer(enabled=tracing)
+
         self.step1_builder = Step1Builder(
         log_callback=self._log,
-        stop_callback=lambda: self._stop_event.is_set())
+        stop_callback=lambda: self._stop_event.is_set(),
+        tracer=self.tracer)
 
         self.step2_enricher = Step2Enricher(
         log_callback=self._log,
-        stop_callback=lambda: self._stop_event.is_set())
+        stop_callback=lambda: self._stop_event.is_set(),
+        tracer=self.tracer)
         
-        self.log_manager = LogManager()
+        self.log_manager = log_manager or LogManager()
         self.execution_id = None
 
         self.progress_callback = progress_callback
 
         self.file_manager = file_manager
         
-        self.loader = DataLoader(csv_encoding="utf-8", csv_sep=";", log_callback=self._log)
+        parse_cache = None
+        if use_parse_cache:
+            parse_cache = ParseCache(
+                cache_dir=PARSE_CACHE_DIR,
+                max_bytes=PARSE_CACHE_MAX_MB * 1024 * 1024,
+                hash_content=PARSE_CACHE_HASH_CONTENT,
+            )
+        self.loader = DataLoader(csv_encoding="utf-8", csv_sep=";", log_callback=self._log, cache=parse_cache,
+                                 chunk_rows=LOAD_CHUNK_ROWS, tracer=self.tracer)
+        self.use_parse_cache = use_parse_cache
         
         self.dataframes = {}
 
         self.output_dir = os.path.join(os.getcwd(), "output")
 
         self.export_format = export_format
+        self.export_path = None
+
+        self.load_parallel = load_parallel
+        self.load_workers = load_workers
+        self.load_executor = load_executor
+        self.semi_join = semi_join
+
+        # incremental: reaproveita a Y da execução anterior para as linhas de X que não mudaram
+        self.incremental = incremental
+        # criado a cada execução: o estado é por output_dir
+        self.incremental_state = None
+
+        # base de referência (SQLite): INICIADOS/AVERBADOS/INTEGRADOS/RLE ingeridos uma vez e
+        # consultados só pelas chaves da X
+        self.reference_store = ReferenceStore(REFERENCE_STORE_PATH, log_callback=self._log) if reference_store else None
+
+        # "process": carregamento + processamento + export num processo filho (ver _run_isolated)
+        self.pipeline_executor = pipeline_executor
+        self.rows_by_frame = {}
+        # avisado com o caminho do ".parcial" assim que ele é reservado (o pai apaga só esse se matar o filho)
+        self.partial_export_callback = None
+
+        # pré-carga da interface (Prefetcher): bases lidas enquanto os arquivos eram selecionados
+        self.prefetcher = prefetcher
+        # no filho do pipeline em processo: base -> Event de "pré-carga gravada no ParseCache"
+        self.prefetch_waits = {}
 
     def _log(self, message, level="INFO"):
         if self.log_callback:
@@ -102,6 +190,8 @@ class RobotController:
 
     def start(self):
         if self.status == RobotStatus.RUNNING:
+            # um robô = uma execução; várias execuções enfileiradas ficam no JobScheduler
+            self._log("Execução já em andamento; use a fila (JobScheduler) para enfileirar outra", "WARNING")
             return
 
         self.execution_id = self.log_manager.start_execution()
@@ -113,9 +203,24 @@ class RobotController:
         
         self._stop_event.clear()
 
-        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread = threading.Thread(target=self._runner(), daemon=True)
         self._thread.start()
     
+    def run(self):
+        # mesma execução do start(), mas bloqueando a thread atual (uso sem interface)
+        if self.status == RobotStatus.RUNNING:
+            return self.status
+
+        self.execution_id = self.log_manager.start_execution()
+        self._set_status(RobotStatus.RUNNING)
+        self._stop_event.clear()
+
+        self._runner()()
+        return self.status
+
+    def _runner(self):
+        return self._run_isolated if self.pipeline_executor == "process" else self._run
+
     def stop(self):
         if self.status != RobotStatus.RUNNING:
             return
@@ -125,49 +230,203 @@ class RobotController:
         self._set_status(RobotStatus.STOPPED)
 
     def _run(self):
+        try:
+            self._execute()
+        finally:
+            self._finish_run()
+
+    def _execute(self):
+        self.tracer.reset()
         try:
             self._log("Iniciando processamento do robô", "SUCCESS")
 
             self._progress(1, 4, "Carregando arquivos")
-            self._step_load_files()
+            with self.tracer.span("load"):
+                self._step_load_files()
             if self._stop_event.is_set(): 
                 return
 
+            # Step1/Step2 abrem os próprios spans ("step1", "step2")
             self._progress(2, 4, "Processando dados")
             self._step_process_data()
             if self._stop_event.is_set(): 
                 return
             
             self._progress(3, 4, "Validando contratos")
-            self._step_validate()
+            with self.tracer.span("validate"):
+                self._step_validate()
             if self._stop_event.is_set(): 
                 return
             
             self._progress(4, 4, "Exportando planilha")
-            self._step_export()
+            df_y = self.dataframes.get("y")
+            with self.tracer.span("export", rows_in=0 if df_y is None else len(df_y)):
+                self._step_export()
 
-            if not self._stop_event.is_set():
+            if not self._stop_event.is_set() and self.status == RobotStatus.RUNNING:
                 self._set_status(RobotStatus.FINISHED)
                 self._log("Processamento finalizado com sucesso", "SUCCESS")
         
         except Exception as e:
-            self._set_status(RobotStatus.ERROR)
-            self._log(f"Erro inesperado: {e}", "ERROR")
+            self._fail(e)
+
+    def _fail(self, e: Exception):
+        self._set_status(RobotStatus.ERROR)
+        self._log(f"Erro inesperado: {e}", "ERROR")
+
+        tb = traceback.format_exc()
+        self._log("Erro inesperado (traceback completo):", "ERROR")
+        self._log(tb, "ERROR")
 
-            tb = traceback.format_exc()
-            self._log("Erro inesperado (traceback completo):", "ERROR")
-            self._log(tb, "ERROR")
+    def _finish_run(self):
+        self._finish_tracing()
 
+        if self.status == RobotStatus.STOPPED:
+            self.log_manager.finish_execution(self.execution_id, "STOPPED")
+        elif self.status == RobotStatus.ERROR:
+            self.log_manager.finish_execution(self.execution_id, "ERROR")
+        else:
+            self.log_manager.finish_execution(self.execution_id, "FINISHED")
+
+        if self.on_finish:
+            self.on_finish()
+
+    def _worker_options(self) -> dict:
+        # carregamento em threads dentro do filho: um terminate() não deixa processos netos órfãos
+        return {
+            "export_format": self.export_format,
+            "load_parallel": self.load_parallel,
+            "load_workers": self.load_workers,
+            "load_executor": "thread",
+            "use_parse_cache": self.use_parse_cache,
+            "semi_join": self.semi_join,
+            "tracing": self.tracer.enabled,
+            "incremental": self.incremental,
+            "reference_store": self.reference_store is not None,
+        }
+
+    def _run_isolated(self):
+        # pipeline num processo filho: a interface (Tk) não disputa o GIL com pandas/openpyxl e o
+        # PARAR não depende de a etapa atual checar o _stop_event
+        try:
+            self.tracer.reset()
+            self._execute_in_worker()
+        except Exception as e:
+            self._fail(e)
         finally:
-            if self.status == RobotStatus.STOPPED:
-                self.log_manager.finish_execution(self.execution_id, "STOPPED")
-            elif self.status == RobotStatus.ERROR:
-                self.log_manager.finish_execution(self.execution_id, "ERROR")
-            else:
-                self.log_manager.finish_execution(self.execution_id, "FINISHED")
-                        
-            if self.on_finish:
-                self.on_finish()
+            self._finish_run()
+
+    def _execute_in_worker(self):
+        if not self.file_manager:
+            raise DataLoaderError("FileManager não foi informado no robô.")
+
+        ctx = multiprocessing.get_context("spawn")
+        events = ctx.Queue()
+        stop_event = ctx.Event()
+        files = {key: path for key, path in self.file_manager.files.items() if path}
+        handoff_dir = tempfile.mkdtemp(prefix="cessao_prime_")
+        partial_path = None
+
+        # o filho lê do ParseCache o que a pré-carga gravou; leituras ainda em andamento não seguram
+        # o início: o filho espera cada uma só quando for carregar aquela base
+        prefetch_waits = {}
+        if self.prefetcher is not None:
+            for key, path in files.items():
+                done = ctx.Event()
+                if self.prefetcher.on_done(key, path, done.set):
+                    prefetch_waits[key] = done
+
+        worker = ctx.Process(
+            target=_run_pipeline_in_worker,
+            args=(self._worker_options(), files, self.output_dir, handoff_dir, events, stop_event, prefetch_waits),
+            daemon=True,
+        )
+        worker.start()
+        self._log(f"Pipeline em processo separado (pid {worker.pid})", "INFO")
+
+        done = None
+        deadline = None
+        try:
+            while done is None:
+                if self._stop_event.is_set() and deadline is None:
+                    # parada cooperativa primeiro; passou do prazo, o processo é encerrado
+                    stop_event.set()
+                    deadline = time.monotonic() + PIPELINE_STOP_GRACE_SECONDS
+
+                if deadline is not None and time.monotonic() > deadline:
+                    self._kill_worker(worker)
+                    self._log(f"Processo do pipeline encerrado após {PIPELINE_STOP_GRACE_SECONDS:g}s sem parar", "WARNING")
+                    return
+
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    if not worker.is_alive():
+                        break
+                    continue
+
+                if event[0] == "log":
+                    self._log(event[1], event[2])
+                elif event[0] == "progress":
+                    self._progress(event[1], event[2], event[3])
+                elif event[0] == "partial":
+                    partial_path = event[1]
+                elif event[0] == "done":
+                    done = event
+
+            worker.join(timeout=PIPELINE_STOP_GRACE_SECONDS)
+            if done is None:
+                raise RuntimeError(f"processo do pipeline terminou sem resultado (código {worker.exitcode})")
+
+            _, status, export_path, y_path, rows, spans = done
+            self.tracer.extend(spans)
+            self.rows_by_frame = rows
+            self.export_path = export_path
+            if y_path:
+                self.dataframes["y"] = pd.read_feather(y_path)
+
+            if self.status != RobotStatus.STOPPED:
+                self._set_status(RobotStatus(status))
+        finally:
+            if worker.is_alive():
+                self._kill_worker(worker)
+            if done is None:
+                # filho encerrado à força ou que morreu sem "done" (erro fatal, falta de memória):
+                # o ".parcial" que ele reservou ficaria para trás
+                self._remove_partial_export(partial_path)
+            events.close()
+            shutil.rmtree(handoff_dir, ignore_errors=True)
+
+    @staticmethod
+    def _kill_worker(worker):
+        worker.terminate()
+        worker.join(timeout=2)
+        if worker.is_alive():
+            worker.kill()
+            worker.join()
+
+    def _remove_partial_export(self, path: str | None):
+        # export interrompido à força deixa o ".parcial" que o filho reservou (o nome final é dado no
+        # fim); só esse arquivo sai: outros jobs podem estar exportando no mesmo output_dir
+        if not path:
+            return
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+                self._log(f"Export parcial removido: {path}", "INFO")
+        except OSError:
+            pass
+
+    def _finish_tracing(self):
+        # spans ficam no registro da execução (índice do LogManager) + tabela resumo no log
+        if not self.tracer.enabled or not self.tracer.records:
+            return
+        try:
+            self._log("Resumo por etapa:\n" + self.tracer.summary(), "INFO")
+            if self.execution_id:
+                self.log_manager.update_execution(self.execution_id, spans=self.tracer.records)
+        except Exception as e:
+            self._log(f"Falha ao gravar spans da execução: {e}", "WARNING")
 
     def _set_status(self, status: RobotStatus):
         self.status = status
@@ -184,23 +443,214 @@ class RobotController:
         else:
             self._log("Todos os arquivos foram selecionados.", "SUCCESS")
 
+        jobs = []
         for key, label, required in FILE_PLAN:
-            if self._stop_event.is_set():
-                return
-
             path = self.file_manager.files.get(key)
             if not path:
                 self._log(f"Pulando (não selecionado): {label}", "WARNING")
                 continue
+            jobs.append((key, label, path))
+
+        if self.reference_store is not None:
+            jobs = self._skip_current_references(jobs)
+
+        key_sets = None
+        x_jobs = [job for job in jobs if job[0] == "cessao"]
+        if self.semi_join and x_jobs:
+            # X primeiro: as chaves dela decidem quais linhas das outras bases ficam
+            self._load_files_sequential(x_jobs)
+            if self._stop_event.is_set():
+                return
+            key_sets = self._semi_join_key_sets(self.dataframes["cessao"])
+            jobs = [job for job in jobs if job[0] != "cessao"]
+
+        if self.load_parallel and self.load_workers > 1 and len(jobs) > 1:
+            self._load_files_parallel(jobs, key_sets)
+        else:
+            self._load_files_sequential(jobs, key_sets)
+
+        if self.prefetcher is not None:
+            self.prefetcher.release()
+
+        if self.reference_store is not None and not self._stop_event.is_set():
+            with self.tracer.span("reference_store"):
+                self._sync_reference_store()
+
+    def _skip_current_references(self, jobs):
+        # exports já ingeridos (mesmo arquivo) não são lidos de novo
+        remaining = []
+        for key, label, path in jobs:
+            if reference_group_of(key) and self.reference_store.is_current(key, path):
+                self._log(f"Já na base de referência (sem leitura): {label}", "INFO")
+                continue
+            remaining.append((key, label, path))
+        return remaining
+
+    def _sync_reference_store(self):
+        # ingere as bases de referência lidas agora e troca cada grupo pelas linhas das chaves da X
+        for key, label, required in FILE_PLAN:
+            df = self.dataframes.pop(key, None) if reference_group_of(key) else None
+            if df is not None:
+                self.reference_store.ingest(key, self.file_manager.files.get(key), df)
+
+        df_x = self.dataframes.get("cessao")
+        if df_x is None or df_x.empty:
+            return
+
+        x_keys = {"nrCCB": df_x["nrCCB"], "nrContrato": self.step1_builder.contract_keys(df_x)}
+        for group, (keys, on) in REFERENCE_GROUPS.items():
+            # só as bases selecionadas nesta execução: o que ficou na base de outro dia não vale
+            selected = [key for key in keys if self.file_manager.files.get(key)]
+            if not selected:
+                continue
+            # o grupo inteiro (AKRK + DIG já resolvidos) vai na primeira chave; a outra fica vazia
+            self.dataframes[keys[0]] = self.reference_store.lookup(group, x_keys[on], selected)
+
+    def _semi_join_key_sets(self, df_x: pd.DataFrame) -> dict:
+        key_sets = {
+            "nrCCB": build_key_set(df_x["nrCCB"]),
+            "nrContrato": build_key_set(self.step1_builder.contract_keys(df_x)),
+        }
+        self._log(
+            "Semi-join: chaves da X | "
+            + " | ".join(f"{field}: {key_set_size(ks)}" for field, ks in key_sets.items()),
+            "INFO",
+        )
+        return key_sets
+
+    @staticmethod
+    def _keep_keys_for(key: str, key_sets: dict | None):
+        if key_sets is None or reference_group_of(key):
+            # base de referência é lida inteira para a ingestão
+            return None
+        return key_sets.get(FILE_SCHEMAS[key]["key_field"])
+
+    def _take_prefetched(self, jobs, key_sets=None):
+        # bases que a pré-carga já deixou prontas entram direto; o resto segue para a leitura
+        if self.prefetcher is None:
+            return jobs
+
+        remaining = []
+        for key, label, path in jobs:
+            if self._stop_event.is_set():
+                return []
+
+            df = self.prefetcher.take(key, path, self._stop_event)
+            if df is None:
+                remaining.append((key, label, path))
+                continue
+
+            with self.tracer.span(key, parent="load") as span:
+                keep_keys = self._keep_keys_for(key, key_sets)
+                if keep_keys is not None:
+                    df = self.loader.semi_join(key, df, keep_keys)
+                span.set(rows_out=len(df))
+
+            self.dataframes[key] = df
+            self._log(f"Pré-carregado: {label} | {df.shape[0]} linhas, {df.shape[1]} colunas", "SUCCESS")
+        return remaining
+
+    def _wait_prefetch(self, key: str, label: str) -> bool:
+        # filho do pipeline em processo: a base ainda está na pré-carga da interface -> espera ela
+        # chegar ao ParseCache em vez de ler o arquivo de novo (False = PARAR durante a espera)
+        done = self.prefetch_waits.get(key)
+        if done is None or done.is_set():
+            return True
+        self._log(f"Aguardando pré-carga: {label}", "INFO")
+        while not done.wait(0.2):
+            if self._stop_event.is_set():
+                return False
+        return True
+
+    def _load_one(self, key: str, label: str, path: str, keep_keys=None):
+        if not self._wait_prefetch(key, label):
+            return None
+        return self.loader.load_with_schema(key, path, use_cache=self.use_parse_cache, keep_keys=keep_keys)
+
+    def _load_files_sequential(self, jobs, key_sets=None):
+        jobs = self._take_prefetched(jobs, key_sets)
+        for key, label, path in jobs:
+            if self._stop_event.is_set():
+                return
 
             self._log(f"Carregando arquivo: {label}", "INFO")
 
-            df = self.loader.load_with_schema(key, path)
+            df = self._load_one(key, label, path, self._keep_keys_for(key, key_sets))
+            if df is None:
+                return
 
             self.dataframes[key] = df
 
             self._log(f"Concluído: {label} | {df.shape[0]} linhas, {df.shape[1]} colunas","SUCCESS")
-        
+
+    def _load_files_parallel(self, jobs, key_sets=None):
+        jobs = self._take_prefetched(jobs, key_sets)
+        if not jobs:
+            return
+
+        use_process = self.load_executor == "process"
+        executor_cls = ProcessPoolExecutor if use_process else ThreadPoolExecutor
+        workers = min(self.load_workers, len(jobs))
+
+        self._log(f"Carregamento paralelo: {len(jobs)} arquivos | {workers} workers ({self.load_executor})", "INFO")
+
+        pool = executor_cls(max_workers=workers)
+        futures = {}
+        errors = []
+
+        try:
+            for key, label, path in jobs:
+                self._log(f"Carregando arquivo: {label}", "INFO")
+                keep_keys = self._keep_keys_for(key, key_sets)
+                if use_process:
+                    fut = pool.submit(
+                        _load_file_in_worker, key, path, self.loader.csv_encoding, self.loader.csv_sep,
+                        self.loader.cache, self.use_parse_cache, keep_keys, self.loader.chunk_rows,
+                        self.tracer.enabled,
+                    )
+                else:
+                    fut = pool.submit(self._load_one, key, label, path, keep_keys)
+                futures[fut] = (key, label)
+
+            pending = set(futures)
+            while pending:
+                # timeout curto para continuar respeitando o PARAR entre arquivos
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+
+                for fut in done:
+                    key, label = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        self._log(f"Falha ao carregar: {label} | {e}", "ERROR")
+                        errors.append((label, e))
+                        continue
+
+                    if use_process:
+                        df, logs, spans = result
+                        for message, level in logs:
+                            self._log(message, level)
+                        self.tracer.extend(spans)
+                    else:
+                        df = result
+                    if df is None:
+                        # PARAR enquanto esperava a pré-carga
+                        continue
+
+                    self.dataframes[key] = df
+                    self._log(f"Concluído: {label} | {df.shape[0]} linhas, {df.shape[1]} colunas","SUCCESS")
+
+                if self._stop_event.is_set() or errors:
+                    for fut in pending:
+                        fut.cancel()
+                    break
+        finally:
+            pool.shutdown(wait=not self._stop_event.is_set(), cancel_futures=True)
+
+        if errors and not self._stop_event.is_set():
+            label, e = errors[0]
+            raise DataLoaderError(f"Falha ao carregar {len(errors)} arquivo(s). Primeiro erro em {label}: {e}") from e
+
     def _step_process_data(self):
         self._log("Etapa 2: Processando dados", "INFO")
 
@@ -219,6 +669,15 @@ class RobotController:
             self._log("FRONT AKRK e FRONT DIG não foram carregados (ou estão vazios).", "ERROR")
             return
 
+        if self.incremental:
+            with self.tracer.span("incremental", rows_in=len(df_x)) as span:
+                df_y_final = self._process_incremental(df_x)
+                span.set(rows_out=None if df_y_final is None else len(df_y_final))
+            if df_y_final is not None:
+                self.dataframes["y"] = df_y_final
+                self._log(f"Etapa 2 concluída: Y final pronta: {len(df_y_final)} linhas", "SUCCESS")
+            return
+
         # 2.0 = Step1 (gera Y básica)
         df_y_base = self.step1_builder.build(df_x, df_front_akrk, df_front_dig)
         self._log(f"Etapa 2.0: Y base gerada: {len(df_y_base)} linhas", "SUCCESS")
@@ -240,6 +699,57 @@ class RobotController:
         self.dataframes["y"] = df_y_final
         self._log(f"Etapa 2 concluída: Y final pronta: {len(df_y_final)} linhas", "SUCCESS")
         
+    def _build_y(self, df_x):
+        df_y_base = self.step1_builder.build(df_x, self.dataframes.get("frontAkrk"), self.dataframes.get("frontDig"))
+        if self._stop_event.is_set():
+            return None
+        return self.step2_enricher.build(
+            df_y=df_y_base,
+            df_cred_akrk=self.dataframes.get("credAkrk"),
+            df_cred_dig=self.dataframes.get("credDig"),
+            df_averb_akrk=self.dataframes.get("averbadosAkrk"),
+            df_averb_dig=self.dataframes.get("averbadosDig"),
+            df_integrados=self.dataframes.get("integradosFunc"),
+            df_esteiras=self.dataframes.get("esteirasFunc"),
+        )
+
+    def _process_incremental(self, df_x):
+        # só as linhas de X com fingerprint novo passam pelo Step1/Step2; o resto vem do estado salvo
+        fingerprints = row_fingerprints(df_x, self.step1_builder.contract_keys(df_x), self.dataframes)
+        self.incremental_state = IncrementalState(INCREMENTAL_STATE_DIR, scope=state_scope(self.output_dir))
+        previous, dropped = self.incremental_state.load()
+        if previous is None:
+            self._log("Incremental: sem estado válido (primeira execução ou regras alteradas); processando tudo", "INFO")
+
+        known = np.isin(fingerprints, dropped)
+        if previous is not None:
+            known |= np.isin(fingerprints, previous[FP_COLUMN].to_numpy())
+        delta = np.flatnonzero(~known)
+        self._log(f"Incremental: {len(df_x) - len(delta)} linhas reaproveitadas | {len(delta)} novas/alteradas", "INFO")
+
+        df_y_delta = None
+        if len(delta) > 0:
+            df_y_delta = self._build_y(df_x.iloc[delta].reset_index(drop=True))
+            if df_y_delta is None or self._stop_event.is_set():
+                return None
+
+            delta_fps = fingerprints[delta]
+            df_y_delta = df_y_delta.copy()
+            df_y_delta[FP_COLUMN] = delta_fps[self.step1_builder.source_rows]
+            # linhas que o Step1 filtrou também ficam registradas para não serem refeitas
+            filtered = np.setdiff1d(delta_fps, df_y_delta[FP_COLUMN].to_numpy())
+            dropped = np.union1d(dropped, filtered)
+
+        df_y = assemble_y(fingerprints, previous, df_y_delta)
+        dropped = np.intersect1d(dropped, fingerprints)
+
+        try:
+            self.incremental_state.save(df_y, dropped)
+        except Exception as e:
+            self._log(f"Incremental: falha ao salvar estado ({e}); a próxima execução processa tudo", "WARNING")
+
+        return df_y.drop(columns=[FP_COLUMN])
+
     def _step_validate(self):
         self._log("Etapa 3: Validando contratos")
         time.sleep(1)
@@ -261,31 +771,139 @@ class RobotController:
         # agora df_y existe, então pode logar
         self._log(f"Export: colunas Y = {len(df_y.columns)} | linhas = {len(df_y)}", "INFO")
 
-        df_export = df_y.copy()
+        fmt = self.export_format
+        if fmt not in ("csv", "xlsx") and fmt not in EXPORT_CSV_COMPRESSION and fmt not in EXPORT_COLUMNAR_FORMATS:
+            self._log(f"Formato de exportação inválido: {fmt}", "ERROR")
+            self._set_status(RobotStatus.ERROR)
+            return
 
-        for col in Y_DATE_COLUMNS:
-            if col in df_export.columns:
-                dt = pd.to_datetime(df_export[col], errors="coerce", dayfirst=True)
-                df_export[col] = dt.dt.date
+        os.makedirs(self.output_dir, exist_ok=True)
+        # escreve com nome ".parcial" e só renomeia no fim: arquivo final nunca fica pela metade
+        path, partial = self._reserve_export_paths(fmt)
+        if self.partial_export_callback:
+            self.partial_export_callback(partial)
 
-        if "vlTaxaCessao" in df_export.columns:
-            df_export["vlTaxaCessao"] = format_vl_taxa_cessao(df_export["vlTaxaCessao"], max_pct=3.99)
+        start = time.perf_counter()
+        try:
+            detail = self._write_export(df_y, fmt, partial)
+        except ImportError as e:
+            self._log(f"Exportação {fmt} indisponível: {e}", "ERROR")
+            self._remove_file(partial)
+            # nenhum arquivo gerado: a execução não pode terminar como FINISHED
+            self._set_status(RobotStatus.ERROR)
+            return
+        except Exception:
+            self._remove_file(partial)
+            raise
+        if detail is None:
+            self._log(f"Exportação {fmt} interrompida.", "WARNING")
+            self._remove_file(partial)
+            return
 
-        os.makedirs(self.output_dir, exist_ok=True)
+        os.replace(partial, path)
+        elapsed = time.perf_counter() - start
+        self.export_path = path
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        self._log(f"Exportado ({fmt}): {path} | {size_mb:.1f} MB em {elapsed:.2f}s{detail}", "SUCCESS")
+
+    def _reserve_export_paths(self, fmt: str) -> tuple[str, str]:
+        # jobs simultâneos no mesmo output_dir podem terminar no mesmo segundo: o ".parcial" é criado
+        # de forma exclusiva e, se o nome já estiver em uso (parcial ou final), ganha sufixo _2, _3, ...
         stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        n = 1
+        while True:
+            name = f"cessao_Y_{stamp}" if n == 1 else f"cessao_Y_{stamp}_{n}"
+            path = os.path.join(self.output_dir, f"{name}.{fmt}")
+            partial = os.path.join(self.output_dir, f"{name}{PARTIAL_EXPORT_TAG}.{fmt}")
+            n += 1
+            try:
+                os.close(os.open(partial, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            except FileExistsError:
+                continue
+            if os.path.exists(path):
+                self._remove_file(partial)
+                continue
+            return path, partial
+
+    @staticmethod
+    def _remove_file(path: str):
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _write_export(self, df_y: pd.DataFrame, fmt: str, path: str) -> str | None:
+        # None = interrompido; o texto retornado complementa o log de sucesso
+        if fmt == "csv":
+            df_export = self._export_frame(df_y, typed=False)
+            df_export.to_csv(path, sep=EXPORT_CSV_SEP, encoding=EXPORT_CSV_ENCODING, index=False)
+            return ""
+
+        if fmt in EXPORT_CSV_COMPRESSION:
+            # mesmo conteúdo do CSV simples, escrito em blocos direto no stream comprimido
+            df_export = self._export_frame(df_y, typed=False)
+            ok = write_csv_stream(
+                df_export,
+                path,
+                compression=EXPORT_CSV_COMPRESSION[fmt],
+                sep=EXPORT_CSV_SEP,
+                encoding=EXPORT_CSV_ENCODING,
+                stop_check=self._stop_event.is_set,
+            )
+            return "" if ok else None
+
+        if fmt in EXPORT_COLUMNAR_FORMATS:
+            # mesmo frame tipado do xlsx em streaming; ausente fica nulo (sem "#N/D")
+            df_export = self._export_frame(df_y, typed=True)
+            ok = write_columnar(
+                df_export,
+                path,
+                fmt,
+                compression=EXPORT_COLUMNAR_COMPRESSION,
+                stop_check=self._stop_event.is_set,
+            )
+            return "" if ok else None
+
+        if EXPORT_XLSX_STREAMING:
+            # células nativas de data/número, memória limitada e novas abas após 1.048.576 linhas
+            df_export = self._export_frame(df_y, typed=True)
+            writer = write_xlsx_streaming(
+                df_export,
+                path,
+                sheet_name=EXPORT_XLSX_SHEET_NAME,
+                number_formats=EXPORT_NUMBER_FORMATS,
+                missing_value=DEFAULT_MISSING_VALUE,
+                stop_check=self._stop_event.is_set,
+            )
+            return None if writer is None else f" | abas: {', '.join(writer.sheets)}"
 
-        if self.export_format == "csv":
-            csv_path = os.path.join(self.output_dir, f"cessao_Y_{stamp}.csv")
-            df_export.to_csv(csv_path, sep=EXPORT_CSV_SEP, encoding=EXPORT_CSV_ENCODING, index=False)
-            self._log(f"CSV exportado: {csv_path}", "SUCCESS")
+        df_export = self._export_frame(df_y, typed=False)
+        df_export.to_excel(path, index=False, engine="openpyxl")
+        return ""
 
-        elif self.export_format == "xlsx":
-            xlsx_path = os.path.join(self.output_dir, f"cessao_Y_{stamp}.xlsx")
-            df_export.to_excel(xlsx_path, index=False, engine="openpyxl")
-            self._log(f"Excel exportado: {xlsx_path}", "SUCCESS")
+    def _export_frame(self, df_y: pd.DataFrame, typed: bool) -> pd.DataFrame:
+        # typed=False: tudo texto ("2.50", "#N/D"; valores monetários como vieram no arquivo), datas como date
+        # typed=True: datas datetime64, taxa/valores float, NA mantido (o writer decide o vazio)
+        df_export = df_y.copy()
 
-        else:
-            self._log(f"Formato de exportação inválido: {self.export_format}", "ERROR")
+        for col in Y_DATE_COLUMNS:
+            if col in df_export.columns:
+                dates = normalize_dates(df_export[col])
+                df_export[col] = dates if typed else dates.dt.date
+
+        if "vlTaxaCessao" in df_export.columns:
+            taxa = df_export["vlTaxaCessao"]
+            df_export["vlTaxaCessao"] = taxa_points(taxa, max_pct=3.99) if typed else format_vl_taxa_cessao(taxa, max_pct=3.99)
+
+        if typed:
+            for col in Y_VALUE_COLUMNS:
+                if col in df_export.columns:
+                    df_export[col] = parse_br_number(df_export[col])
+            return df_export
+
+        # NA interno vira "#N/D" só aqui (datas vazias continuam como célula vazia)
+        for col in df_export.columns:
+            if col not in Y_DATE_COLUMNS:
+                df_export[col] = fill_missing(df_export[col], DEFAULT_MISSING_VALUE)
+        return df_export
         
     def _step_finalize(self):
         self._log("Etapa 5; Finalização")
@@ -308,62 +926,3 @@ class RobotController:
         
         return missing_required
 
-    def _parse_taxa_to_points(self, series: pd.Series) -> pd.Series:
-        s = series.astype(str).str.strip()
-
-        s = s.replace({"#N/D": "", "nan": "", "None": "", "": ""})
-
-        s = s.str.replace("%", "", regex=False)
-
-        s = s.str.replace("\u00a0", " ", regex=False).str.strip()
-
-        has_comma = s.str.contains(",", na=False)
-        s.loc[has_comma] = (
-            s.loc[has_comma]
-            .str.replace(".", "", regex=False)
-            .str.replace(",", ".", regex=False)
-        )
-
-        s = s.str.replace(r"[^0-9\.\-]+", "", regex=True)
-
-        num = pd.to_numeric(s, errors="coerce")
-
-        num = num.where(num.isna() | (num > 1), num * 100)
-
-        num = num.where(num.isna() | (num <= 100), pd.NA)
-
-        return num.round(2)
-
-    def _taxa_to_points_str(self, series: pd.Series, max_pct: float = 3.99) -> pd.Series:
-        raw = series.astype(str).str.strip()
-
-        raw = raw.replace({"#N/D": "", "nan": "", "None": "", "": ""})
-        raw = raw.str.replace("%", "", regex=False)
-        raw = raw.str.replace(",", ".", regex=False)
-        raw = raw.str.replace(r"[^0-9\.\-]+", "", regex=True)
-
-        num = pd.to_numeric(raw, errors="coerce")
-
-        frac = (num > 0) & (num < 1)
-        too_big_as_pct = frac & ((num * 100) > max_pct)
-
-        for _ in range(3):
-            adj = (num > 0) & (num < 1) & ((num * 100) > max_pct)
-            if not adj.any():
-                break
-            num = num.where(~adj, num / 10)
-
-        pp = num > 1
-        for _ in range(3):
-            adj = (num > max_pct) & (num <= 100)
-            if not adj.any():
-                break
-            num = num.where(~adj, num / 10)
-
-        num = num.where(num.isna() | (num > 1), num * 100)
-
-        num = num.where(num.isna() | (num <= 100), pd.NA)
-
-        out = num.round(2).map(lambda x: f"{x:.2f}" if pd.notna(x) else "#N/D")
-        return out
-
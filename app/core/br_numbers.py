@@ -0,0 +1,140 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Números no formato brasileiro ("1.234,56", "2,5%", "R$ 10,00") e as regras de taxa do pipeline.
+# Tudo trabalha sobre os valores distintos da coluna (pd.factorize): limpa/converte cada texto
+# uma vez só e espalha o resultado com numpy (as colunas de taxa e valor repetem muito).
+
+MISSING_TEXTS = ["", "#N/D", "nan", "None"]
+NOT_NUMERIC_PATTERN = r"[^0-9\.\-]+"
+
+# só pontos e em grupos de 3 ("1.234", "12.345.678"): ponto é milhar, não decimal
+THOUSANDS_ONLY_PATTERN = r"^-?[1-9]\d{0,2}(?:\.\d{3})+$"
+
+_THOUSANDS_ONLY = re.compile(THOUSANDS_ONLY_PATTERN)
+
+
+def _factorize(series: pd.Series) -> tuple[np.ndarray, pd.Series]:
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # valores distintos como texto (float vira o mesmo texto que astype(str) geraria)
+    texts = pd.Series(pd.Index(uniques).astype(str), dtype=object)
+    return codes, texts
+
+
+def _spread(codes: np.ndarray, values: np.ndarray, fill, index, name) -> pd.Series:
+    out = np.full(len(codes), fill, dtype=values.dtype)
+    valid = codes >= 0
+    out[valid] = values[codes[valid]]
+    return pd.Series(out, index=index, name=name)
+
+
+def _to_float(texts: pd.Series) -> np.ndarray:
+    return pd.to_numeric(texts, errors="coerce").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+
+
+def parse_br_number(series: pd.Series) -> pd.Series:
+    # "1.234,56" -> 1234.56 | "1,00" -> 1.0 | "0.025" -> 0.025 | "1.234" -> 1234.0 | "R$ 10" -> 10.0
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype("float64")
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = pd.Series(pd.Index(uniques).astype(str), dtype=object)
+
+    s = texts.str.replace("\u00a0", " ", regex=False).str.strip()
+    has_comma = s.str.contains(",", regex=False)
+    thousands = ~has_comma & s.str.match(_THOUSANDS_ONLY)
+
+    s = s.where(~(has_comma | thousands), s.str.replace(".", "", regex=False))
+    s = s.str.replace(",", ".", regex=False)
+    s = s.str.replace(NOT_NUMERIC_PATTERN, "", regex=True)
+    values = _to_float(s)
+
+    if uniques.dtype == object:
+        # célula numérica do Excel já é número: não passa pela regra de milhar do texto
+        is_number = np.array(
+            [isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)) for v in uniques],
+            dtype=bool,
+        )
+        if is_number.any():
+            values[is_number] = np.asarray(uniques[is_number], dtype="float64")
+
+    return _spread(codes, values, np.nan, series.index, series.name)
+
+
+def parse_percent_fraction(series: pd.Series) -> pd.Series:
+    # regra da TAXA CESSÃO na base X: ponto é sempre milhar, vírgula é decimal, resultado / 100
+    # ("2,5%" -> 0.025 | "1,99" -> 0.0199 | "0.025" -> 0.25); o ajuste de escala fica no export
+    codes, texts = _factorize(series)
+
+    s = texts.str.strip()
+    s = s.str.replace("%", "", regex=False)
+    s = s.str.replace(".", "", regex=False)
+    s = s.str.replace(",", ".", regex=False)
+
+    return _spread(codes, _to_float(s) / 100, np.nan, series.index, series.name)
+
+
+def _taxa_points(texts: pd.Series, max_pct: float) -> np.ndarray:
+    raw = texts.str.strip()
+    had_pct = raw.str.contains("%", regex=False).to_numpy(dtype=bool)
+
+    raw = raw.where(~raw.isin(MISSING_TEXTS), "")
+    raw = raw.str.replace("%", "", regex=False)
+    raw = raw.str.replace("\u00a0", " ", regex=False)
+    raw = raw.str.replace(",", ".", regex=False)
+    raw = raw.str.replace(NOT_NUMERIC_PATTERN, "", regex=True)
+
+    num = _to_float(raw)
+
+    # com "%": já está em pontos | sem "%": > 1 são pontos, (0, 1] é fração
+    with np.errstate(invalid="ignore"):
+        pct = np.where(had_pct, num, np.nan)
+        pct = np.where(~had_pct & (num > 1), num, pct)
+        pct = np.where(~had_pct & (num > 0) & (num <= 1), num * 100, pct)
+
+        # valores fora da escala esperada (ex.: 25 em vez de 2,5) descem uma casa por vez
+        for _ in range(6):
+            mask = (pct > max_pct) & (pct <= 1000)
+            if not mask.any():
+                break
+            pct = np.where(mask, pct / 10, pct)
+
+        pct = np.where((pct >= 0) & (pct <= 100), pct, np.nan)
+
+    return pct
+
+
+def taxa_points(series: pd.Series, max_pct: float = 3.99) -> pd.Series:
+    # mesma regra do format_vl_taxa_cessao, mas em float (2 casas) para exportação tipada
+    codes, texts = _factorize(series)
+    pct = np.round(_taxa_points(texts, max_pct), 2)
+    return _spread(codes, pct, np.nan, series.index, series.name)
+
+
+def format_vl_taxa_cessao(series: pd.Series, max_pct: float = 3.99) -> pd.Series:
+    # taxa (fração, pontos ou texto com "%") -> pontos percentuais com 2 casas ("2.50"); inválido -> "#N/D"
+    codes, texts = _factorize(series)
+
+    pct = np.round(_taxa_points(texts, max_pct), 2)
+    formatted = np.array(
+        [f"{x:.2f}" if not np.isnan(x) else "#N/D" for x in pct],
+        dtype=object,
+    )
+
+    # NaN de entrada vira "nan" no astype(str) e cai no mesmo "#N/D"
+    return _spread(codes, formatted, "#N/D", series.index, series.name)
+
+
+def format_br_number(series: pd.Series, decimals: int = 2) -> pd.Series:
+    # 1234.56 -> "1.234,56"; NaN continua NaN (o export decide o texto de ausente)
+    values = parse_br_number(series)
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+
+    swap = str.maketrans(",.", ".,")
+    formatted = np.array(
+        [f"{x:,.{decimals}f}".translate(swap) for x in np.asarray(uniques, dtype="float64")],
+        dtype=object,
+    )
+
+    return _spread(codes, formatted, np.nan, series.index, series.name)
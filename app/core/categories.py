@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# Colunas de texto com poucos valores distintos (convênio, fundo, operação, esteira, ...) ficam como
+# pd.Categorical: cada célula é um código inteiro e o texto existe uma vez por categoria.
+# Quais colunas: as marcadas "category" em COLUMN_KINDS + as de texto que passam na heurística de
+# cardinalidade (CATEGORY_AUTO_MAX_RATIO) depois da leitura.
+#
+# As transformações de texto do Step1/Step2 (strip, upper, replace, isin) rodam sobre as categorias
+# e são espalhadas pelos códigos, em vez de percorrer cada linha. Em coluna que não é categoria
+# elas caem no caminho normal (mesmo resultado).
+
+
+def is_categorical(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.CategoricalDtype)
+
+
+def _union(series: list) -> pd.Index:
+    # categorias vazias (coluna toda NA) podem ter dtype diferente das outras: ficam de fora
+    indexes = [s.cat.categories for s in series if len(s.cat.categories)]
+    if not indexes:
+        return series[0].cat.categories
+    return indexes[0].append(indexes[1:]).unique() if len(indexes) > 1 else indexes[0]
+
+
+def map_categories(s: pd.Series, fn) -> pd.Series:
+    # fn: Series de texto -> Series de texto (NA continua NA); valores que colapsam viram uma categoria só
+    if not is_categorical(s):
+        return fn(s)
+
+    mapped = fn(pd.Series(s.cat.categories, dtype=s.cat.categories.dtype))
+    new_codes, uniques = pd.factorize(mapped)
+    codes = s.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, new_codes[np.maximum(codes, 0)], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=s.index, name=s.name)
+
+
+def fill_missing(s: pd.Series, value) -> pd.Series:
+    # fillna de categoria só aceita valor que já é categoria
+    if is_categorical(s) and s.hasnans and value not in s.cat.categories:
+        s = s.cat.add_categories([value])
+    return s.fillna(value)
+
+
+def where_categories(s: pd.Series, cond, other: pd.Series) -> pd.Series:
+    # s.where(cond, other) quando um dos lados é categoria: junta as categorias antes (sem virar texto)
+    if not (is_categorical(s) or is_categorical(other)):
+        return s.where(cond, other)
+
+    s = s if is_categorical(s) else s.astype("category")
+    other = other if is_categorical(other) else other.astype("category")
+    categories = _union([s, other])
+    return s.cat.set_categories(categories).where(cond, other.cat.set_categories(categories))
+
+
+def unify_categories(parts: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    # blocos lidos separadamente têm categorias diferentes; o concat viraria texto sem isso
+    # (None fica de fora, como no pd.concat: ex. só um dos FRONT selecionado)
+    parts = [p for p in parts if p is not None]
+    if len(parts) < 2:
+        return parts
+
+    parts = [p.copy(deep=False) for p in parts]
+    for col in parts[0].columns:
+        if not all(col in p.columns and is_categorical(p[col]) for p in parts):
+            continue
+        categories = _union([p[col] for p in parts])
+        for p in parts:
+            p[col] = p[col].cat.set_categories(categories)
+    return parts
+
+
+def categorize_low_cardinality(df: pd.DataFrame, columns: list, max_ratio: float, min_rows: int) -> list:
+    # heurística: texto com distintos <= max_ratio * linhas vira categoria (só a partir de min_rows)
+    if len(df) < min_rows:
+        return []
+
+    converted = []
+    for col in columns:
+        s = df[col]
+        if is_categorical(s) or not (pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)):
+            continue
+        if s.nunique() <= len(s) * max_ratio:
+            df[col] = s.astype("category")
+            converted.append(col)
+    return converted
@@ -0,0 +1,82 @@
+import codecs
+import os
+
+UTF8_BOM = codecs.BOM_UTF8
+DELIMITER_CANDIDATES = [";", ",", "\t", "|"]
+
+# amostra limitada: início, meio e fim do arquivo
+SAMPLE_CHUNK_BYTES = 256 * 1024
+
+
+def file_fingerprint(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def read_sample(path: str, chunk_bytes: int = SAMPLE_CHUNK_BYTES) -> list[bytes]:
+    size = os.path.getsize(path)
+    chunks = []
+
+    with open(path, "rb") as f:
+        chunks.append(f.read(chunk_bytes))
+
+        if size > chunk_bytes * 3:
+            for offset in (size // 2, size - chunk_bytes):
+                f.seek(offset)
+                chunk = f.read(chunk_bytes)
+                # pula bytes de continuação UTF-8 (o corte pode cair no meio de um caractere)
+                skip = 0
+                while skip < 3 and skip < len(chunk) and 0x80 <= chunk[skip] <= 0xBF:
+                    skip += 1
+                chunks.append(chunk[skip:])
+        elif size > chunk_bytes:
+            chunks.append(f.read())
+
+    return chunks
+
+
+def _decodes(chunks: list[bytes], encoding: str) -> bool:
+    for chunk in chunks:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            decoder.decode(chunk, final=False)
+        except UnicodeDecodeError:
+            return False
+    return True
+
+
+def detect_encoding(chunks: list[bytes], candidates: list[str]) -> tuple[str, bool]:
+    head = chunks[0] if chunks else b""
+
+    if head.startswith(UTF8_BOM):
+        return "utf-8-sig", True
+
+    for enc in candidates:
+        if _decodes(chunks, enc):
+            return enc, False
+
+    # latin1 decodifica qualquer sequência de bytes
+    return "latin1", False
+
+
+def detect_delimiter(head: bytes, encoding: str, default: str) -> str:
+    text = head.decode(encoding, errors="replace")
+    header = text.splitlines()[0] if text else ""
+
+    if default in header:
+        return default
+
+    counts = {d: header.count(d) for d in DELIMITER_CANDIDATES}
+    best = max(counts, key=counts.get)
+    return best if counts[best] > 0 else default
+
+
+def sniff_csv(path: str, candidates: list[str], default_sep: str = ";", detect_sep: bool = False) -> dict:
+    chunks = read_sample(path)
+    encoding, bom = detect_encoding(chunks, candidates)
+
+    sep = default_sep
+    if detect_sep and chunks:
+        sep = detect_delimiter(chunks[0], encoding, default_sep)
+
+    return {"encoding": encoding, "bom": bom, "sep": sep}
@@ -1,17 +1,43 @@
 from __future__ import annotations
 import os
+import threading
+import time
 import pandas as pd
-from app.config.schemas import FILE_SCHEMAS, COLUMN_ALIASES, DEFAULT_MISSING_VALUE
+from app.core.csv_sniffer import sniff_csv, file_fingerprint, DELIMITER_CANDIDATES
+from app.config.schemas import FILE_SCHEMAS, DEFAULT_MISSING_VALUE, KEY_COLUMNS, CATEGORY_AUTO_MAX_RATIO, CATEGORY_AUTO_MIN_ROWS
+from app.config.schemas import RAW_KEY_SUFFIX, DIGIT_KEY_COLUMNS
+from app.core.keys import normalize_key, non_numeric_count, in_key_set, join_key
+from app.core.reader_plan import ReaderPlan, get_plan
+from app.core.date_normalizer import normalize_dates
+from app.core.br_numbers import parse_br_number
+from app.core.tracing import NULL_TRACER
+from app.core.categories import unify_categories, categorize_low_cardinality
+
+# mesmos textos que o pd.read_excel trata como vazio (na_values padrão)
+EXCEL_NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
 
 
 class DataLoaderError(Exception):
     pass
 
 class DataLoader:
-    def __init__(self, csv_encoding="utf-8", csv_sep=";", log_callback=None):
+    def __init__(self, csv_encoding="utf-8", csv_sep=";", log_callback=None, excel_streaming=True, cache=None, csv_detect_sep=False,
+                 chunk_rows=100_000, tracer=None):
         self.log_callback = log_callback
+        self.tracer = tracer or NULL_TRACER
         self.csv_encoding = csv_encoding
         self.csv_sep = csv_sep
+        self.csv_detect_sep = csv_detect_sep
+        # formato (encoding/BOM/sep) por fingerprint do arquivo + métrica de releituras
+        self._csv_formats = {}
+        self._csv_formats_lock = threading.Lock()
+        self.csv_wasted_parses = 0
+        self.excel_streaming = excel_streaming
+        self.cache = cache
+        self.chunk_rows = chunk_rows
 
     def load(self, path: str) -> pd.DataFrame:
         if not path:
@@ -27,32 +53,94 @@ class DataLoader:
 
         raise DataLoaderError(f"Extensão não suportada: {ext}")
     
-    def _load_csv(self, path: str) -> pd.DataFrame:
+    def _load_csv(self, path: str, chunk_rows: int | None = None, on_chunk=None, usecols=None) -> pd.DataFrame:
         encodings_to_try = [self.csv_encoding, "utf-8-sig", "cp1252", "latin1"]
+        name = os.path.basename(path)
 
-        last_error = None
+        self._log(f"Lendo arquivo CSV: {name}", "INFO")
+
+        try:
+            fmt = self._csv_format(path, encodings_to_try)
+        except OSError as e:
+            raise DataLoaderError(f"Falha ao ler CSV: {name} | {e}") from e
+        sep = fmt["sep"]
 
-        self._log(f"Lendo arquivo CSV: {os.path.basename(path)}", "INFO")
+        # encoding detectado primeiro; os demais só se a amostra tiver enganado
+        ordered = [fmt["encoding"]] + [e for e in encodings_to_try if e != fmt["encoding"]]
 
-        for enc in encodings_to_try:
+        last_error = None
+        wasted = 0
+
+        for enc in ordered:
+            read_kwargs = dict(sep=sep, encoding=enc, dtype=str, keep_default_na=False, usecols=usecols)
             try:
-                df = pd.read_csv(
-                    path,
-                    sep=self.csv_sep,
-                    encoding=enc,
-                    dtype=str,
-                    keep_default_na=False
-                )
-                self._log(f"Arquivo carregado com sucesso: {os.path.basename(path)} | Linhas: {len(df)}", "SUCCESS")
-                df = self._normalize_columns(df)
-                return df
+                if chunk_rows:
+                    df, n_rows = self._read_csv_chunks(path, read_kwargs, chunk_rows, on_chunk)
+                else:
+                    df = pd.read_csv(path, **read_kwargs)
+                    n_rows = len(df)
             except UnicodeDecodeError as e:
-                self._log(f"Falhou ao ler {os.path.basename(path)} com encoding={enc}. Tentando próximo...", "WARNING")
+                self._log(f"Falhou ao ler {name} com encoding={enc}. Tentando próximo...", "WARNING")
                 last_error = e
+                wasted += 1
                 continue
             except Exception as e:
-                raise DataLoaderError(f"Falha ao ler CSV (erro não relacionado a encoding): {os.path.basename(path)} | {e}") from e
-        raise DataLoaderError(f"Falha ao ler CSV: {os.path.basename(path)} | encoding não compatível. Último erro: {last_error}") from last_error
+                raise DataLoaderError(f"Falha ao ler CSV (erro não relacionado a encoding): {name} | {e}") from e
+
+            if enc != fmt["encoding"]:
+                self._remember_csv_format(path, {**fmt, "encoding": enc})
+
+            self.csv_wasted_parses += wasted
+            self._log(
+                f"CSV {name}: encoding={enc} | sep={sep!r} | BOM={'sim' if fmt['bom'] else 'não'} | "
+                f"parses desperdiçados: {wasted}",
+                "INFO" if wasted == 0 else "WARNING",
+            )
+            self._log(f"Arquivo carregado com sucesso: {name} | Linhas: {n_rows}", "SUCCESS")
+            if not chunk_rows and usecols is None:
+                df = self._normalize_columns(df)
+            return df
+
+        self.csv_wasted_parses += wasted
+        raise DataLoaderError(f"Falha ao ler CSV: {name} | encoding não compatível. Último erro: {last_error}") from last_error
+
+    def _read_csv_chunks(self, path: str, read_kwargs: dict, chunk_rows: int, on_chunk) -> tuple[pd.DataFrame, int]:
+        # lê em blocos e passa cada um por on_chunk (schema + filtro); só o resultado fica em memória
+        parts = []
+        n_rows = 0
+        with pd.read_csv(path, chunksize=chunk_rows, **read_kwargs) as reader:
+            for i, chunk in enumerate(reader):
+                n_rows += len(chunk)
+                parts.append(on_chunk(chunk, i))
+
+        if not parts:
+            header = pd.read_csv(path, nrows=0, **read_kwargs)
+            parts.append(on_chunk(header, 0))
+
+        return self._concat_parts(parts), n_rows
+
+    @staticmethod
+    def _concat_parts(parts: list[pd.DataFrame]) -> pd.DataFrame:
+        if len(parts) == 1:
+            return parts[0].reset_index(drop=True)
+        return pd.concat(unify_categories(parts), ignore_index=True)
+
+    def _csv_format(self, path: str, encodings: list[str]) -> dict:
+        fingerprint = file_fingerprint(path)
+
+        with self._csv_formats_lock:
+            fmt = self._csv_formats.get(fingerprint)
+        if fmt is not None:
+            return fmt
+
+        fmt = sniff_csv(path, encodings, default_sep=self.csv_sep, detect_sep=self.csv_detect_sep)
+        self._remember_csv_format(path, fmt, fingerprint)
+        return fmt
+
+    def _remember_csv_format(self, path: str, fmt: dict, fingerprint=None) -> None:
+        fingerprint = fingerprint or file_fingerprint(path)
+        with self._csv_formats_lock:
+            self._csv_formats[fingerprint] = fmt
 
     def _load_excel(self, path: str) -> pd.DataFrame:
         try:
@@ -65,11 +153,97 @@ class DataLoader:
             )
             self._log(f"Arquivo carregado com sucesso: {os.path.basename(path)} | Linhas: {len(df)}", "SUCCESS")
             df = self._normalize_columns(df)
-            df = df.fillna(DEFAULT_MISSING_VALUE)
             return df
         except Exception as e:
             raise DataLoaderError(f"Falha ao ler Excel: {os.path.basename(path)} | {e}") from e
 
+    def _load_excel_projected(self, path: str, plan: ReaderPlan, chunk_rows: int | None = None, on_chunk=None) -> pd.DataFrame:
+        # leitura em modo read-only: percorre as linhas e só materializa as colunas do plano
+        # (data e número ficam com o valor da célula; o resto vira texto como no read_excel)
+        # com chunk_rows, cada bloco passa por on_chunk (schema + filtro) antes de ser guardado
+        from openpyxl import load_workbook
+
+        try:
+            self._log(f"Lendo arquivo Excel (streaming): {os.path.basename(path)}", "INFO")
+
+            wb = load_workbook(path, read_only=True, data_only=True)
+            try:
+                ws = wb.worksheets[0]
+                rows = ws.iter_rows(values_only=True)
+
+                header = next(rows, None) or ()
+                positions = plan.locate(header)
+
+                found = [c for c in plan.columns if c in positions]
+                idx = [positions[c] for c in found]
+                convert = [self._excel_cell_raw if plan.raw_cell(c) else self._excel_cell_to_str for c in found]
+                dtypes = [object if plan.raw_cell(c) else str for c in found]
+                width = max(idx) + 1 if idx else 0
+                values = [[] for _ in found]
+
+                parts = []
+                n_rows = 0
+                in_chunk = 0
+                last_filled = 0
+                for row in rows:
+                    in_chunk += 1
+                    if any(v is not None for v in row):
+                        last_filled = in_chunk
+                    if len(row) < width:
+                        row = tuple(row) + (None,) * (width - len(row))
+                    for out, i, conv in zip(values, idx, convert):
+                        out.append(conv(row[i]))
+
+                    if chunk_rows and in_chunk >= chunk_rows and last_filled > 0:
+                        # fecha o bloco na última linha preenchida; as vazias seguem para o próximo
+                        parts.append(self._excel_chunk(found, dtypes, values, last_filled, len(parts), on_chunk))
+                        n_rows += last_filled
+                        values = [v[last_filled:] for v in values]
+                        in_chunk -= last_filled
+                        last_filled = 0
+            finally:
+                wb.close()
+
+            # igual ao read_excel: linhas vazias no fim da planilha são descartadas
+            parts.append(self._excel_chunk(found, dtypes, values, last_filled, len(parts), on_chunk))
+            n_rows += last_filled
+            df = self._concat_parts(parts)
+
+            self._log(
+                f"Arquivo carregado com sucesso: {os.path.basename(path)} | Linhas: {n_rows} | "
+                f"Colunas lidas: {len(found)}/{len(header)}",
+                "SUCCESS",
+            )
+            return df
+        except Exception as e:
+            raise DataLoaderError(f"Falha ao ler Excel: {os.path.basename(path)} | {e}") from e
+
+    @staticmethod
+    def _excel_chunk(found: list[str], dtypes: list, values: list[list], n_rows: int, index: int, on_chunk=None) -> pd.DataFrame:
+        df = pd.DataFrame(
+            {c: pd.Series(v[:n_rows], dtype=t) for c, t, v in zip(found, dtypes, values)},
+            columns=found,
+        )
+        return on_chunk(df, index) if on_chunk else df
+
+    @staticmethod
+    def _excel_cell_to_str(value):
+        # replica a conversão do pd.read_excel(dtype=str, engine="openpyxl")
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return None if value in EXCEL_NA_STRINGS else value
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def _excel_cell_raw(value):
+        # data/número como vieram da célula; texto vazio/NA vira None
+        if isinstance(value, str) and value in EXCEL_NA_STRINGS:
+            return None
+        return value
+
     def _normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.copy()
         df.columns = (
@@ -83,29 +257,273 @@ class DataLoader:
         if self.log_callback:
             self.log_callback(message, level)
 
-    def load_with_schema(self, key: str, path:str) -> pd.DataFrame:
+    def load_with_schema(self, key: str, path:str, use_cache: bool = True, keep_keys: dict | None = None) -> pd.DataFrame:
         if key not in FILE_SCHEMAS:
             raise DataLoaderError(f"Schema não encontrado para a chave: {key}")
-        
-        df = self.load(path)
 
-        return self._apply_schema(df, key)
+        # span "load/<chave>" mesmo quando chamado de uma thread do pool
+        with self.tracer.span(key, parent="load") as span:
+            df = self._load_with_schema(key, path, use_cache, keep_keys)
+            span.set(rows_out=len(df))
+        return df
+
+    def _load_with_schema(self, key: str, path: str, use_cache: bool, keep_keys: dict | None) -> pd.DataFrame:
+        if keep_keys is not None:
+            return self._load_semi_join(key, path, keep_keys, use_cache)
+
+        cache_key = None
+        if self.cache is not None and use_cache and path and os.path.exists(path):
+            cache_key = self.cache.make_key(path, key)
+            with self.tracer.span("cache") as span:
+                df = self.cache.get(cache_key)
+                span.set(rows_out=0 if df is None else len(df))
+            if df is not None:
+                self._log(f"Arquivo carregado do cache: {os.path.basename(path)} | Linhas: {len(df)}", "SUCCESS")
+                return df
+
+        with self.tracer.span("read") as span:
+            df = self._read_projected(path, get_plan(key))
+            span.set(rows_out=len(df))
+        with self.tracer.span("schema", rows_in=len(df)) as span:
+            df = self._apply_schema(df, key)
+            self._categorize(df, key)
+            span.set(rows_out=len(df))
+
+        if cache_key is not None:
+            try:
+                self.cache.put(cache_key, df)
+            except Exception as e:
+                self._log(f"Falha ao gravar cache de {os.path.basename(path)}: {e}", "WARNING")
+
+        return df
     
-    def _apply_schema(self, df: pd.DataFrame, key: str) -> pd.DataFrame:
-        schema = FILE_SCHEMAS[key]
-        use_cols = schema["use"]
-        rename_map = schema["rename"]
-
-        df = df.rename(columns=lambda c: str(c).strip())
-        df = df.rename(columns=lambda c: " ".join(str(c).split()))
-        df = df.rename(columns=COLUMN_ALIASES)
-
-        for col in use_cols:
-            if col not in df.columns:
-                df[col] = DEFAULT_MISSING_VALUE
-                self._log(f"[{key}] Coluna ausente criada: {col}", "WARNING")
-
-        df = df[use_cols].copy()
-        df = df.rename(columns=rename_map)
-        
-        return df
\ No newline at end of file
+    def _load_semi_join(self, key: str, path: str, keep_keys: dict, use_cache: bool) -> pd.DataFrame:
+        # semi-join no carregamento: só ficam as linhas cuja chave aparece na base X.
+        # O arquivo é lido em blocos e cada bloco é filtrado antes de ser guardado, então a memória
+        # acompanha o volume da X e não o tamanho do extrato. O resultado depende da X e não vai
+        # para o cache (um cache completo já existente é aproveitado e filtrado).
+        field = FILE_SCHEMAS[key]["key_field"]
+        name = os.path.basename(path)
+        total = 0
+
+        def keep(df: pd.DataFrame, index: int) -> pd.DataFrame:
+            nonlocal total
+            df = self._apply_schema(df, key, verbose=index == 0)
+            total += len(df)
+            return df[in_key_set(df[field], keep_keys)]
+
+        cached = None
+        if self.cache is not None and use_cache and path and os.path.exists(path):
+            cached = self.cache.get(self.cache.make_key(path, key))
+
+        if cached is not None:
+            self._log(f"Arquivo carregado do cache: {name} | Linhas: {len(cached)}", "SUCCESS")
+            return self.semi_join(key, cached, keep_keys)
+
+        # leitura + schema + filtro acontecem juntos, bloco a bloco
+        with self.tracer.span("read_semi_join") as span:
+            df = self._read_projected(path, get_plan(key), chunk_rows=self.chunk_rows, on_chunk=keep)
+            df = df.reset_index(drop=True)
+            self._categorize(df, key)
+            span.set(rows_in=total, rows_out=len(df))
+
+        return self._semi_join_done(key, df, total)
+
+    def semi_join(self, key: str, df: pd.DataFrame, keep_keys: dict) -> pd.DataFrame:
+        # base já carregada inteira (cache, pré-carga): mesmo filtro do carregamento em blocos
+        field = FILE_SCHEMAS[key]["key_field"]
+        total = len(df)
+        df = df[in_key_set(df[field], keep_keys)].reset_index(drop=True)
+        return self._semi_join_done(key, df, total)
+
+    def _semi_join_done(self, key: str, df: pd.DataFrame, total: int) -> pd.DataFrame:
+        # blocos diferentes podem ter caído em tipos de chave diferentes (Int64 x texto)
+        for col in KEY_COLUMNS:
+            if col in df.columns:
+                df[col] = normalize_key(df[col])
+
+        self._log(f"[{key}] Semi-join por {FILE_SCHEMAS[key]['key_field']}: {len(df)}/{total} linhas mantidas", "INFO")
+        return df
+
+    def preflight(self, key: str, path: str) -> dict:
+        # checagem rápida na seleção do arquivo: só o cabeçalho (e encoding/sep no CSV) contra o
+        # schema da base, antes de qualquer leitura completa
+        #   status "ok"      -> todas as colunas do schema encontradas
+        #   status "warning" -> faltam colunas (viriam "#N/D" na execução)
+        #   status "error"   -> arquivo ilegível ou sem a coluna chave da base
+        if key not in FILE_SCHEMAS:
+            raise DataLoaderError(f"Schema não encontrado para a chave: {key}")
+
+        plan = get_plan(key)
+        start = time.perf_counter()
+        result = {
+            "key": key,
+            "path": path,
+            "status": "ok",
+            "message": "",
+            "missing": [],
+            "aliased": {},
+            "header": [],
+            "format": {},
+        }
+
+        try:
+            header, fmt = self._read_header(path)
+        except (DataLoaderError, OSError, ValueError) as e:
+            result.update(status="error", message=str(e), seconds=time.perf_counter() - start)
+            return result
+        other_sheets = fmt.pop("other_sheets", {})
+        result["format"] = fmt
+
+        positions = plan.locate(header)
+        result["header"] = [str(h) for h in header if h is not None]
+        result["missing"] = [c for c in plan.columns if c not in positions]
+        for c, i in positions.items():
+            name = " ".join(str(header[i]).split())
+            if name != c:
+                result["aliased"][name] = c
+
+        key_columns = [c for c in plan.columns if plan.targets[c] == plan.key_field]
+        if key_columns and all(c in result["missing"] for c in key_columns):
+            result["status"] = "error"
+            result["message"] = f"coluna chave ausente: {', '.join(key_columns)}"
+            guess = self._guess_schema(header, key)
+            if guess:
+                result["message"] += f" (parece ser {guess})"
+            elif "sep" in fmt and len(header) == 1 and any(d in str(header[0]) for d in DELIMITER_CANDIDATES):
+                result["message"] += f" (cabeçalho numa coluna só: separador diferente de {fmt['sep']!r}?)"
+        elif result["missing"]:
+            result["status"] = "warning"
+            result["message"] = f"colunas ausentes: {', '.join(result['missing'])}"
+
+        if result["missing"]:
+            # aba errada: outra aba do arquivo tem mais colunas do schema que a primeira
+            found = len(positions)
+            for title, other in other_sheets.items():
+                if len(plan.locate(other)) > found:
+                    result["message"] += f" | colunas na aba '{title}' (a leitura usa a primeira aba)"
+                    break
+
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    def _read_header(self, path: str) -> tuple[list, dict]:
+        if not path or not os.path.exists(path):
+            raise DataLoaderError(f"Arquivo não encontrado: {path}")
+
+        ext = os.path.splitext(path)[1].lower()
+        name = os.path.basename(path)
+
+        if ext == ".csv":
+            fmt = self._csv_format(path, [self.csv_encoding, "utf-8-sig", "cp1252", "latin1"])
+            try:
+                header = pd.read_csv(path, sep=fmt["sep"], encoding=fmt["encoding"], dtype=str, nrows=0).columns
+            except Exception as e:
+                raise DataLoaderError(f"Falha ao ler cabeçalho do CSV: {name} | {e}") from e
+            return list(header), dict(fmt)
+
+        if ext == ".xlsx":
+            from openpyxl import load_workbook
+
+            try:
+                wb = load_workbook(path, read_only=True, data_only=True)
+            except Exception as e:
+                raise DataLoaderError(f"Falha ao abrir Excel: {name} | {e}") from e
+            try:
+                # a leitura usa a primeira aba; as outras só entram na mensagem (aba errada)
+                sheets = {
+                    ws.title: list(next(ws.iter_rows(values_only=True, max_row=1), None) or ())
+                    for ws in wb.worksheets
+                }
+            finally:
+                wb.close()
+            first = next(iter(sheets), None)
+            header = sheets.pop(first, [])
+            return header, {"sheet": first, "other_sheets": sheets}
+
+        if ext == ".xls":
+            try:
+                header = pd.read_excel(path, dtype=str, nrows=0).columns
+            except Exception as e:
+                raise DataLoaderError(f"Falha ao ler cabeçalho do Excel: {name} | {e}") from e
+            return list(header), {}
+
+        raise DataLoaderError(f"Extensão não suportada: {ext}")
+
+    @staticmethod
+    def _guess_schema(header: list, key: str) -> str | None:
+        # base cujo schema o cabeçalho cobre melhor (ajuda quando o arquivo foi trocado de linha)
+        best, best_ratio = None, 0.0
+        for other in FILE_SCHEMAS:
+            if other == key:
+                continue
+            plan = get_plan(other)
+            ratio = len(plan.locate(header)) / len(plan.columns)
+            if ratio > best_ratio:
+                best, best_ratio = other, ratio
+        return best if best_ratio >= 0.5 else None
+
+    def _read_projected(self, path: str, plan: ReaderPlan, chunk_rows: int | None = None, on_chunk=None) -> pd.DataFrame:
+        # lê só as colunas do plano; xls (ou Excel sem streaming) é lido inteiro e projetado depois
+        ext = os.path.splitext(path or "")[1].lower()
+        if self.excel_streaming and ext == ".xlsx":
+            return self._load_excel_projected(path, plan, chunk_rows=chunk_rows, on_chunk=on_chunk)
+        if ext == ".csv":
+            return self._load_csv(path, chunk_rows=chunk_rows, on_chunk=on_chunk, usecols=plan.wants)
+
+        df = self.load(path)
+        return on_chunk(df, 0) if on_chunk else df
+
+    def _apply_schema(self, df: pd.DataFrame, key: str, verbose: bool = True) -> pd.DataFrame:
+        # executa o plano do schema: acha cada coluna pelo cabeçalho normalizado (com alias),
+        # converte pelo tipo e já monta o DataFrame com o nome final (sem rename/cópia depois)
+        plan = get_plan(key)
+        positions = plan.locate(df.columns)
+
+        out = {}
+        for col in plan.columns:
+            target = plan.targets[col]
+            if col in positions:
+                s = df.iloc[:, positions[col]]
+            else:
+                s = pd.Series(None, index=df.index, dtype=object)
+                if verbose:
+                    self._log(f"[{key}] Coluna ausente criada: {col}", "WARNING")
+
+            if target in plan.raw_keys:
+                out[target + RAW_KEY_SUFFIX] = s.astype("str").str.strip().where(s.notna())
+            out[target] = self._convert_column(s, plan.kinds[col], key, target, verbose)
+
+        return pd.DataFrame(out, index=df.index, copy=False)
+
+    def _categorize(self, df: pd.DataFrame, key: str) -> None:
+        converted = categorize_low_cardinality(
+            df, get_plan(key).text_targets, CATEGORY_AUTO_MAX_RATIO, CATEGORY_AUTO_MIN_ROWS
+        )
+        if converted:
+            self._log(f"[{key}] Colunas como categoria (baixa cardinalidade): {', '.join(converted)}", "INFO")
+
+    def _convert_column(self, s: pd.Series, kind: str, key: str, name: str, verbose: bool = True) -> pd.Series:
+        if kind == "key":
+            # chaves normalizadas uma vez aqui; Step1/Step2 só reaproveitam
+            s = join_key(s, digits=name in DIGIT_KEY_COLUMNS)
+            bad = non_numeric_count(s) if verbose else 0
+            if bad:
+                self._log(f"[{key}] {name}: {bad} chaves não numéricas, join por texto", "INFO")
+            return s
+
+        if kind == "date":
+            return normalize_dates(s)
+
+        if kind == "numeric":
+            return parse_br_number(s)
+
+        # vazio é NA dentro do pipeline; "#N/D" literal vindo do arquivo também vira NA
+        # (o exportador escreve DEFAULT_MISSING_VALUE de volta)
+        literal_nd = s.eq(DEFAULT_MISSING_VALUE)
+        if literal_nd.any():
+            s = s.mask(literal_nd)
+
+        if kind == "category":
+            s = s.astype("category")
+        return s
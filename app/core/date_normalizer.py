@@ -0,0 +1,115 @@
+import threading
+import numpy as np
+import pandas as pd
+
+ISO_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}"
+MAX_CACHE_SIZE = 200_000
+
+
+# Converte colunas de data para datetime64 (só a data, sem hora).
+# Regra única para o pipeline inteiro: texto ISO (aaaa-mm-dd...) é lido como ISO; o resto com dayfirst.
+# Cada texto distinto é interpretado uma vez só; o resultado fica em cache e é reaproveitado
+# entre Step1, Step2 e a exportação (as datas têm pouquíssimos valores distintos).
+class DateNormalizer:
+    def __init__(self, max_cache_size=MAX_CACHE_SIZE):
+        self.max_cache_size = max_cache_size
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.parsed = 0
+        self.reused = 0
+
+    def normalize(self, series: pd.Series) -> pd.Series:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            # já convertida numa etapa anterior
+            return series
+
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        parsed = self._parse_uniques(list(uniques))
+
+        values = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+        valid = codes >= 0
+        values[valid] = parsed[codes[valid]]
+
+        return pd.Series(values, index=series.index, name=series.name)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.parsed = 0
+            self.reused = 0
+
+    def _parse_uniques(self, uniques: list) -> np.ndarray:
+        out = np.full(len(uniques), np.datetime64("NaT"), dtype="datetime64[ns]")
+
+        pending = {}
+        with self._lock:
+            for i, value in enumerate(uniques):
+                key = value if isinstance(value, str) else repr(value)
+                hit = self._cache.get(key)
+                if hit is not None:
+                    out[i] = hit
+                    self.reused += 1
+                else:
+                    pending.setdefault(key, []).append((i, value))
+
+        if not pending:
+            return out
+
+        texts = {key: self._as_text(items[0][1]) for key, items in pending.items()}
+        results = self._parse_texts(texts)
+
+        with self._lock:
+            if len(self._cache) + len(results) > self.max_cache_size:
+                self._cache.clear()
+            for key, ts in results.items():
+                self._cache[key] = ts
+                for i, _ in pending[key]:
+                    out[i] = ts
+            self.parsed += len(results)
+
+        return out
+
+    @staticmethod
+    def _as_text(value) -> str:
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, pd.Timestamp):
+            return value.isoformat()
+        if hasattr(value, "isoformat"):
+            # date/datetime do Python
+            return value.isoformat()
+        return str(value).strip()
+
+    def _parse_texts(self, texts: dict) -> dict:
+        keys = list(texts)
+        s = pd.Series([texts[k] for k in keys], index=keys, dtype=object)
+        iso_mask = s.str.match(ISO_DATE_PATTERN, na=False)
+
+        parsed = pd.Series(pd.NaT, index=keys, dtype="datetime64[ns]")
+        if iso_mask.any():
+            parsed[iso_mask] = self._to_datetime(s[iso_mask], format="ISO8601")
+        if (~iso_mask).any():
+            parsed[~iso_mask] = self._to_datetime(s[~iso_mask], format="mixed", dayfirst=True)
+
+        parsed = parsed.dt.normalize()
+        return {k: parsed[k].to_datetime64() for k in keys}
+
+    @staticmethod
+    def _to_datetime(s: pd.Series, **kwargs) -> pd.Series:
+        try:
+            out = pd.to_datetime(s, errors="coerce", **kwargs)
+        except (ValueError, TypeError):
+            # fuso horário misturado etc.: cai para um por um
+            out = s.map(lambda v: pd.to_datetime(v, errors="coerce", **kwargs))
+            out = pd.to_datetime(out, errors="coerce", utc=True)
+
+        if getattr(out.dt, "tz", None) is not None:
+            out = out.dt.tz_localize(None)
+        return out.astype("datetime64[ns]")
+
+
+date_normalizer = DateNormalizer()
+
+
+def normalize_dates(series: pd.Series) -> pd.Series:
+    return date_normalizer.normalize(series)
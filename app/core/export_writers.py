@@ -0,0 +1,100 @@
+import gzip
+import os
+import pandas as pd
+
+WRITE_BLOCK_ROWS = 100_000
+GZIP_LEVEL = 6  # o padrão (9) custa ~2x o tempo para poucos % de tamanho
+
+# só vira dicionário o texto que repete (chaves quase únicas ficariam com um dicionário do tamanho da
+# coluna, copiado em cada bloco)
+DICTIONARY_MAX_RATIO = 0.5
+
+
+# Exportações para recarga em outras ferramentas (sem reinterpretar texto de xlsx/CSV):
+#   - CSV comprimido (gzip/zstd): escrito em blocos direto no stream comprimido
+#   - Parquet / Feather: colunas tipadas (datas, floats), texto como dicionário (category)
+# Todas escrevem bloco a bloco e param no stop_check (retornam False). Interrompido ou com erro, o
+# arquivo é apagado: o close grava rodapé/fim de stream válido e o arquivo pela metade pareceria completo.
+
+
+def _remove_partial(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _open_compressed(path: str, compression: str, encoding: str):
+    if compression == "gzip":
+        return gzip.open(path, "wt", compresslevel=GZIP_LEVEL, encoding=encoding, newline="")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("exportação .csv.zst requer o pacote 'zstandard'")
+        return zstandard.open(path, "wt", encoding=encoding, newline="")
+    raise ValueError(f"compressão não suportada: {compression}")
+
+
+def write_csv_stream(df: pd.DataFrame, path: str, compression: str, sep: str, encoding: str,
+                     block_rows=WRITE_BLOCK_ROWS, stop_check=None) -> bool:
+    completed = False
+    try:
+        with _open_compressed(path, compression, encoding) as handle:
+            if len(df) == 0:
+                df.to_csv(handle, sep=sep, index=False)
+            for start in range(0, len(df), block_rows):
+                if stop_check and stop_check():
+                    return False
+                df.iloc[start:start + block_rows].to_csv(handle, sep=sep, index=False, header=start == 0)
+        completed = True
+    finally:
+        if not completed:
+            _remove_partial(path)
+    return True
+
+
+def _arrow_table(df: pd.DataFrame):
+    import pyarrow as pa
+
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+            s = s.astype("string")
+            if s.nunique() <= len(s) * DICTIONARY_MAX_RATIO:
+                # texto repetido vira dicionário (e volta como category no pandas)
+                s = s.astype("category")
+            df[col] = s
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def write_columnar(df: pd.DataFrame, path: str, fmt: str, compression="zstd",
+                   block_rows=WRITE_BLOCK_ROWS, stop_check=None) -> bool:
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    table = _arrow_table(df)
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, table.schema, compression=compression)
+        write = writer.write_batch
+    elif fmt == "feather":
+        # Feather v2 = arquivo Arrow IPC
+        writer = ipc.new_file(path, table.schema, options=ipc.IpcWriteOptions(compression=compression))
+        write = writer.write_batch
+    else:
+        raise ValueError(f"formato colunar não suportado: {fmt}")
+
+    completed = False
+    try:
+        for batch in table.to_batches(max_chunksize=block_rows):
+            if stop_check and stop_check():
+                return False
+            write(batch)
+        completed = True
+    finally:
+        writer.close()
+        if not completed:
+            _remove_partial(path)
+    return True
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from app.config.rules_config import ALLOWED_CRM_OPERATIONS, EXCLUDED_CONVENIOS
+from app.config.schemas import FILE_SCHEMAS, COLUMN_KINDS, Y_COLUMNS_FULL, Y_DATE_COLUMNS, KEY_COLUMNS, DIGIT_KEY_COLUMNS
+from app.core.date_normalizer import normalize_dates
+from app.core.keys import align_keys
+
+# Execução incremental: a planilha de cessão é acumulada (cada dia acrescenta linhas), então a Y do
+# dia anterior é guardada junto com uma impressão digital (fingerprint) de cada linha de X.
+#
+# Fingerprint de uma linha de X = hash dos valores da própria linha + hash da linha de cada base de
+# referência que ela casa (FRONT por nrCCB, INICIADOS/AVERBADOS por nrContrato, INTEGRADOS/ESTEIRAS
+# por nrCCB; a mesma linha que o Step1 (primeira por chave) e o Step2 (última) usariam). Assim uma averbação que chega
+# depois também muda o fingerprint e a linha é refeita.
+#
+# Linhas com fingerprint conhecido reaproveitam a Y anterior (ou continuam fora, se o Step1 as
+# filtrou); só o resto passa pelo Step1/Step2. Mudou regra/schema (rules_digest) -> refaz tudo.
+
+# muda quando a montagem da Y mudar de um jeito que as regras abaixo não capturam
+INCREMENTAL_STATE_VERSION = 2
+FP_COLUMN = "_fp"
+
+# (bases do FileManager, chave de join, qual duplicada vale) que alimentam cada linha de Y
+REFERENCE_LOOKUPS = [
+    (("frontAkrk", "frontDig"), "nrCCB", "first"),
+    (("credAkrk", "credDig"), "nrContrato", "last"),
+    (("averbadosAkrk", "averbadosDig"), "nrContrato", "last"),
+    (("integradosFunc",), "nrCCB", "last"),
+    (("esteirasFunc",), "nrCCB", "last"),
+]
+
+
+def rules_digest() -> str:
+    payload = json.dumps(
+        {
+            "version": INCREMENTAL_STATE_VERSION,
+            "schemas": FILE_SCHEMAS,
+            "kinds": COLUMN_KINDS,
+            "digit_keys": DIGIT_KEY_COLUMNS,
+            "y_columns": Y_COLUMNS_FULL,
+            "allowed_crm": sorted(ALLOWED_CRM_OPERATIONS),
+            "excluded_convenios": sorted(EXCLUDED_CONVENIOS),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _reference_hashes(frames: dict, keys: tuple, on: str, keep: str, x_keys: pd.Series) -> np.ndarray:
+    parts = [
+        frames[k] for k in keys
+        if frames.get(k) is not None and not frames[k].empty and on in frames[k].columns
+    ]
+    if not parts:
+        return np.zeros(len(x_keys), dtype=np.uint64)
+
+    ref = pd.concat(parts, ignore_index=True)
+    ref = ref[ref[on].notna()].drop_duplicates(subset=[on], keep=keep)
+
+    left, right = align_keys(x_keys, ref[on])
+    pos = pd.Index(right).get_indexer(left)
+    ref_hashes = _row_hashes(ref)
+    return np.where(pos >= 0, ref_hashes[np.maximum(pos, 0)], np.uint64(0))
+
+
+def row_fingerprints(df_x: pd.DataFrame, contract_keys: pd.Series, frames: dict) -> np.ndarray:
+    # contract_keys: nrContrato que o Step1 vai derivar de cada linha (Step1Builder.contract_keys)
+    x_keys = {"nrCCB": df_x["nrCCB"], "nrContrato": contract_keys}
+    parts = {"x": _row_hashes(df_x)}
+    for i, (keys, on, keep) in enumerate(REFERENCE_LOOKUPS):
+        parts[f"ref{i}"] = _reference_hashes(frames, keys, on, keep, x_keys[on])
+    return _row_hashes(pd.DataFrame(parts))
+
+
+def align_y(y: pd.DataFrame) -> pd.DataFrame:
+    # Y do estado (lida do disco) + Y nova: mesmos tipos de chave e de data antes de juntar
+    # nrCCB/nrContrato de Y são texto (como saem no export), não chave normalizada
+    for col in KEY_COLUMNS:
+        if col in y.columns:
+            y[col] = y[col].astype(object)
+    for col in Y_DATE_COLUMNS:
+        if col in y.columns:
+            y[col] = normalize_dates(y[col]).astype("datetime64[ns]")
+    return y
+
+
+def assemble_y(fingerprints: np.ndarray, previous: pd.DataFrame | None, delta: pd.DataFrame | None) -> pd.DataFrame:
+    # uma linha de Y por linha de X (na ordem de X), vinda da Y anterior ou da Y nova
+    pool = [df for df in (previous, delta) if df is not None and not df.empty]
+    if not pool:
+        return pd.DataFrame(columns=Y_COLUMNS_FULL + [FP_COLUMN])
+
+    y = pd.concat(pool, ignore_index=True).drop_duplicates(subset=[FP_COLUMN], keep="last")
+    pos = pd.Index(y[FP_COLUMN]).get_indexer(fingerprints)
+    y = y.iloc[pos[pos >= 0]].reset_index(drop=True)
+    return align_y(y)
+
+
+def state_scope(output_dir: str) -> dict:
+    # um estado por pasta de saída: a sequência de dias que exporta para a mesma pasta se encadeia
+    # (a planilha de cessão de cada dia pode ter outro nome/pasta); dias do CLI (<saída>/<dia>) e jobs
+    # com saídas diferentes não sobrescrevem o estado um do outro.
+    # Reaproveitar estado de outra execução nunca muda o resultado (o fingerprint é do conteúdo); o
+    # escopo só evita que uma execução derrube o ganho da outra
+    return {"output_dir": os.path.abspath(output_dir)}
+
+
+# Estado em disco: Y anterior (com FP_COLUMN), fingerprints das linhas que o Step1 descartou e
+# meta.json (digest das regras). Feather se houver pyarrow, senão pickle (como o ParseCache).
+# Com scope o estado fica em <state_dir>/<hash do scope>/.
+class IncrementalState:
+    def __init__(self, state_dir="state", scope: dict | None = None):
+        self.scope = scope
+        if scope is not None:
+            payload = json.dumps(scope, sort_keys=True, ensure_ascii=False)
+            state_dir = os.path.join(state_dir, hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16])
+        self.state_dir = state_dir
+        self._digest = rules_digest()
+
+        try:
+            import pyarrow  # noqa: F401
+            self.ext = ".feather"
+        except ImportError:
+            self.ext = ".pkl"
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.state_dir, name)
+
+    def load(self) -> tuple[pd.DataFrame | None, np.ndarray]:
+        empty = np.array([], dtype=np.uint64)
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None, empty
+
+        if meta.get("digest") != self._digest or meta.get("ext") != self.ext:
+            return None, empty
+
+        try:
+            y_path = self._path("y" + self.ext)
+            y = pd.read_feather(y_path) if self.ext == ".feather" else pd.read_pickle(y_path)
+            dropped = np.load(self._path("dropped.npy"))
+        except Exception:
+            return None, empty
+
+        y[FP_COLUMN] = y[FP_COLUMN].astype(np.uint64)
+        return align_y(y), dropped.astype(np.uint64)
+
+    def save(self, y: pd.DataFrame, dropped: np.ndarray) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        # jobs da fila rodam em threads do mesmo processo: o tmp leva a thread também
+        tag = f"{os.getpid()}.{threading.get_ident()}.tmp"
+
+        # meta sai primeiro: se a gravação cair no meio, o estado fica inválido (e não misturado)
+        self._remove("meta.json")
+
+        y_tmp = self._path(f"y{self.ext}.{tag}")
+        y = y.reset_index(drop=True)
+        if self.ext == ".feather":
+            y.to_feather(y_tmp)
+        else:
+            y.to_pickle(y_tmp)
+        os.replace(y_tmp, self._path("y" + self.ext))
+
+        dropped_tmp = self._path(f"dropped.{tag}.npy")
+        np.save(dropped_tmp, np.asarray(dropped, dtype=np.uint64))
+        os.replace(dropped_tmp, self._path("dropped.npy"))
+
+        meta_tmp = self._path(f"meta.json.{tag}")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"digest": self._digest, "ext": self.ext, "rows": len(y), "dropped": len(dropped), "scope": self.scope},
+                f, indent=4, ensure_ascii=False,
+            )
+        os.replace(meta_tmp, self._path("meta.json"))
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(self._path(name))
+        except OSError:
+            pass
@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+
+# Chaves de join (nrCCB / nrContrato / nrContratoCred) normalizadas uma vez, no DataLoader.
+#
+# Forma canônica de cada valor: sem espaços nas pontas e sem ".0" no FINAL (resto de número lido
+# como float pelo Excel/CSV); "", "#N/D", "nan" e "None" viram ausente.
+#   - todas as chaves da coluna numéricas (até 18 dígitos) -> Int64 (join por inteiro)
+#   - alguma chave não numérica -> a coluna inteira fica como texto canônico (fallback); o join
+#     dessa base compara texto (mais lento, mesmo resultado)
+# Zeros à esquerda não contam ("00123" == "123"), igual a uma célula numérica do Excel.
+# Chave ausente nunca casa com nada.
+# Colunas em DIGIT_KEY_COLUMNS (nrCCB) ficam só com os dígitos antes disso (digit_key): CCB
+# formatada ou com prefixo ("123.456.789", "CCB 123456789") casa com a mesma CCB sem formatação.
+
+KEY_DTYPE = "Int64"
+MAX_KEY_DIGITS = 18
+MISSING_KEY_TEXTS = ["", "#N/D", "nan", "None"]
+
+
+def _spread(codes: np.ndarray, values, dtype) -> pd.api.extensions.ExtensionArray:
+    valid = codes >= 0
+    if dtype == KEY_DTYPE:
+        data = np.zeros(len(codes), dtype=np.int64)
+        data[valid] = np.asarray(values, dtype=np.int64)[codes[valid]]
+        return pd.arrays.IntegerArray(data, ~valid)
+
+    data = np.full(len(codes), np.nan, dtype=object)
+    data[valid] = np.asarray(values, dtype=object)[codes[valid]]
+    return data
+
+
+def _fast_int_values(uniques) -> np.ndarray | None:
+    if len(uniques) == 0 or pd.api.types.infer_dtype(uniques, skipna=False) != "string":
+        return None
+    try:
+        values = pd.Series(uniques, dtype=object).astype("int64").to_numpy()
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if values.min() < 0 or values.max() >= 10 ** MAX_KEY_DIGITS:
+        return None
+    return values
+
+
+def is_int_key(series: pd.Series) -> bool:
+    return series.dtype == KEY_DTYPE
+
+
+def normalize_key(series: pd.Series) -> pd.Series:
+    if is_int_key(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype(KEY_DTYPE)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+
+    # caminho rápido: todas as chaves distintas já são texto de inteiro
+    values = _fast_int_values(uniques)
+    if values is not None:
+        return pd.Series(_spread(codes, values, KEY_DTYPE), index=series.index, name=series.name)
+
+    texts = pd.Series(pd.Index(uniques).astype(str), dtype=object).str.strip()
+    texts = texts.str.replace(r"\.0+$", "", regex=True)
+    texts = texts.mask(texts.isin(MISSING_KEY_TEXTS))
+
+    # ausentes saem dos códigos (-1) antes de decidir o tipo da coluna
+    missing = texts.isna().to_numpy()
+    if missing.any():
+        remap = np.where(missing, -1, np.cumsum(~missing) - 1)
+        codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        texts = texts[~missing].reset_index(drop=True)
+
+    numeric = texts.str.fullmatch(rf"\d{{1,{MAX_KEY_DIGITS}}}")
+    if numeric.all():
+        values = texts.astype("int64").to_numpy()
+        return pd.Series(_spread(codes, values, KEY_DTYPE), index=series.index, name=series.name)
+
+    # fallback: as numéricas ficam no mesmo texto que o Int64 geraria ("00123" -> "123")
+    texts = texts.where(~numeric, texts[numeric].astype("int64").astype(str))
+    return pd.Series(_spread(codes, texts.to_numpy(), object), index=series.index, name=series.name, dtype=object)
+
+
+def digit_key(series: pd.Series) -> pd.Series:
+    # só os dígitos de cada chave (sem dígito nenhum = ausente); roda sobre os valores distintos
+    if pd.api.types.is_integer_dtype(series):
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = pd.Series(pd.Index(uniques).astype(str), dtype=object).str.strip()
+    texts = texts.str.replace(r"\.0+$", "", regex=True).str.replace(r"\D+", "", regex=True)
+    texts = texts.mask(texts.eq(""))
+    return pd.Series(_spread(codes, texts.to_numpy(), object), index=series.index, name=series.name, dtype=object)
+
+
+def join_key(series: pd.Series, digits: bool = False) -> pd.Series:
+    # texto da chave (como sai no export) -> chave de join, pelas mesmas regras do DataLoader
+    if digits:
+        series = digit_key(series)
+    return normalize_key(series)
+
+
+def key_text(series: pd.Series) -> pd.Series:
+    # chave como texto canônico (ausente = NaN), para regras de texto, fallback e export
+    if is_int_key(series):
+        return series.astype(str).astype(object)
+    return normalize_key(series)
+
+
+def align_keys(left: pd.Series, right: pd.Series) -> tuple[pd.Series, pd.Series]:
+    # mesmo tipo dos dois lados: Int64 se ambos forem numéricos, senão texto
+    left = normalize_key(left)
+    right = normalize_key(right)
+    if is_int_key(left) and is_int_key(right):
+        return left, right
+    return key_text(left), key_text(right)
+
+
+def non_numeric_count(series: pd.Series) -> int:
+    if is_int_key(series):
+        return 0
+    s = series.dropna()
+    return int((~s.astype(str).str.fullmatch(rf"\d{{1,{MAX_KEY_DIGITS}}}")).sum())
+
+
+# Conjunto de chaves para o semi-join do carregamento: inteiros (np.int64 ordenado) + textos do fallback
+def build_key_set(*series: pd.Series) -> dict:
+    ints = []
+    texts = set()
+    for s in series:
+        keys = normalize_key(s).dropna()
+        if is_int_key(keys):
+            ints.append(keys.to_numpy(dtype=np.int64))
+            continue
+        numeric = keys.str.fullmatch(rf"\d{{1,{MAX_KEY_DIGITS}}}").to_numpy(dtype=bool)
+        ints.append(keys[numeric].astype("int64").to_numpy())
+        texts.update(keys[~numeric])
+
+    merged = np.unique(np.concatenate(ints)) if ints else np.array([], dtype=np.int64)
+    return {"int": merged, "text": frozenset(texts)}
+
+
+def in_key_set(series: pd.Series, key_set: dict) -> np.ndarray:
+    keys = normalize_key(series)
+    if is_int_key(keys):
+        return keys.isin(key_set["int"]).to_numpy(dtype=bool, na_value=False)
+
+    allowed = set(key_set["text"])
+    allowed.update(str(v) for v in key_set["int"])
+    return keys.isin(allowed).to_numpy(dtype=bool)
+
+
+def key_set_size(key_set: dict) -> int:
+    return len(key_set["int"]) + len(key_set["text"])
@@ -1,17 +1,77 @@
 import datetime
 import tkinter as tk
+from collections import deque
 from tkinter.scrolledtext import ScrolledText
+from app.config.ui_config import UI_LOG_FLUSH_MS, UI_LOG_MAX_LINES, UI_LOG_MIN_LEVEL
+
+LOG_LEVELS = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+}
 
 class UILogger:
-    def __init__(self, text_widget: ScrolledText):
+    # log() pode ser chamado de qualquer thread: só enfileira.
+    # O loop do Tk drena a fila a cada flush_ms com um único insert no widget.
+    def __init__(self, text_widget: ScrolledText, max_lines=UI_LOG_MAX_LINES, min_level=UI_LOG_MIN_LEVEL, flush_ms=UI_LOG_FLUSH_MS):
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self.min_level = LOG_LEVELS.get(min_level, 0)
+
+        # o pendente também é limitado: o que passaria do limite nem chegaria a aparecer
+        self._pending = deque(maxlen=max_lines)
+        self._line_count = 0
+        self.dropped = 0
+
+        self.text_widget.after(self.flush_ms, self._drain)
 
     def log(self, message: str, level: str = "INFO"):
+        if LOG_LEVELS.get(level, 0) < self.min_level:
+            return
+
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         formatted_message = f"[{timestamp}] [{level}] {message}\n"
 
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(formatted_message)
+
+    def set_min_level(self, level: str):
+        self.min_level = LOG_LEVELS.get(level, 0)
+
+    def clear(self):
+        self._pending.clear()
+        self._line_count = 0
+        self.text_widget.configure(state=tk.NORMAL)
+        self.text_widget.delete("1.0", tk.END)
+        self.text_widget.configure(state=tk.DISABLED)
+
+    def _drain(self):
+        try:
+            self._flush()
+        finally:
+            self.text_widget.after(self.flush_ms, self._drain)
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        text = "".join(batch)
+
         self.text_widget.configure(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, formatted_message)
+        self.text_widget.insert(tk.END, text)
+
+        self._line_count += text.count("\n")
+        excess = self._line_count - self.max_lines
+        if excess > 0:
+            self.text_widget.delete("1.0", f"{excess + 1}.0")
+            self._line_count = self.max_lines
+
         self.text_widget.configure(state=tk.DISABLED)
         self.text_widget.see(tk.END)
-        
\ No newline at end of file
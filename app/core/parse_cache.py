@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from app.config.schemas import FILE_SCHEMAS, COLUMN_ALIASES, COLUMN_KINDS, CATEGORY_AUTO_MAX_RATIO, CATEGORY_AUTO_MIN_ROWS
+from app.config.schemas import DIGIT_KEY_COLUMNS
+
+# muda quando a forma de ler/normalizar os arquivos mudar (invalida o cache antigo)
+CACHE_FORMAT_VERSION = 7
+
+
+def schema_fingerprint() -> str:
+    payload = json.dumps(
+        {
+            "schemas": FILE_SCHEMAS,
+            "aliases": COLUMN_ALIASES,
+            "kinds": COLUMN_KINDS,
+            "digit_keys": DIGIT_KEY_COLUMNS,
+            "category_auto": [CATEGORY_AUTO_MAX_RATIO, CATEGORY_AUTO_MIN_ROWS],
+            "version": CACHE_FORMAT_VERSION,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def file_content_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Cache em disco dos DataFrames já com schema aplicado.
+# Cada entrada é um Feather (ou pickle, sem pyarrow) nomeado pelo hash de caminho + tamanho +
+# mtime (ou conteúdo) + chave do schema + hash de FILE_SCHEMAS/COLUMN_ALIASES/COLUMN_KINDS.
+# O mtime da entrada é atualizado a cada leitura e define a ordem do descarte LRU.
+class ParseCache:
+    def __init__(self, cache_dir="cache", max_bytes=2 * 1024 ** 3, hash_content=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_content = hash_content
+        self._lock = threading.Lock()
+        self._schema_hash = schema_fingerprint()
+
+        try:
+            import pyarrow  # noqa: F401
+            self.ext = ".feather"
+        except ImportError:
+            self.ext = ".pkl"
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        # permite mandar o cache para o worker em outro processo
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def make_key(self, path: str, schema_key: str) -> str:
+        st = os.stat(path)
+        version = file_content_hash(path) if self.hash_content else str(st.st_mtime_ns)
+        raw = "|".join([
+            os.path.abspath(path),
+            str(st.st_size),
+            version,
+            schema_key,
+            self._schema_hash,
+        ])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.ext)
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return None
+
+        try:
+            if self.ext == ".feather":
+                df = pd.read_feather(entry)
+            else:
+                df = pd.read_pickle(entry)
+        except Exception:
+            # entrada corrompida/incompleta: descarta e relê o arquivo original
+            self._remove(entry)
+            return None
+
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        entry = self._entry_path(key)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        df = df.reset_index(drop=True)
+        if self.ext == ".feather":
+            df.to_feather(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, entry)
+
+        self.evict()
+
+    def evict(self) -> None:
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith((".feather", ".pkl")):
+                    continue
+                full = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, full))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, full in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(full)
+                total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in os.listdir(self.cache_dir):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -3,11 +3,19 @@ import re
 from app.config.columns_config import COLS_X, COLS_FRONT
 from app.config.schemas import DEFAULT_MISSING_VALUE, Y_COLUMNS_FULL
 from app.config.rules_config import DEFAULT_MISSING_VALUE, ALLOWED_CRM_OPERATIONS, EXCLUDED_CONVENIOS
-from app.config.schemas import Y_DATE_COLUMNS
+from app.config.schemas import Y_DATE_COLUMNS, RAW_KEY_SUFFIX
+from app.core.date_normalizer import normalize_dates
+from app.core.br_numbers import parse_percent_fraction
+from app.core.keys import normalize_key, key_text, align_keys, digit_key
+from app.core.tracing import NULL_TRACER
+from app.core.categories import map_categories, fill_missing, unify_categories
 
 class Step1Builder:
-    def __init__(self, logger=None, stop_check=None, log_callback=None, stop_callback=None):
+    def __init__(self, logger=None, stop_check=None, log_callback=None, stop_callback=None, tracer=None):
         self.logger = logger
+        self.tracer = tracer or NULL_TRACER
+        # posição (em df_x) da linha de X que gerou cada linha da última Y montada
+        self.source_rows = []
         self.stop_chek = stop_check
         self.log_callback = log_callback
         self.stop_callback = stop_callback
@@ -25,66 +33,95 @@ class Step1Builder:
         return bool(self.stop_chek and self.stop_chek())
     
     def _norm_contract(self, s: pd.Series) -> pd.Series:
-        s = s.astype(str).str.strip()
-        s = s.str.replace(".0", "", regex=False)
-        return s
+        return normalize_key(s)
+
+    @staticmethod
+    def _raw_text(df_x: pd.DataFrame, col: str) -> pd.Series:
+        # chave como veio no arquivo (DataLoader guarda em <col>_raw); sem ela, o texto da chave
+        raw = col + RAW_KEY_SUFFIX
+        return df_x[raw] if raw in df_x.columns else key_text(df_x[col])
+
+    def _contract_text(self, df_x: pd.DataFrame) -> tuple[pd.Series, pd.Series, pd.Series]:
+        # nrContrato em texto (é o que vai para o export): regras sobre o texto original, com os
+        # zeros à esquerda de nrContratoCred e de LEFT(nrCCB, 9) preservados
+        nr_contrato = self._raw_text(df_x, "nrContratoCred")
+        nr_ccb = self._raw_text(df_x, "nrCCB")
+
+        mask_invest = nr_ccb.str.contains("CCB INVESTIDOR", na=False)
+        nr_contrato = nr_contrato.where(~mask_invest, nr_contrato.str.replace("-", "", regex=False))
+
+        mask_hifen = nr_contrato.eq("-").fillna(False).astype(bool)
+        nr_contrato = nr_contrato.where(~mask_hifen, nr_ccb.str.slice(0, 9))
+        nr_contrato = nr_contrato.mask(nr_contrato.isin(["", "nan"]))
+        return nr_contrato, mask_invest, mask_hifen
+
+    def contract_keys(self, df_x: pd.DataFrame) -> pd.Series:
+        # chave de join do nrContrato que o build vai gerar para cada linha de X
+        # (semi-join do carregamento, base de referência, incremental)
+        nr_contrato, _, _ = self._contract_text(df_x)
+        return self._norm_contract(nr_contrato)
     
     def build(self, df_x: pd.DataFrame, df_front_akrk: pd.DataFrame, df_front_dig: pd.DataFrame) -> pd.DataFrame:
+        with self.tracer.span("step1", rows_in=len(df_x)) as span:
+            df_y = self._build(df_x, df_front_akrk, df_front_dig)
+            span.set(rows_out=len(df_y))
+        return df_y
+
+    def _build(self, df_x: pd.DataFrame, df_front_akrk: pd.DataFrame, df_front_dig: pd.DataFrame) -> pd.DataFrame:
         self._log("Etapa 1: iniciando (BASE CESSAO + FRONT AKRK + FRONT DIG)", "INFO")
 
         df_x = df_x.copy()
-
-        mask_invest = df_x["nrCCB"].astype(str).str.contains("CCB INVESTIDOR", na=False)
-        df_x.loc[mask_invest, "nrContratoCred"] = (
-            df_x.loc[mask_invest, "nrContratoCred"].astype(str).str.replace("-", "", regex=False)
-        )
+        df_x["_source_row"] = range(len(df_x))
+        self.source_rows = []
+
+        # Y leva nrCCB/nrContrato em texto (zeros à esquerda e formatação do arquivo); as chaves
+        # Int64 de df_x servem só para os joins
+        nr_contrato, mask_invest, mask_hifen = self._contract_text(df_x)
+        # nrCCB sai como a base sempre exportou: só os dígitos do texto original, vazio sem dígito
+        df_x["_nrCCB_text"] = digit_key(self._raw_text(df_x, "nrCCB")).fillna("")
+        df_x["_nrContrato_text"] = nr_contrato
         self._log(f"Regra CCB aplicada: {mask_invest.sum()} linhas", "INFO")
 
         if self._stop():
             return pd.DataFrame()
 
-        df_front = pd.concat([df_front_akrk, df_front_dig], ignore_index=True)
+        df_front = pd.concat(unify_categories([df_front_akrk, df_front_dig]), ignore_index=True)
 
-        df_front["nrCCB"] = df_front["nrCCB"].astype(str).str.strip()
-        df_x["nrCCB"] = df_x["nrCCB"].astype(str).str.strip()
+        with self.tracer.span("merge/FRONT", rows_in=len(df_front)) as span:
+            df_x["nrCCB"], df_front["nrCCB"] = align_keys(df_x["nrCCB"], df_front["nrCCB"])
 
-        col_op = "dsOperacaoCRM" if "dsOperacaoCRM" in df_front.columns else "dsOperacao"
-        df_front = df_front[["nrCCB", col_op]].copy()
-        df_front = df_front.rename(columns={col_op: "dsOperacaoCRM"})
-        df_front = df_front.drop_duplicates(subset=["nrCCB"], keep="first")
+            col_op = "dsOperacaoCRM" if "dsOperacaoCRM" in df_front.columns else "dsOperacao"
+            df_front = df_front[["nrCCB", col_op]].copy()
+            df_front = df_front.rename(columns={col_op: "dsOperacaoCRM"})
+            df_front = df_front[df_front["nrCCB"].notna()]   # chave ausente não casa
+            df_front = df_front.drop_duplicates(subset=["nrCCB"], keep="first")
 
-        df_x = df_x.merge(df_front, how="left", on="nrCCB")
+            df_x = df_x.merge(df_front, how="left", on="nrCCB")
+            span.set(rows_out=len(df_x))
 
         matched = df_x["dsOperacaoCRM"].notna().sum()
         total = len(df_x)
         self._log(f"Match CRM por nrCCB: {matched}/{total} ({matched/total:.2%})", "INFO")
 
-        df_x["dsOperacaoCRM"] = df_x["dsOperacaoCRM"].fillna(DEFAULT_MISSING_VALUE)
-
-        df_x["dsOperacaoCRM"] = df_x["dsOperacaoCRM"].astype(str).str.strip()
-        df_x.loc[df_x["dsOperacaoCRM"].eq(""), "dsOperacaoCRM"] = DEFAULT_MISSING_VALUE
-
-        s = df_x["dsOperacaoCRM"].astype(str)
-        s = s.str.replace("\u00a0", " ", regex=False)      # nbsp
-        s = s.str.replace("ª", "", regex=False)
-        s = s.str.upper()
-        s = s.str.replace(r"\s+", " ", regex=True).str.strip()
-
-        s = s.replace({"": DEFAULT_MISSING_VALUE.upper(), "NAN": DEFAULT_MISSING_VALUE.upper()})
-        s = s.fillna(DEFAULT_MISSING_VALUE.upper())
+        # NA = sem match no FRONT (ou operação vazia); entra no filtro como #N/D
+        # (categoria: normaliza só os valores distintos)
+        s = map_categories(df_x["dsOperacaoCRM"], self._normalize_operacao_crm)
 
         df_x["dsOperacaoCRM_norm"] = s
 
         before = len(df_x)
-        df_x = df_x[df_x["dsOperacaoCRM_norm"].isin(ALLOWED_CRM_OPERATIONS)].copy()
+        mask_allowed = s.isna() | s.isin(ALLOWED_CRM_OPERATIONS)
+        df_x = df_x[mask_allowed].copy()
         self._log(f"Filtro operação CRM (EXATO) aplicado: {before} -> {len(df_x)}", "INFO")
 
-        self._log(f"Sem match no FRONT (viraram #N/D): {(df_x['dsOperacaoCRM_norm'] == DEFAULT_MISSING_VALUE.upper()).sum()}", "INFO")
+        ops_nd = fill_missing(df_x["dsOperacaoCRM_norm"], DEFAULT_MISSING_VALUE.upper())
+        self._log(f"Sem match no FRONT (viraram #N/D): {(ops_nd == DEFAULT_MISSING_VALUE.upper()).sum()}", "INFO")
 
         if len(df_x) > 0:
+            counts = ops_nd.value_counts()
             self._log(
                 "Top 30 dsOperacaoCRM_norm:\n" +
-                df_x["dsOperacaoCRM_norm"].value_counts().head(30).to_string(),
+                counts[counts > 0].head(30).to_string(),
                 "INFO"
             )
         else:
@@ -93,8 +130,8 @@ class Step1Builder:
         if self._stop():
             return pd.DataFrame()
         
-        df_x["dsConvenio"] = df_x["dsConvenio"].astype(str).str.strip()
-        mask_excluded = df_x["dsConvenio"].str.upper().isin(EXCLUDED_CONVENIOS)
+        df_x["dsConvenio"] = map_categories(df_x["dsConvenio"], lambda v: v.str.strip())
+        mask_excluded = map_categories(df_x["dsConvenio"], lambda v: v.str.upper()).isin(EXCLUDED_CONVENIOS)
         before = len(df_x)
         df_x = df_x[~mask_excluded].copy()
         df_x = df_x.reset_index(drop=True)
@@ -104,12 +141,11 @@ class Step1Builder:
             return pd.DataFrame()
 
         df_x["vlTaxaCessao"] = self._normalize_percent_to_fraction(df_x["vlTaxaCessao"])
-        df_y = pd.DataFrame(DEFAULT_MISSING_VALUE, index=range(len(df_x)), columns=Y_COLUMNS_FULL)
+        df_y = pd.DataFrame(None, index=range(len(df_x)), columns=Y_COLUMNS_FULL, dtype=object)
         
-        df_y["nrCCB"] = df_x["nrCCB"]
+        df_y["nrCCB"] = df_x["_nrCCB_text"]
         df_y["dtCessao"] = df_x["dtCessao"]
-        df_x["dsOperacaoFront"] = df_x["dsOperacaoFront"].astype(str).str.replace("ª", "", regex=False).str.strip()
-        df_x.loc[df_x["dsOperacaoFront"].eq("") | df_x["dsOperacaoFront"].str.lower().eq("nan"), "dsOperacaoFront"] = DEFAULT_MISSING_VALUE
+        df_x["dsOperacaoFront"] = map_categories(df_x["dsOperacaoFront"], self._normalize_operacao_front)
         df_y["dsOperacao"] = df_x["dsOperacaoFront"]
 
         df_y["dsFundo"] = df_x["dsFundo"]
@@ -117,56 +153,44 @@ class Step1Builder:
         df_y["dsOrigem"] = df_x["dsOrigem"]
         df_y["vlTaxaCessao"] = df_x["vlTaxaCessao"]
 
-        nr_contrato = df_x["nrContratoCred"].astype(str).str.strip()
-        nr_ccb = df_x["nrCCB"].astype(str).str.strip()
-        mask_hifen = nr_contrato.eq("-")
-        nr_contrato = nr_contrato.where(~mask_hifen, nr_ccb.str.slice(0, 9))
-        nr_contrato = nr_contrato.replace({"": DEFAULT_MISSING_VALUE, "nan": DEFAULT_MISSING_VALUE}).fillna(DEFAULT_MISSING_VALUE)
-
-        df_y["nrContrato"] = nr_contrato
+        df_y["nrContrato"] = df_x["_nrContrato_text"]
 
         df_y["cnpj"] = df_x["cnpj"]
         df_y["codTabelas"] = df_x["codTabelas"]
         df_y["tabela"] = df_x["tabela"]
 
-        df_y["dtAverbacao"] = df_x.get("dtAverbacao", DEFAULT_MISSING_VALUE)
-        df_y["dtPrimeiroVencimentoCessao"] = df_x.get("dtPrimeiroVencimentoCessao", DEFAULT_MISSING_VALUE)
-        df_y["dtPrimeiroVencimentoAverbacao"] = df_x.get("dtPrimeiroVencimentoAverbacao", DEFAULT_MISSING_VALUE)
+        df_y["dtAverbacao"] = df_x.get("dtAverbacao", None)
+        df_y["dtPrimeiroVencimentoCessao"] = df_x.get("dtPrimeiroVencimentoCessao", None)
+        df_y["dtPrimeiroVencimentoAverbacao"] = df_x.get("dtPrimeiroVencimentoAverbacao", None)
+
+        self.source_rows = df_x["_source_row"].to_numpy()
 
         self._log(f"nrContratoCred '-' substituídos por LEFT(nrCCB,9): {mask_hifen.sum()}", "INFO")
         self._log("Planilha Y inicial montada (layout + campos básicos)", "SUCCESS")
         
-        for col in Y_DATE_COLUMNS:
-            if col in df_y.columns:
-                df_y[col] = self._normalize_date_only(df_y[col])
+        with self.tracer.span("dates", rows_in=len(df_y)):
+            for col in Y_DATE_COLUMNS:
+                if col in df_y.columns:
+                    df_y[col] = self._normalize_date_only(df_y[col])
         
-        df_y = df_y.fillna(DEFAULT_MISSING_VALUE)
         return df_y
     
-    def _normalize_date_only(self, series: pd.Series) -> pd.Series:
-        if pd.api.types.is_datetime64_any_dtype(series):
-            return series.dt.date
-
-        s = series.astype(str).str.strip()
-
-        iso_mask = s.str.match(r"^\d{4}-\d{2}-\d{2}", na=False)
-
-        out = pd.Series([pd.NaT] * len(s), index=s.index, dtype="datetime64[ns]")
-
-        if iso_mask.any():
-            out.loc[iso_mask] = pd.to_datetime(s.loc[iso_mask], errors="coerce")
+    @staticmethod
+    def _normalize_operacao_crm(s: pd.Series) -> pd.Series:
+        s = s.str.strip()
+        s = s.str.replace("\u00a0", " ", regex=False)      # nbsp
+        s = s.str.replace("ª", "", regex=False)
+        s = s.str.upper()
+        s = s.str.replace(r"\s+", " ", regex=True).str.strip()
+        return s.mask(s.eq("") | s.eq("NAN"))
 
-        if (~iso_mask).any():
-            out.loc[~iso_mask] = pd.to_datetime(s.loc[~iso_mask], errors="coerce", dayfirst=True)
+    @staticmethod
+    def _normalize_operacao_front(s: pd.Series) -> pd.Series:
+        s = s.str.replace("ª", "", regex=False).str.strip()
+        return s.mask(s.eq("") | s.str.lower().eq("nan"))
 
-        return out.dt.date
+    def _normalize_date_only(self, series: pd.Series) -> pd.Series:
+        return normalize_dates(series)
 
     def _normalize_percent_to_fraction(self, series: pd.Series) -> pd.Series:
-        s = series.astype(str).str.strip()
-        s = s.str.replace("%", "", regex=False)
-        s = s.str.replace(".", "", regex=False)
-        s = s.str.replace(",", ".", regex=False)
-        
-        num = pd.to_numeric(s, errors="coerce")
-        return num / 100
-
+        return parse_percent_fraction(series)
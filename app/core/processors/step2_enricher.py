@@ -1,11 +1,17 @@
+import numpy as np
 import pandas as pd
-from app.config.schemas import DEFAULT_MISSING_VALUE, Y_COLUMNS_FULL, Y_DATE_COLUMNS
+from app.config.schemas import Y_COLUMNS_FULL, Y_DATE_COLUMNS, DIGIT_KEY_COLUMNS
+from app.core.date_normalizer import normalize_dates
+from app.core.keys import KEY_DTYPE, normalize_key, key_text, is_int_key, join_key
+from app.core.tracing import NULL_TRACER
+from app.core.categories import unify_categories, where_categories
 
 
 class Step2Enricher:
-    def __init__(self, log_callback=None, stop_callback=None):
+    def __init__(self, log_callback=None, stop_callback=None, tracer=None):
         self.log_callback = log_callback
         self.stop_callback = stop_callback
+        self.tracer = tracer or NULL_TRACER
 
     def _log(self, msg, level="INFO"):
         if self.log_callback:
@@ -19,7 +25,51 @@ class Step2Enricher:
             return df
         return df.drop_duplicates(subset=[key], keep="first").copy()
 
-    def _merge_one(self, y: pd.DataFrame, df_right: pd.DataFrame, on: str, cols: list[str], tag: str) -> pd.DataFrame:
+    def _norm_merge_key(self, s: pd.Series) -> pd.Series:
+        # as bases já chegam normalizadas do DataLoader; aqui é só garantia (no-op para Int64)
+        return normalize_key(s)
+
+    @staticmethod
+    def _y_key(s: pd.Series, on: str) -> pd.Series:
+        # texto da chave em Y -> chave de join com as mesmas regras que o DataLoader aplicou nas bases
+        return join_key(s, digits=on in DIGIT_KEY_COLUMNS)
+
+    def _key_index(self, keys: pd.Series) -> tuple[np.ndarray, pd.Index]:
+        # códigos das chaves de Y: calculado uma vez por coluna chave e reaproveitado entre as bases
+        codes, uniques = pd.factorize(keys)
+        return codes, pd.Index(uniques)
+
+    def _build_index(self, df_right: pd.DataFrame, on: str, tag: str, y_uniques: pd.Index) -> np.ndarray:
+        # para cada chave distinta de Y: posição da linha na base (última ocorrência, como keep="last"); -1 = sem match
+        keys = self._norm_merge_key(df_right[on])
+
+        last = ~keys.duplicated(keep="last")
+        dups = int((~last & keys.notna()).sum())
+        if dups > 0:
+            self._log(f"[{tag}] Duplicados removidos em {on}: {dups}", "WARNING")
+
+        if is_int_key(keys) != (y_uniques.dtype == KEY_DTYPE):
+            # uma das bases caiu no fallback de texto: compara as duas como texto
+            keys = key_text(keys)
+            y_uniques = pd.Index(key_text(pd.Series(y_uniques)))
+
+        codes = y_uniques.get_indexer(keys)
+        ok = last.to_numpy() & (codes >= 0)
+
+        pos_by_code = np.full(len(y_uniques), -1, dtype=np.int64)
+        pos_by_code[codes[ok]] = np.flatnonzero(ok)
+        return pos_by_code
+
+    def _merge_one(self, y: pd.DataFrame, df_right: pd.DataFrame, on: str, cols: list[str], tag: str, key_index: dict | None = None) -> pd.DataFrame:
+        # span: entrada = linhas da base da direita, saída = linhas de Y
+        rows_in = 0 if df_right is None else len(df_right)
+        with self.tracer.span(f"merge/{tag}", rows_in=rows_in) as span:
+            y = self._merge_into(y, df_right, on, cols, tag, key_index)
+            span.set(rows_out=len(y))
+        return y
+
+    def _merge_into(self, y: pd.DataFrame, df_right: pd.DataFrame, on: str, cols: list[str], tag: str, key_index: dict | None = None) -> pd.DataFrame:
+        # enriquece Y in-place: lookup por índice e preenche só as células vazias (NaN ou #N/D)
         if df_right is None or df_right.empty:
             self._log(f"[{tag}] Base vazia. Merge ignorado.", "WARNING")
             return y
@@ -32,54 +82,50 @@ class Step2Enricher:
             self._log(f"[{tag}] Coluna chave '{on}' não existe na base do merge.", "ERROR")
             return y
 
-        left = y.copy()
-        right = df_right.copy()
+        key_index = {} if key_index is None else key_index
+        if on not in key_index:
+            # Y guarda a chave em texto (vai assim para o export); o join usa a chave normalizada
+            key_index[on] = self._key_index(self._y_key(y[on], on))
+        codes_y, y_uniques = key_index[on]
 
-        # normaliza chaves
-        left[on] = left[on].astype(str).str.strip().str.replace(".0", "", regex=False)
-        right[on] = right[on].astype(str).str.strip().str.replace(".0", "", regex=False)
+        pos_by_code = self._build_index(df_right, on, tag, y_uniques)
+        pos = np.where(codes_y >= 0, pos_by_code[codes_y], -1)
+        hit = pos >= 0
+        take_pos = np.where(hit, pos, 0)
+        total = len(y)
 
-        # garante que as cols existam no right
+        taken = {}
+        right_ok = {}
         for c in cols:
-            if c not in right.columns:
-                right[c] = pd.NA
-
-        # reduz right só no necessário + dedupe (1:1)
-        before_r = len(right)
-        right = right[[on] + cols].drop_duplicates(subset=[on], keep="last")
-        dups = before_r - len(right)
-        if dups > 0:
-            self._log(f"[{tag}] Duplicados removidos em {on}: {dups}", "WARNING")
-
-        merged = left.merge(right, how="left", on=on, suffixes=("", "_r"))
-
-        # log de match (usando a coluna _r, e ignorando #N/D)
+            if c in df_right.columns:
+                values = df_right[c].take(take_pos)
+                values.index = y.index
+                if c in Y_DATE_COLUMNS:
+                    values = normalize_dates(values)
+            else:
+                values = pd.Series(np.nan, index=y.index, dtype=object)
+            taken[c] = values
+            right_ok[c] = hit & ~self._is_missing(values).to_numpy()
+
+        # log de match (ignorando #N/D na base da direita)
         probe = cols[0]
-        probe_r = f"{probe}_r"
-        if probe_r in merged.columns:
-            matched = (~self._is_missing(merged[probe_r])).sum()
-            self._log(f"[{tag}] Match por {on}: {matched}/{len(left)} ({matched/len(left):.2%})", "INFO")
+        matched = int(right_ok[probe].sum())
+        self._log(f"[{tag}] Match por {on}: {matched}/{total} ({matched/total:.2%})", "INFO")
 
-        # preenche: se no Y está vazio (NaN OU #N/D), usa o valor do right
         for c in cols:
-            c_r = f"{c}_r"
-            if c_r in merged.columns:
-                if c in merged.columns:
-                    m = self._is_missing(merged[c]) & (~self._is_missing(merged[c_r]))
-                    merged.loc[m, c] = merged.loc[m, c_r]
-                else:
-                    merged[c] = merged[c_r]
-                merged.drop(columns=[c_r], inplace=True)
+            values = taken[c]
 
-            # log real de preenchimento (sem contar #N/D)
-            if c in merged.columns:
-                filled = (~self._is_missing(merged[c])).sum()
-                self._log(f"[{tag}] preenchido {c}: {filled}/{len(merged)}", "INFO")
+            if c in y.columns:
+                fill = self._is_missing(y[c]).to_numpy() & right_ok[c]
+                if fill.any():
+                    y[c] = where_categories(y[c], ~fill, values)
+            else:
+                y[c] = values.where(hit)
 
-        return merged
+            filled = int((~self._is_missing(y[c])).sum())
+            self._log(f"[{tag}] preenchido {c}: {filled}/{total}", "INFO")
 
-    def _fill_nd(self, df: pd.DataFrame) -> pd.DataFrame:
-        return df.fillna(DEFAULT_MISSING_VALUE)
+        return y
 
     def build(
         self,
@@ -91,6 +137,12 @@ class Step2Enricher:
         df_integrados: pd.DataFrame | None,
         df_esteiras: pd.DataFrame | None,
     ) -> pd.DataFrame:
+        with self.tracer.span("step2", rows_in=0 if df_y is None else len(df_y)) as span:
+            y = self._build(df_y, df_cred_akrk, df_cred_dig, df_averb_akrk, df_averb_dig, df_integrados, df_esteiras)
+            span.set(rows_out=0 if y is None else len(y))
+        return y
+
+    def _build(self, df_y, df_cred_akrk, df_cred_dig, df_averb_akrk, df_averb_dig, df_integrados, df_esteiras) -> pd.DataFrame:
         self._log("Etapa 2.1: Enriquecendo Y (INICIADOS/AVERBADOS/INTEGRADOS/ESTEIRAS)", "INFO")
 
         if df_y is None or df_y.empty:
@@ -105,18 +157,17 @@ class Step2Enricher:
         if df_cred_dig is not None and not df_cred_dig.empty:
             frames_cred.append(df_cred_dig)
 
-        df_cred = pd.concat(frames_cred, ignore_index=True) if frames_cred else pd.DataFrame()
+        df_cred = pd.concat(unify_categories(frames_cred), ignore_index=True) if frames_cred else pd.DataFrame()
 
         cred_cols = [
             "nrCpf", "dsNome", "vlPrestacao", "nrPrazo",
             "dsTipoOperacao", "dsEsteira", "dsConsignataria", "dsConvenio"
         ]
         
-        y["nrCCB"] = self._norm_key_digits(y["nrCCB"])
-        df_integrados["nrCCB"] = self._norm_key_digits(df_integrados["nrCCB"])
-        df_esteiras["nrCCB"] = self._norm_key_digits(df_esteiras["nrCCB"])
+        # índice das chaves de Y, compartilhado pelas bases que usam a mesma chave
+        key_index = {}
 
-        y = self._merge_one(y, df_cred, on="nrContrato", cols=cred_cols, tag="INICIADOS")
+        y = self._merge_one(y, df_cred, on="nrContrato", cols=cred_cols, tag="INICIADOS", key_index=key_index)
 
         frames_averb = []
         if df_averb_akrk is not None and not df_averb_akrk.empty:
@@ -124,10 +175,10 @@ class Step2Enricher:
         if df_averb_dig is not None and not df_averb_dig.empty:
             frames_averb.append(df_averb_dig)
 
-        df_averb = pd.concat(frames_averb, ignore_index=True) if frames_averb else pd.DataFrame()
+        df_averb = pd.concat(unify_categories(frames_averb), ignore_index=True) if frames_averb else pd.DataFrame()
 
         averb_cols = ["dtAverbacao", "dtPrimeiroVencimentoAverbacao"]
-        y = self._merge_one(y, df_averb, on="nrContrato", cols=averb_cols, tag="AVERBADOS")
+        y = self._merge_one(y, df_averb, on="nrContrato", cols=averb_cols, tag="AVERBADOS", key_index=key_index)
 
         df_integrados = df_integrados if df_integrados is not None else pd.DataFrame()
         integ_cols = [
@@ -135,33 +186,26 @@ class Step2Enricher:
             "dtPrimeiroVencimentoCessao", "codProduto", "dsProduto",
             "origem3", "origem4"
         ]
-        y = self._merge_one(y, df_integrados, on="nrCCB", cols=integ_cols, tag="INTEGRADOS")
+        y = self._merge_one(y, df_integrados, on="nrCCB", cols=integ_cols, tag="INTEGRADOS", key_index=key_index)
 
         df_esteiras = df_esteiras if df_esteiras is not None else pd.DataFrame()
         esteira_cols = ["dsMatricula"]
-        y = self._merge_one(y, df_esteiras, on="nrCCB", cols=esteira_cols, tag="ESTEIRAS")
+        y = self._merge_one(y, df_esteiras, on="nrCCB", cols=esteira_cols, tag="ESTEIRAS", key_index=key_index)
 
-        for c in Y_COLUMNS_FULL:
-            if c not in y.columns:
-                y[c] = DEFAULT_MISSING_VALUE
-        y = y[Y_COLUMNS_FULL].copy()
+        with self.tracer.span("finalize", rows_in=len(y)):
+            for c in Y_COLUMNS_FULL:
+                if c not in y.columns:
+                    y[c] = None
+            y = y[Y_COLUMNS_FULL].copy()
 
-        for c in Y_DATE_COLUMNS:
-            if c in y.columns:
-                dt = pd.to_datetime(y[c], errors="coerce", dayfirst=True)
-                y[c] = dt.dt.date
-
-        y = self._fill_nd(y)
+            # datas seguem como datetime64; colunas já convertidas no Step1 são só repassadas
+            for c in Y_DATE_COLUMNS:
+                if c in y.columns:
+                    y[c] = normalize_dates(y[c])
 
         self._log("Etapa 2.1 concluída: Y enriquecida.", "SUCCESS")
         return y
 
-    def _norm_key_digits(self, s: pd.Series) -> pd.Series:
-        s = s.astype(str).str.strip()
-        s = s.str.replace(".0", "", regex=False)
-        s = s.str.replace(r"\D+", "", regex=True)   # fica só dígito
-        return s
-
     def _is_missing(self, s: pd.Series) -> pd.Series:
-    
-        return s.isna() | (s.astype(str).str.strip() == DEFAULT_MISSING_VALUE)
\ No newline at end of file
+        # vazio é NA desde o DataLoader: basta a máscara de nulos
+        return s.isna()
\ No newline at end of file
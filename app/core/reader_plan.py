@@ -0,0 +1,58 @@
+from app.config.schemas import FILE_SCHEMAS, COLUMN_ALIASES, COLUMN_KINDS
+
+COLUMN_KIND_VALUES = ("key", "date", "numeric", "category", "text")
+
+# tipos lidos do Excel sem passar por texto (número e data já vêm tipados na célula)
+RAW_CELL_KINDS = ("date", "numeric")
+
+
+def normalize_header(name) -> str:
+    # espaços colapsados + alias: um passe só, no lugar dos três rename(columns=...)
+    col = " ".join(str(name).split())
+    return COLUMN_ALIASES.get(col, col)
+
+
+# FILE_SCHEMAS compilado para a leitura: colunas físicas a pedir ao leitor (já com alias),
+# tipo de destino de cada uma e o nome final. CSV e Excel executam o mesmo plano.
+class ReaderPlan:
+    def __init__(self, key: str, schema: dict):
+        self.key = key
+        self.columns = list(schema["use"])
+        self.rename = dict(schema["rename"])
+        self.key_field = schema.get("key_field")
+        # chaves (nome final) que também saem como texto original em <chave>RAW_KEY_SUFFIX
+        self.raw_keys = list(schema.get("raw_keys", []))
+        self.targets = {c: self.rename.get(c, c) for c in self.columns}
+        self.kinds = {c: COLUMN_KINDS.get(self.targets[c], "text") for c in self.columns}
+        self._wanted = set(self.columns)
+        # texto livre (nome final): candidato à heurística de categoria depois da leitura
+        self.text_targets = [self.targets[c] for c in self.columns if self.kinds[c] == "text"]
+
+        for c, kind in self.kinds.items():
+            if kind not in COLUMN_KIND_VALUES:
+                raise ValueError(f"[{key}] Tipo de coluna inválido para {c}: {kind}")
+
+    def wants(self, name) -> bool:
+        # usecols do read_csv: decide pelo cabeçalho do arquivo
+        return normalize_header(name) in self._wanted
+
+    def locate(self, header) -> dict:
+        # coluna do schema -> posição no cabeçalho (primeira ocorrência)
+        positions = {}
+        for i, name in enumerate(header):
+            if name is None:
+                continue
+            col = normalize_header(name)
+            if col in self._wanted and col not in positions:
+                positions[col] = i
+        return positions
+
+    def raw_cell(self, col: str) -> bool:
+        return self.kinds[col] in RAW_CELL_KINDS
+
+
+READER_PLANS = {key: ReaderPlan(key, schema) for key, schema in FILE_SCHEMAS.items()}
+
+
+def get_plan(key: str) -> ReaderPlan:
+    return READER_PLANS[key]
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from app.config.schemas import FILE_SCHEMAS, COLUMN_KINDS
+from app.core.csv_sniffer import file_fingerprint
+from app.core.keys import key_text, normalize_key
+from app.core.date_normalizer import normalize_dates
+
+# Base de referência local (SQLite) para INICIADOS, AVERBADOS, INTEGRADOS e RLE.
+#
+# Cada export é ingerido uma vez (arquivo com o mesmo caminho/tamanho/mtime não é relido) e as
+# linhas ficam numa tabela por grupo, com chave primária (k, src):
+#   k   = chave de join em texto canônico (nrContrato / nrCCB, como key_text)
+#   src = posição da base no grupo (credAkrk = 0, credDig = 1): na consulta vale a maior, igual
+#         ao concat(AKRK, DIG) + "última por chave" do Step2
+# Reingestão de uma base: upsert por chave (só grava linha que mudou) + remoção das chaves que
+# saíram do export. Na execução, o Step2 recebe só as linhas das chaves da X, buscadas em lotes
+# pelo índice da chave primária, no lugar das bases inteiras.
+
+# grupo -> (bases do FileManager em ordem de precedência, chave de join)
+REFERENCE_GROUPS = {
+    "iniciados": (("credAkrk", "credDig"), "nrContrato"),
+    "averbados": (("averbadosAkrk", "averbadosDig"), "nrContrato"),
+    "integrados": (("integradosFunc",), "nrCCB"),
+    "esteiras": (("esteirasFunc",), "nrCCB"),
+}
+
+# muda quando o formato das tabelas mudar (tabelas antigas são recriadas)
+REFERENCE_STORE_VERSION = 2
+INGEST_BATCH_ROWS = 50_000
+LOOKUP_BATCH_KEYS = 900   # abaixo do limite de parâmetros do SQLite (+ os de src)
+
+
+def reference_group_of(key: str) -> str | None:
+    for group, (keys, _) in REFERENCE_GROUPS.items():
+        if key in keys:
+            return group
+    return None
+
+
+def _group_columns(group: str) -> list:
+    # colunas finais do schema (sem a chave, que vira k)
+    keys, on = REFERENCE_GROUPS[group]
+    schema = FILE_SCHEMAS[keys[0]]
+    targets = [schema["rename"].get(c, c) for c in schema["use"]]
+    return [c for c in targets if c != on]
+
+
+def _sql_type(column: str) -> str:
+    return "REAL" if COLUMN_KINDS.get(column) == "numeric" else "TEXT"
+
+
+def _store_digest() -> str:
+    payload = json.dumps(
+        {"version": REFERENCE_STORE_VERSION, "groups": {g: _group_columns(g) for g in REFERENCE_GROUPS},
+         "kinds": COLUMN_KINDS},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _source_fingerprint(path: str) -> str:
+    path, size, mtime_ns = file_fingerprint(path)
+    return f"{path}|{size}|{mtime_ns}"
+
+
+def _column_values(s: pd.Series, column: str) -> list:
+    # valores no formato da tabela: data ISO, número float, texto; ausente = None
+    kind = COLUMN_KINDS.get(column)
+    if kind == "date":
+        dates = normalize_dates(s)
+        return [None if pd.isna(v) else v for v in dates.dt.strftime("%Y-%m-%d").astype(object)]
+    if kind == "numeric":
+        values = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        return [None if np.isnan(v) else float(v) for v in values]
+    values = s.astype(object).to_numpy(copy=True)
+    values[pd.isna(values)] = None
+    return [None if v is None else str(v) for v in values]
+
+
+class ReferenceStore:
+    def __init__(self, path="store/referencias.sqlite", log_callback=None):
+        self.path = path
+        self.log_callback = log_callback
+        self._digest = _store_digest()
+        self._ready = False
+
+    def _log(self, message, level="INFO"):
+        if self.log_callback:
+            self.log_callback(message, level)
+
+    def _connect(self) -> sqlite3.Connection:
+        # conexão por operação: o robô chama de threads diferentes (e de processos filhos)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._ready:
+            self._ensure_tables(conn)
+            self._ready = True
+        return conn
+
+    def _ensure_tables(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'digest'").fetchone()
+            if row is None or row[0] != self._digest:
+                # schema mudou: recomeça do zero (os exports são reingeridos na próxima execução)
+                for group in REFERENCE_GROUPS:
+                    conn.execute(f'DROP TABLE IF EXISTS "{group}"')
+                conn.execute("DROP TABLE IF EXISTS sources")
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('digest', ?)", (self._digest,))
+
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "source TEXT PRIMARY KEY, fingerprint TEXT, rows INTEGER, ingested_at TEXT)"
+            )
+            for group in REFERENCE_GROUPS:
+                cols = ", ".join(f'"{c}" {_sql_type(c)}' for c in _group_columns(group))
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{group}" ('
+                    f"k TEXT NOT NULL, src INTEGER NOT NULL, {cols}, PRIMARY KEY (k, src)) WITHOUT ROWID"
+                )
+
+    def is_current(self, source: str, path: str) -> bool:
+        # mesmo arquivo (caminho, tamanho, mtime) já ingerido: não precisa nem ser lido
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT fingerprint FROM sources WHERE source = ?", (source,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None and row[0] == _source_fingerprint(path)
+
+    def ingest(self, source: str, path: str, df: pd.DataFrame) -> dict:
+        group = reference_group_of(source)
+        if group is None:
+            raise ValueError(f"Base sem grupo na base de referência: {source}")
+
+        keys, on = REFERENCE_GROUPS[group]
+        src = keys.index(source)
+        columns = _group_columns(group)
+        start = time.perf_counter()
+
+        k = key_text(df[on]) if on in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        valid = k.notna().to_numpy()
+        df = df[valid]
+        k = k[valid]
+
+        data = [[str(v) for v in k], [src] * len(df)]
+        for c in columns:
+            data.append(_column_values(df[c], c) if c in df.columns else [None] * len(df))
+        rows = list(zip(*data))
+
+        names = ", ".join(f'"{c}"' for c in columns)
+        marks = ", ".join("?" for _ in range(len(columns) + 2))
+        changed = " OR ".join(f'"{group}"."{c}" IS NOT excluded."{c}"' for c in columns)
+        assign = ", ".join(f'"{c}" = excluded."{c}"' for c in columns)
+        upsert = (
+            f'INSERT INTO "{group}" (k, src, {names}) VALUES ({marks}) '
+            f"ON CONFLICT (k, src) DO UPDATE SET {assign} WHERE {changed}"
+        )
+
+        conn = self._connect()
+        try:
+            with conn:
+                before = conn.execute(f'SELECT COUNT(*) FROM "{group}" WHERE src = ?', (src,)).fetchone()[0]
+                changes = conn.total_changes
+                for i in range(0, len(rows), INGEST_BATCH_ROWS):
+                    conn.executemany(upsert, rows[i:i + INGEST_BATCH_ROWS])
+                written = conn.total_changes - changes
+
+                # chaves que saíram do export deixam de valer
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (k TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM incoming")
+                conn.executemany("INSERT OR IGNORE INTO incoming (k) VALUES (?)", ((r[0],) for r in rows))
+                removed = conn.execute(
+                    f'DELETE FROM "{group}" WHERE src = ? AND k NOT IN (SELECT k FROM incoming)', (src,)
+                ).rowcount
+                conn.execute("DELETE FROM incoming")
+
+                after = conn.execute(f'SELECT COUNT(*) FROM "{group}" WHERE src = ?', (src,)).fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO sources (source, fingerprint, rows, ingested_at) VALUES (?, ?, ?, ?)",
+                    (source, _source_fingerprint(path), after, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                )
+        finally:
+            conn.close()
+
+        elapsed = time.perf_counter() - start
+        inserted = after - before + removed
+        stats = {
+            "rows": len(rows),
+            "inserted": inserted,
+            "updated": max(written - inserted, 0),
+            "removed": removed,
+            "seconds": elapsed,
+            "rows_per_s": len(rows) / elapsed if elapsed > 0 else 0.0,
+        }
+        self._log(
+            f"[{source}] Base de referência: {stats['rows']} linhas | novas {stats['inserted']} | "
+            f"alteradas {stats['updated']} | removidas {stats['removed']} | "
+            f"{elapsed:.2f}s ({stats['rows_per_s']:,.0f} linhas/s)",
+            "INFO",
+        )
+        return stats
+
+    def lookup(self, group: str, keys: pd.Series, sources=None) -> pd.DataFrame:
+        # linhas (uma por chave, base de maior precedência) cujas chaves estão em keys, só das bases
+        # em sources (as selecionadas na execução; None = todas do grupo)
+        group_keys, on = REFERENCE_GROUPS[group]
+        columns = _group_columns(group)
+        wanted = pd.unique(key_text(keys).dropna())
+        srcs = [i for i, key in enumerate(group_keys) if sources is None or key in sources]
+        start = time.perf_counter()
+
+        names = ", ".join(f'"{c}"' for c in columns)
+        found = []
+        conn = self._connect()
+        try:
+            src_marks = ", ".join("?" for _ in srcs)
+            for i in range(0, len(wanted) if srcs else 0, LOOKUP_BATCH_KEYS):
+                batch = [str(v) for v in wanted[i:i + LOOKUP_BATCH_KEYS]]
+                marks = ", ".join("?" for _ in batch)
+                found.extend(conn.execute(
+                    f'SELECT k, src, {names} FROM "{group}" WHERE k IN ({marks}) AND src IN ({src_marks})',
+                    batch + srcs,
+                ).fetchall())
+        finally:
+            conn.close()
+
+        df = pd.DataFrame.from_records(found, columns=["k", "src"] + columns)
+        df = df.sort_values(["src"], kind="stable").drop_duplicates(subset=["k"], keep="last")
+        df = df.sort_values(["k"], kind="stable").reset_index(drop=True)
+
+        out = {on: normalize_key(df["k"].astype(object))}
+        for c in columns:
+            kind = COLUMN_KINDS.get(c)
+            if kind == "date":
+                out[c] = normalize_dates(df[c])
+            elif kind == "numeric":
+                out[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+            elif kind == "category":
+                out[c] = df[c].astype("category")
+            else:
+                out[c] = df[c].astype("str").where(df[c].notna())
+        result = pd.DataFrame(out)
+
+        elapsed = time.perf_counter() - start
+        rate = len(wanted) / elapsed if elapsed > 0 else 0.0
+        self._log(
+            f"[{group}] Consulta na base de referência: {len(result)}/{len(wanted)} chaves encontradas | "
+            f"{elapsed:.2f}s ({rate:,.0f} chaves/s)",
+            "INFO",
+        )
+        return result
+
+    def summary(self) -> dict:
+        conn = self._connect()
+        try:
+            return {group: conn.execute(f'SELECT COUNT(*) FROM "{group}"').fetchone()[0] for group in REFERENCE_GROUPS}
+        finally:
+            conn.close()
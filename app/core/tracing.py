@@ -0,0 +1,210 @@
+import sys
+import threading
+import time
+
+# Spans por etapa do pipeline: tempo de parede, tempo de CPU do processo, linhas de entrada/saída e
+# quanto o pico de memória (RSS) do processo subiu durante o span.
+#
+#   with tracer.span("merge/INTEGRADOS", rows_in=len(y)) as span:
+#       ...
+#       span.set(rows_out=len(y))
+#
+# O nome é um caminho: spans abertos dentro de outro (na mesma thread) ganham o prefixo do pai
+# ("step2/merge/INTEGRADOS"). Em threads de pool não há pai; parent= dá o prefixo nesse caso.
+# Desligado, span() devolve sempre o mesmo objeto vazio (sem relógio, sem lock, sem registro).
+# CPU é do processo inteiro: spans que rodam em paralelo contam a CPU uns dos outros.
+
+
+def _peak_rss_linux_mac() -> int | None:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux em KB, macOS em bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _peak_rss_windows() -> int | None:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_bytes() -> int | None:
+    try:
+        if sys.platform == "win32":
+            return _peak_rss_windows()
+        return _peak_rss_linux_mac()
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "rows_in", "rows_out", "_wall", "_cpu", "_rss", "_started_at")
+
+    def __init__(self, tracer, name, rows_in=None):
+        self.tracer = tracer
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def set(self, rows_in=None, rows_out=None):
+        if rows_in is not None:
+            self.rows_in = rows_in
+        if rows_out is not None:
+            self.rows_out = rows_out
+
+    def __enter__(self):
+        self.tracer._push(self.name)
+        self._started_at = time.time()
+        self._rss = peak_rss_bytes()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        rss = peak_rss_bytes()
+        self.tracer._pop()
+
+        rss_delta = None
+        if rss is not None and self._rss is not None:
+            rss_delta = round((rss - self._rss) / (1024 * 1024), 1)
+
+        self.tracer._record({
+            "name": self.name,
+            "started_at": round(self._started_at, 6),
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_peak_delta_mb": rss_delta,
+            "error": exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str, rows_in=None, parent: str | None = None):
+        if not self.enabled:
+            return _NULL_SPAN
+
+        stack = self._stack()
+        if stack:
+            name = f"{stack[-1]}/{name}"
+        elif parent:
+            name = f"{parent}/{name}"
+        return Span(self, name, rows_in)
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    def extend(self, records: list):
+        # spans vindos de outro processo (carregamento com ProcessPoolExecutor)
+        if not self.enabled or not records:
+            return
+        with self._lock:
+            self.records.extend(records)
+
+    def summary(self) -> str:
+        # árvore pelos nomes: cada span logo abaixo do pai, filhos em ordem de início
+        with self._lock:
+            records = sorted(self.records, key=lambda r: (r["started_at"], r["name"].count("/")))
+
+        names = {r["name"] for r in records}
+        children = {}
+        roots = []
+        for r in records:
+            parent = self._parent_of(r["name"], names)
+            if parent is None:
+                roots.append(r)
+            else:
+                children.setdefault(parent, []).append(r)
+
+        header = f"{'span':<40} {'parede':>9} {'cpu':>9} {'entrada':>10} {'saída':>10} {'RSS+':>8}"
+        lines = [header, "-" * len(header)]
+
+        def walk(items, parent, depth):
+            for r in items:
+                label = "  " * depth + (r["name"][len(parent) + 1:] if parent else r["name"])
+                rows_in = "" if r["rows_in"] is None else r["rows_in"]
+                rows_out = "" if r["rows_out"] is None else r["rows_out"]
+                rss = "" if r["rss_peak_delta_mb"] is None else f"{r['rss_peak_delta_mb']:.1f}"
+                lines.append(
+                    f"{label[:40]:<40} {r['wall_s']:>8.3f}s {r['cpu_s']:>8.3f}s {rows_in:>10} {rows_out:>10} {rss:>8}"
+                )
+                walk(children.pop(r["name"], []), r["name"], depth + 1)
+
+        walk(roots, "", 0)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _parent_of(name: str, names: set) -> str | None:
+        # pai = prefixo registrado mais longo ("step2/merge/X" -> "step2", já que "step2/merge" não é span)
+        parts = name.split("/")
+        for i in range(len(parts) - 1, 0, -1):
+            prefix = "/".join(parts[:i])
+            if prefix in names:
+                return prefix
+        return None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, name: str):
+        self._stack().append(name)
+
+    def _pop(self):
+        self._stack().pop()
+
+    def _record(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+
+NULL_TRACER = Tracer(enabled=False)
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+EXCEL_MAX_ROWS = 1_048_576
+WRITE_BLOCK_ROWS = 50_000
+
+
+# Escrita de .xlsx em streaming (openpyxl write_only): as linhas vão direto para o XML da aba,
+# sem montar o modelo da planilha inteira em memória. O DataFrame é convertido em blocos de
+# WRITE_BLOCK_ROWS linhas (memória limitada pelo bloco, não pelo total).
+#   - datetime64 -> célula de data nativa (yyyy-mm-dd)
+#   - número     -> célula numérica (com number_format, se informado para a coluna)
+#   - NA         -> missing_value (datas vazias ficam como célula vazia)
+# Ao chegar no limite de linhas do Excel, abre uma nova aba com o mesmo cabeçalho.
+class XlsxStreamWriter:
+    def __init__(self, path, sheet_name="Sheet1", max_rows=EXCEL_MAX_ROWS, number_formats=None,
+                 missing_value=None, block_rows=WRITE_BLOCK_ROWS, stop_check=None):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.max_rows = max_rows
+        self.number_formats = number_formats or {}
+        self.missing_value = missing_value
+        self.block_rows = block_rows
+        self.stop_check = stop_check
+
+        self.sheets = []
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> bool:
+        # False = interrompido pelo stop_check (nada é gravado)
+        wb = Workbook(write_only=True)
+        header = [str(c) for c in df.columns]
+        per_sheet = self.max_rows - 1
+
+        ws = None
+        styled = []
+        in_sheet = per_sheet
+
+        try:
+            for start in range(0, len(df), self.block_rows):
+                if self.stop_check and self.stop_check():
+                    return False
+
+                block = df.iloc[start:start + self.block_rows]
+                columns = [self._cell_values(block[c]) for c in df.columns]
+
+                for row in zip(*columns):
+                    if in_sheet >= per_sheet:
+                        ws = self._new_sheet(wb, header)
+                        styled = self._styled_cells(ws, df.columns)
+                        in_sheet = 0
+
+                    if styled:
+                        row = list(row)
+                        for i, cell in styled:
+                            value = row[i]
+                            if isinstance(value, float):
+                                cell.value = value
+                                row[i] = cell
+
+                    ws.append(row)
+                    in_sheet += 1
+                    self.rows += 1
+
+            if ws is None:
+                self._new_sheet(wb, header)
+
+            wb.save(self.path)
+            return True
+        finally:
+            wb.close()
+
+    def _new_sheet(self, wb, header):
+        n = len(self.sheets) + 1
+        name = self.sheet_name if n == 1 else f"{self.sheet_name}_{n}"
+        ws = wb.create_sheet(title=name)
+        ws.append(header)
+        self.sheets.append(name)
+        return ws
+
+    def _styled_cells(self, ws, columns) -> list:
+        # uma célula com estilo por coluna, reaproveitada a cada linha (a linha é serializada no append)
+        styled = []
+        for i, col in enumerate(columns):
+            fmt = self.number_formats.get(col)
+            if fmt:
+                cell = WriteOnlyCell(ws)
+                cell.number_format = fmt
+                styled.append((i, cell))
+        return styled
+
+    def _cell_values(self, s: pd.Series) -> list:
+        missing = s.isna().to_numpy()
+
+        if pd.api.types.is_datetime64_any_dtype(s):
+            values = s.dt.date.to_numpy(dtype=object, copy=True)
+            values[missing] = None
+            return values.tolist()
+
+        if pd.api.types.is_float_dtype(s):
+            values = s.to_numpy(dtype="float64", na_value=np.nan).astype(object)
+        elif pd.api.types.is_integer_dtype(s):
+            values = s.astype(object).to_numpy(copy=True)
+        else:
+            values = s.to_numpy(dtype=object, copy=True)
+
+        values[missing] = self.missing_value
+        return values.tolist()
+
+
+def write_xlsx_streaming(df: pd.DataFrame, path: str, **kwargs) -> XlsxStreamWriter | None:
+    writer = XlsxStreamWriter(path, **kwargs)
+    return writer if writer.write(df) else None
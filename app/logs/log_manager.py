@@ -1,70 +1,247 @@
+import atexit
 import json
 import os
+import queue
+import sys
+import threading
 from datetime import datetime
 
+# Formato atual:
+#   logs/cessao_prime_index.json      -> metadados das execuções (início/fim/status)
+#   logs/executions/<execution_id>.jsonl -> uma linha JSON por log (append-only)
+# O arquivo antigo (cessao_prime_logs.json, com os logs dentro do JSON) continua sendo lido.
+
+INDEX_FILENAME = "cessao_prime_index.json"
+JOURNAL_DIRNAME = "executions"
+QUEUE_MAX_SIZE = 10000
+
+_STOP = object()
+
+
 class LogManager:
-    def __init__(self, log_dir="logs", filename="cessao_prime_logs.json"):
+    def __init__(self, log_dir="logs", filename="cessao_prime_logs.json", index_filename=INDEX_FILENAME, queue_size=QUEUE_MAX_SIZE):
         self.log_dir = log_dir
-        self.filepath = os.path.join(log_dir, filename)
+        self.filepath = os.path.join(log_dir, filename)  # formato legado (somente leitura)
+        self.index_path = os.path.join(log_dir, index_filename)
+        self.journal_dir = os.path.join(log_dir, JOURNAL_DIRNAME)
+
+        self._lock = threading.RLock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._handles = {}
+        # falhas de escrita do journal por execução: [quantidade, primeiro erro]
+        self._journal_errors = {}
+        self._writer = None
+        self._atexit_registered = False
 
         self._ensure_log_file()
 
     def _ensure_log_file(self):
-        os.makedirs(self.log_dir, exist_ok=True)
-
-        if not os.path.exists(self.filepath):
-            with open(self.filepath, "w", encoding="utf-8") as f:
-                json.dump({"executions" :[]}, f, indent=4, ensure_ascii=False)
-    
-    def start_execution(self):
-        execution_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-        execution = {
-            "execution_id": execution_id,
-            "status": "RUNNING",
-            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "finished_at": None,
-            "logs": []
-        }
+        os.makedirs(self.journal_dir, exist_ok=True)
 
-        data = self._read_file()
-        data["executions"].append(execution)
-        self._write_file(data)
+        if not os.path.exists(self.index_path):
+            self._write_json(self.index_path, {"executions": []})
 
+    # ---------------------------
+    # escrita
+    # ---------------------------
+    def start_execution(self):
+        base_id = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+        with self._lock:
+            data = self._read_index()
+
+            # várias execuções no mesmo segundo (fila de jobs): sufixo _2, _3, ...
+            taken = {e["execution_id"] for e in data["executions"]}
+            execution_id = base_id
+            n = 2
+            while execution_id in taken:
+                execution_id = f"{base_id}_{n}"
+                n += 1
+
+            data["executions"].append({
+                "execution_id": execution_id,
+                "status": "RUNNING",
+                "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "finished_at": None,
+                "journal": os.path.join(JOURNAL_DIRNAME, f"{execution_id}.jsonl"),
+            })
+            self._write_json(self.index_path, data)
+
+        self._ensure_writer()
         return execution_id
 
     def add_log(self, execution_id, level, message):
-        data = self._read_file()
-
-        for execution in data["executions"]:
-            if execution["execution_id"] == execution_id:
-                execution["logs"].append({
-                    "time": datetime.now().strftime("%H:%M:%S"),
-                    "level": level,
-                    "message": message
-                })
-
-                break
-
-        self._write_file(data)
+        entry = {
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "level": level,
+            "message": message
+        }
+        # fila limitada: se o disco não acompanhar, quem loga espera (sem crescer a memória)
+        self._ensure_writer()
+        self._queue.put((execution_id, entry))
 
     def finish_execution(self, execution_id, status):
-        data = self._read_file()
-
-        for execution in data["executions"]:
+        self.flush()
+
+        with self._lock:
+            handle = self._handles.pop(execution_id, None)
+            errors = self._journal_errors.pop(execution_id, None)
+        if handle:
+            try:
+                handle.close()
+            except Exception as e:
+                errors = errors or [0, str(e)]
+                errors[0] += 1
+
+        fields = {}
+        if errors:
+            fields = {"journal_errors": errors[0], "journal_error": errors[1]}
+
+        self.update_execution(
+            execution_id,
+            status=status,
+            finished_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            **fields,
+        )
+
+    def update_execution(self, execution_id, **fields):
+        with self._lock:
+            data = self._read_index()
+
+            for execution in data["executions"]:
+                if execution["execution_id"] == execution_id:
+                    execution.update(fields)
+                    break
+
+            self._write_json(self.index_path, data)
+
+    def flush(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._writer = None
+
+    # ---------------------------
+    # leitura (novo + legado)
+    # ---------------------------
+    def get_executions(self):
+        legacy = self._read_legacy()
+        executions = [
+            {k: v for k, v in execution.items() if k != "logs"}
+            for execution in legacy.get("executions", [])
+        ]
+        executions.extend(self._read_index()["executions"])
+        return executions
+
+    def get_logs(self, execution_id):
+        journal = os.path.join(self.journal_dir, f"{execution_id}.jsonl")
+        if os.path.exists(journal):
+            self.flush()
+            logs = []
+            with open(journal, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        logs.append(json.loads(line))
+            return logs
+
+        for execution in self._read_legacy().get("executions", []):
             if execution["execution_id"] == execution_id:
-                execution["status"] = status
-                execution["finished_at"] = datetime.now().strftime("%Y-%m-%D %H:%M:%S")
-                
-                break
-
-        self._write_file(data)
-
+                return execution.get("logs", [])
+
+        return []
+
+    # ---------------------------
+    # internos
+    # ---------------------------
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._writer_loop, name="log-writer", daemon=True)
+            self._writer.start()
+
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._close_handles()
+                    return
+
+                execution_id, entry = item
+                handle = self._journal_handle(execution_id)
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+                # agrupa as escritas: só força o flush quando a fila esvaziar
+                if self._queue.empty():
+                    self._flush_handles()
+            except Exception as e:
+                self._record_journal_error(item[0] if isinstance(item, tuple) else None, e)
+            finally:
+                self._queue.task_done()
+
+    def _record_journal_error(self, execution_id, error):
+        # disco cheio, permissão, ...: o journal fica incompleto; avisa uma vez por execução e
+        # finish_execution marca a execução no índice (journal_errors / journal_error)
+        with self._lock:
+            errors = self._journal_errors.setdefault(execution_id, [0, str(error)])
+            errors[0] += 1
+            first = errors[0] == 1
+            # handle com erro é descartado: a próxima linha tenta abrir o arquivo de novo
+            handle = self._handles.pop(execution_id, None)
+        if handle is not None:
+            try:
+                handle.close()
+            except Exception:
+                pass
+        if first:
+            print(f"[LogManager] Falha ao gravar journal da execução {execution_id}: {error}", file=sys.stderr)
+
+    def _journal_handle(self, execution_id):
+        with self._lock:
+            handle = self._handles.get(execution_id)
+            if handle is None:
+                path = os.path.join(self.journal_dir, f"{execution_id}.jsonl")
+                handle = open(path, "a", encoding="utf-8")
+                self._handles[execution_id] = handle
+            return handle
+
+    def _flush_handles(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.flush()
+
+    def _close_handles(self):
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+
+    def _read_index(self):
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
 
-    def _read_file(self):
+    def _read_legacy(self):
+        if not os.path.exists(self.filepath):
+            return {"executions": []}
         with open(self.filepath, "r", encoding="utf-8") as f:
             return json.load(f)
 
-    def _write_file(self, data):
-        with open(self.filepath, "w", encoding="utf-8") as f:
+    def _write_json(self, path, data):
+        # nome único: várias instâncias (threads/processos) podem gravar o mesmo índice
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, path)
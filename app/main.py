@@ -1,5 +1,8 @@
+import multiprocessing
 from app.ui.main_window import MainWindow
 
 if __name__ == "__main__":
+    # executável congelado (Windows): o processo filho do pipeline reentra por aqui
+    multiprocessing.freeze_support()
     app = MainWindow()
     app.run()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from app.core.br_numbers import parse_percent_fraction, format_vl_taxa_cessao, parse_br_number, format_br_number
+
+# Micro-benchmark: kernel de números (app/core/br_numbers.py) x implementação antiga (copiada abaixo).
+# Uso: python -m app.tests.bench_br_numbers [linhas]
+
+
+def legacy_percent_to_fraction(series: pd.Series) -> pd.Series:
+    s = series.astype(str).str.strip()
+    s = s.str.replace("%", "", regex=False)
+    s = s.str.replace(".", "", regex=False)
+    s = s.str.replace(",", ".", regex=False)
+
+    num = pd.to_numeric(s, errors="coerce")
+    return num / 100
+
+
+def legacy_format_vl_taxa_cessao(series: pd.Series, max_pct: float = 3.99) -> pd.Series:
+    raw = series.astype(str).str.strip()
+
+    had_pct = raw.str.contains("%", na=False)
+
+    raw = raw.replace({"#N/D": "", "nan": "", "None": "", "": ""})
+    raw = raw.str.replace("%", "", regex=False)
+    raw = raw.str.replace("\u00a0", " ", regex=False)
+    raw = raw.str.replace(",", ".", regex=False)
+    raw = raw.str.replace(r"[^0-9\.\-]+", "", regex=True)
+
+    num = pd.to_numeric(raw, errors="coerce")
+
+    pct = pd.Series(index=num.index, dtype="float64")
+    pct[:] = float("nan")
+
+    pct = pct.where(~had_pct, num)
+
+    no_pct = ~had_pct
+    pct = pct.where(~(no_pct & (num > 1)), num)
+    pct = pct.where(~(no_pct & (num > 0) & (num <= 1)), num * 100)
+
+    for _ in range(6):
+        mask = pct.notna() & (pct > max_pct) & (pct <= 1000)
+        if not mask.any():
+            break
+        pct = pct.where(~mask, pct / 10)
+
+    pct = pct.where(pct.notna() & (pct >= 0) & (pct <= 100), float("nan"))
+
+    return pct.round(2).map(lambda x: f"{x:.2f}" if pd.notna(x) else "#N/D")
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    print(f"  {label:<34} {time.perf_counter() - start:8.3f}s")
+    return out
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+
+    taxas = pd.Series(rng.choice(
+        ["2,5%", "0.025", "1,99", "3.1", "", "#N/D", "2.5 %", "1,234", "0,001", "abc", None],
+        rows,
+    ), dtype=object)
+    valores = pd.Series(rng.choice(
+        ["1.234,56", "1,00", "84", "1234.5", "12.345.678,9", "R$ 10,00", "", None],
+        rows,
+    ), dtype=object)
+
+    print(f">>> {rows} linhas")
+
+    print("TAXA CESSÃO -> fração (Step1)")
+    old = timed("antigo", legacy_percent_to_fraction, taxas)
+    new = timed("kernel", parse_percent_fraction, taxas)
+    pd.testing.assert_series_equal(old, new, check_names=False)
+
+    print("vlTaxaCessao -> texto (export)")
+    old_txt = timed("antigo", legacy_format_vl_taxa_cessao, old)
+    new_txt = timed("kernel", format_vl_taxa_cessao, new)
+    assert old_txt.tolist() == new_txt.tolist()
+
+    print("valores -> float -> \"1.234,56\"")
+    nums = timed("parse_br_number", parse_br_number, valores)
+    timed("format_br_number", format_br_number, nums)
+
+    print(">>> saídas iguais às da implementação antiga")
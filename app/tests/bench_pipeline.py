@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from app.config.robot_config import FILE_PLAN, LOAD_CHUNK_ROWS
+from app.controller.robot_controller import RobotController
+from app.core.data_loader import DataLoader
+from app.core.date_normalizer import date_normalizer
+from app.core.processors.step1_builder import Step1Builder
+from app.core.processors.step2_enricher import Step2Enricher
+from app.logs.log_manager import LogManager
+from app.tests.synthetic_data import write_day
+
+# Benchmark por etapa do pipeline, sobre bases sintéticas (synthetic_data) ou um diretório pronto.
+# Cada etapa é medida isolada (cache de datas limpo antes):
+#   load:<chave>   DataLoader.load_with_schema (sem cache em disco)
+#   step1          Step1Builder.build
+#   step2          Step2Enricher.build
+#   export:<fmt>   RobotController._step_export
+# Tempo = melhor de --repeat execuções; memória = pico do tracemalloc numa execução separada
+# (o tracemalloc deixa tudo mais lento, por isso não entra no tempo).
+#
+#   python -m app.tests.bench_pipeline --rows 10000 100000 1000000
+#   python -m app.tests.bench_pipeline --data-dir dados/2025-01-02 --label atual
+#   python -m app.tests.bench_pipeline --compare bench_results/a.json bench_results/b.json
+#
+# O resultado vai para bench_results/<label>_<data>.json (comparável entre versões).
+
+RESULTS_DIR = "bench_results"
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_EXPORT_FORMATS = ["csv", "parquet"]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _rows_of(result) -> int | None:
+    return len(result) if isinstance(result, pd.DataFrame) else None
+
+
+def _rows_of_x(stages: dict) -> int | None:
+    return stages.get("load:cessao", {}).get("rows")
+
+
+def measure(fn, repeat: int, memory: bool) -> tuple[object, dict]:
+    best = None
+    result = None
+    for _ in range(repeat):
+        date_normalizer.clear()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    stats = {"seconds": round(best, 4), "rows": _rows_of(result)}
+
+    if memory:
+        date_normalizer.clear()
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["peak_mb"] = round(peak / (1024 * 1024), 1)
+
+    return result, stats
+
+
+def _print_stage(name: str, stats: dict, extra: str) -> None:
+    print(f"  {name:<22} {stats['seconds']:8.3f}s  pico {stats.get('peak_mb', '-'):>8} MB  {extra}")
+
+
+def bench_day(files: dict, repeat: int, memory: bool, export_formats: list) -> dict:
+    stages = {}
+    frames = {}
+
+    loader = DataLoader(csv_encoding="utf-8", csv_sep=";", chunk_rows=LOAD_CHUNK_ROWS)
+    for key, label, required in FILE_PLAN:
+        path = files.get(key)
+        if not path:
+            continue
+        frames[key], stats = measure(lambda: loader.load_with_schema(key, path, use_cache=False), repeat, memory)
+        stats["file_mb"] = round(os.path.getsize(path) / (1024 * 1024), 1)
+        stages[f"load:{key}"] = stats
+        _print_stage(f"load:{key}", stats, f"{stats['rows']} linhas")
+
+    step1 = Step1Builder()
+    df_y_base, stats = measure(
+        lambda: step1.build(frames["cessao"], frames.get("frontAkrk"), frames.get("frontDig")), repeat, memory
+    )
+    stages["step1"] = stats
+    _print_stage("step1", stats, f"{stats['rows']} linhas")
+
+    step2 = Step2Enricher()
+    df_y, stats = measure(
+        lambda: step2.build(
+            df_y=df_y_base,
+            df_cred_akrk=frames.get("credAkrk"),
+            df_cred_dig=frames.get("credDig"),
+            df_averb_akrk=frames.get("averbadosAkrk"),
+            df_averb_dig=frames.get("averbadosDig"),
+            df_integrados=frames.get("integradosFunc"),
+            df_esteiras=frames.get("esteirasFunc"),
+        ),
+        repeat,
+        memory,
+    )
+    stages["step2"] = stats
+    _print_stage("step2", stats, f"{stats['rows']} linhas")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in export_formats:
+            robot = RobotController(export_format=fmt, use_parse_cache=False,
+                                    log_manager=LogManager(log_dir=os.path.join(tmp, "logs")))
+            robot.output_dir = os.path.join(tmp, fmt)
+            robot.dataframes["y"] = df_y
+            _, stats = measure(robot._step_export, repeat, memory)
+            stats["rows"] = len(df_y)
+            if robot.export_path:
+                stats["file_mb"] = round(os.path.getsize(robot.export_path) / (1024 * 1024), 1)
+            stages[f"export:{fmt}"] = stats
+            _print_stage(f"export:{fmt}", stats, f"arquivo {stats.get('file_mb')} MB")
+
+    stages["total"] = {"seconds": round(sum(s["seconds"] for s in stages.values()), 4)}
+    return stages
+
+
+def compare(path_a: str, path_b: str) -> None:
+    with open(path_a, "r", encoding="utf-8") as f:
+        a = json.load(f)
+    with open(path_b, "r", encoding="utf-8") as f:
+        b = json.load(f)
+
+    print(f"A = {a['label']} ({a.get('git_commit')})  |  B = {b['label']} ({b.get('git_commit')})")
+    runs_b = {run["rows"]: run for run in b["runs"]}
+    for run_a in a["runs"]:
+        run_b = runs_b.get(run_a["rows"])
+        if run_b is None:
+            continue
+        print(f">>> {run_a['rows']} linhas")
+        for stage, sa in run_a["stages"].items():
+            sb = run_b["stages"].get(stage)
+            if sb is None:
+                continue
+            ratio = sa["seconds"] / sb["seconds"] if sb["seconds"] else float("nan")
+            mem = ""
+            if "peak_mb" in sa and "peak_mb" in sb:
+                mem = f"  mem {sa['peak_mb']:>8} -> {sb['peak_mb']:>8} MB"
+            print(f"  {stage:<22} {sa['seconds']:8.3f}s -> {sb['seconds']:8.3f}s  ({ratio:5.2f}x){mem}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.tests.bench_pipeline")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="linhas da X sintética")
+    parser.add_argument("--data-dir", help="diretório com as bases (nomes das chaves) em vez do gerador")
+    parser.add_argument("--file-format", default="csv", choices=["csv", "xlsx", "mixed"])
+    parser.add_argument("--match-rate", type=float, default=0.9)
+    parser.add_argument("--dup-rate", type=float, default=0.01)
+    parser.add_argument("--export-formats", nargs="+", default=DEFAULT_EXPORT_FORMATS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--label", default=None)
+    parser.add_argument("--out", default=None, help="arquivo JSON de saída")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    commit = _git_commit()
+    label = args.label or commit or "local"
+    report = {
+        "label": label,
+        "git_commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("compare", "out")},
+        "runs": [],
+    }
+
+    if args.data_dir:
+        from app.cli import files_in_dir
+        files = files_in_dir(args.data_dir)
+        print(f">>> {args.data_dir}")
+        stages = bench_day(files, args.repeat, args.memory, args.export_formats)
+        report["runs"].append({"rows": _rows_of_x(stages), "data_dir": args.data_dir, "stages": stages})
+    else:
+        for rows in args.rows:
+            with tempfile.TemporaryDirectory() as tmp:
+                print(f">>> gerando {rows} linhas ({args.file_format})")
+                files = write_day(tmp, rows=rows, match_rate=args.match_rate, dup_rate=args.dup_rate,
+                                  file_format=args.file_format)
+                print(f">>> {rows} linhas")
+                stages = bench_day(files, args.repeat, args.memory, args.export_formats)
+            report["runs"].append({"rows": rows, "stages": stages})
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    print(f">>> resultado: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
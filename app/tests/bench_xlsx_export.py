@@ -0,0 +1,70 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from app.config.schemas import EXPORT_NUMBER_FORMATS, DEFAULT_MISSING_VALUE
+from app.core.br_numbers import format_br_number, format_vl_taxa_cessao
+from app.core.xlsx_writer import write_xlsx_streaming
+
+# Benchmark da exportação .xlsx: to_excel (modelo inteiro em memória, tudo texto) x XlsxStreamWriter.
+# Cada modo roda num subprocesso próprio para o pico de memória (ru_maxrss) não se misturar.
+# Uso: python -m app.tests.bench_xlsx_export [linhas]
+
+
+def typed_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "nrContrato": rng.integers(1, 10 ** 9, rows).astype(str).astype(object),
+        "nrCCB": rng.integers(1, 10 ** 12, rows).astype(str).astype(object),
+        "dsNome": rng.choice(["JOÃO", "MARIA", "JOSÉ", None], rows).astype(object),
+        "vlPrestacao": np.round(rng.uniform(10, 5000, rows), 2),
+        "vlPrincipal": np.round(rng.uniform(100, 90000, rows), 2),
+        "vlCessao": np.round(rng.uniform(100, 90000, rows), 2),
+        "vlTaxaCessao": rng.choice([1.99, 2.5, 3.1, np.nan], rows),
+        "dsFundo": rng.choice(["F1", "F2", "F3"], rows).astype(object),
+        "dtCessao": pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+    })
+
+
+def text_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # mesmo formato que o export antigo entregava ao to_excel
+    out = df.copy()
+    out["dtCessao"] = out["dtCessao"].dt.date
+    out["vlTaxaCessao"] = format_vl_taxa_cessao(out["vlTaxaCessao"] / 100)
+    for col in ["vlPrestacao", "vlPrincipal", "vlCessao"]:
+        out[col] = format_br_number(out[col])
+    text_cols = [c for c in out.columns if c != "dtCessao"]
+    out[text_cols] = out[text_cols].fillna(DEFAULT_MISSING_VALUE)
+    return out
+
+
+def run_mode(mode: str, rows: int, path: str) -> None:
+    df = typed_frame(rows)
+    start = time.perf_counter()
+    if mode == "to_excel":
+        text_frame(df).to_excel(path, index=False, engine="openpyxl")
+    else:
+        write_xlsx_streaming(df, path, number_formats=EXPORT_NUMBER_FORMATS, missing_value=DEFAULT_MISSING_VALUE)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {mode:<10} {elapsed:8.2f}s  pico {peak_mb:8.0f} MB  arquivo {os.path.getsize(path) / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+        sys.exit(0)
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f">>> {rows} linhas")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ["to_excel", "streaming"]:
+            path = os.path.join(tmp, f"{mode}.xlsx")
+            subprocess.run(
+                [sys.executable, "-m", "app.tests.bench_xlsx_export", "--mode", mode, str(rows), path],
+                check=True,
+            )
@@ -0,0 +1,8 @@
+# Scripts antigos de teste manual (caminhos locais de Windows, rodam ao importar): ficam fora do pytest
+collect_ignore = [
+    "test_data_loader.py",
+    "test_file_manager.py",
+    "test_modelo.py",
+    "test_robot_controller.py",
+    "test_step1_builder.py",
+]
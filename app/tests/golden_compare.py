@@ -0,0 +1,209 @@
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+from app.config.schemas import EXPORT_CSV_SEP, EXPORT_CSV_ENCODING
+from app.tests.synthetic_data import write_day
+
+# Saída de referência (golden): roda uma versão de base (ref do git ou checkout) e a árvore atual
+# sobre o mesmo dia sintético, exporta CSV nas duas e compara coluna a coluna.
+# Qualquer célula diferente precisa ser explicada por uma regra de ACCEPTED_DIFFERENCES para aquela
+# coluna (valor antes e depois); o resto falha (exit 1).
+#
+#   python -m app.tests.golden_compare --baseline 6587a20 --rows 5000
+#   python -m app.tests.golden_compare --baseline ../cessao-prime-antigo --format mixed
+#
+# Cada execução roda num processo próprio, com cwd num diretório temporário (cache, estado
+# incremental e logs não vazam de uma para a outra).
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ISO_DATE = r"\d{4}-\d{2}-\d{2}"
+
+
+MISSING_TEXTS = ("", "#N/D")
+
+
+# regras: (valor na base, valor atual, linha atual) -> a diferença é explicada?
+def blank_to_date(before: str, after: str, row) -> bool:
+    return before == "" and re.fullmatch(ISO_DATE, after) is not None
+
+
+def day_month_swapped(before: str, after: str, row) -> bool:
+    if not (re.fullmatch(ISO_DATE, before) and re.fullmatch(ISO_DATE, after)):
+        return False
+    return before[:4] == after[:4] and before[5:7] == after[8:10] and before[8:10] == after[5:7]
+
+
+def missing_key(key: str):
+    # a base casava chave vazia com chave vazia ("#N/D" == "#N/D"): a linha sem nrContrato/nrCCB
+    # recebia os dados da última linha sem chave da referência. Agora chave ausente não casa
+    def rule(before: str, after: str, row) -> bool:
+        return row[key] in MISSING_TEXTS and after in MISSING_TEXTS
+    return rule
+
+
+# A base passava as datas três vezes por pd.to_datetime(dayfirst=True), que infere UM formato pelo
+# primeiro valor da coluna:
+#   - coluna com formatos misturados: o que não casa com o formato inferido virava NaT (vazio)
+#   - ISO cujo primeiro valor é ambíguo ("2024-11-06"): inferia "%Y-%d-%m" e trocava dia e mês
+# date_normalizer lê cada formato separadamente.
+DATE_RULES = [
+    (blank_to_date, "data em formato misturado perdida pela base"),
+    (day_month_swapped, "data ISO lida como ano-dia-mês pela base"),
+]
+CONTRATO_RULES = [(missing_key("nrContrato"), "nrContrato vazio não casa mais com chave vazia")]
+CCB_RULES = [(missing_key("nrCCB"), "nrCCB vazio não casa mais com chave vazia")]
+
+# coluna -> regras que explicam uma diferença aceita (INICIADOS/AVERBADOS casam por nrContrato,
+# INTEGRADOS/ESTEIRAS por nrCCB)
+ACCEPTED_DIFFERENCES = {
+    "dtCessao": DATE_RULES,
+    "dtAverbacao": DATE_RULES + CONTRATO_RULES,
+    "dtPrimeiroVencimentoAverbacao": DATE_RULES + CONTRATO_RULES,
+    "dtPrimeiroVencimentoCessao": DATE_RULES + CCB_RULES,
+    **{c: CONTRATO_RULES for c in ("nrCpf", "dsNome", "vlPrestacao", "nrPrazo", "dsTipoOperacao", "dsEsteira",
+                                   "dsConsignataria", "dsConvenio")},
+    **{c: CCB_RULES for c in ("vlPrincipal", "vlCessao", "codProduto", "dsMatricula")},
+}
+
+# Diferenças só de log (não entram na comparação, ficam impressas):
+#   "[<base>] Duplicados removidos em <chave>: N" - a base contava as linhas de chave vazia como
+#   duplicadas entre si (todas "#N/D"); agora chave ausente sai antes do drop_duplicates (não casa
+#   com nada), então N fica menor. O valor de Y não muda: chave vazia nunca preenchia nada.
+LOG_PATTERN = re.compile(r"Duplicados removidos")
+
+# roda numa árvore qualquer (base ou atual) só com a API comum às duas versões
+RUNNER = """
+import glob, json, sys
+repo, day, out = sys.argv[1:4]
+sys.path.insert(0, repo)
+from app.core.file_manager import FileManager
+from app.controller.robot_controller import RobotController
+fm = FileManager()
+for key in fm.files:
+    found = glob.glob(f"{day}/{key}.*")
+    if found:
+        fm.set_file(key, found[0])
+logs = []
+robot = RobotController(log_callback=lambda message, level="INFO": logs.append(message), file_manager=fm)
+robot.export_format = "csv"
+robot.output_dir = out
+robot.execution_id = robot.log_manager.start_execution()
+robot._run()
+print(json.dumps({"status": str(robot.status.value), "logs": logs}))
+"""
+
+
+def _checkout(baseline: str, tmp: str) -> str:
+    if os.path.isdir(baseline):
+        return os.path.abspath(baseline)
+    path = os.path.join(tmp, "baseline")
+    subprocess.run(["git", "-C", REPO_ROOT, "worktree", "add", "--detach", path, baseline],
+                   check=True, capture_output=True)
+    return path
+
+
+def _remove_checkout(path: str) -> None:
+    subprocess.run(["git", "-C", REPO_ROOT, "worktree", "remove", "--force", path], capture_output=True)
+
+
+def run_tree(repo: str, day: str, work: str) -> tuple[pd.DataFrame, list]:
+    os.makedirs(work, exist_ok=True)
+    out = os.path.join(work, "out")
+    proc = subprocess.run([sys.executable, "-c", RUNNER, repo, day, out], cwd=work, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"execução falhou em {repo}:\n{proc.stderr[-2000:]}")
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    exported = glob.glob(os.path.join(out, "*.csv"))
+    if not exported:
+        raise RuntimeError(f"{repo} não exportou CSV (status {result['status']})")
+
+    df = pd.read_csv(exported[0], sep=EXPORT_CSV_SEP, encoding=EXPORT_CSV_ENCODING, dtype=str, keep_default_na=False)
+    return df, [m for m in result["logs"] if LOG_PATTERN.search(m)]
+
+
+def _accepted(column: str, before: str, after: str, row) -> str | None:
+    # motivo da primeira regra que explica a diferença (None = não aceita)
+    for rule, reason in ACCEPTED_DIFFERENCES.get(column, []):
+        if rule(before, after, row):
+            return reason
+    return None
+
+
+def compare_frames(base: pd.DataFrame, head: pd.DataFrame) -> list:
+    # lista de problemas (vazia = igual à base, a menos das diferenças aceitas)
+    if list(base.columns) != list(head.columns):
+        return [f"colunas diferentes: {list(base.columns)} x {list(head.columns)}"]
+    if len(base) != len(head):
+        return [f"linhas diferentes: {len(base)} x {len(head)}"]
+
+    problems = []
+    for col in base.columns:
+        diff = base[col].ne(head[col]).to_numpy()
+        if not diff.any():
+            continue
+        pairs = pd.DataFrame({"base": base[col][diff], "atual": head[col][diff]})
+        rows = head[diff].to_dict("records")
+        reasons = pd.Series(
+            [_accepted(col, b, a, r) for b, a, r in zip(pairs["base"], pairs["atual"], rows)],
+            index=pairs.index,
+        )
+        rejected = pairs[reasons.isna()]
+        print(f"  {col}: {int(diff.sum())} diferenças")
+        for reason, count in reasons.value_counts().items():
+            print(f"    {count} aceitas: {reason}")
+        if len(rejected):
+            problems.append(f"{col}: {len(rejected)} diferenças não aceitas\n{rejected.value_counts().head(10).to_string()}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.tests.golden_compare")
+    parser.add_argument("--baseline", required=True, help="ref do git ou diretório com a versão de base")
+    parser.add_argument("--data-dir", help="diretório com as bases (nomes das chaves) em vez do gerador")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--format", dest="file_format", default="csv", choices=["csv", "xlsx", "mixed"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        day = args.data_dir
+        if day is None:
+            day = os.path.join(tmp, "day")
+            write_day(day, rows=args.rows, seed=args.seed, file_format=args.file_format)
+
+        baseline = _checkout(args.baseline, tmp)
+        try:
+            print(f">>> base: {args.baseline}")
+            base, base_logs = run_tree(baseline, day, os.path.join(tmp, "run_base"))
+        finally:
+            if baseline.startswith(tmp):
+                _remove_checkout(baseline)
+        print(">>> atual")
+        head, head_logs = run_tree(REPO_ROOT, day, os.path.join(tmp, "run_head"))
+
+    print(f">>> {len(base)} x {len(head)} linhas")
+    problems = compare_frames(base, head)
+
+    print(">>> logs de duplicados (informativo)")
+    for before, after in zip(base_logs, head_logs):
+        print(f"  {before}  ->  {after}")
+
+    if problems:
+        print(">>> FALHOU")
+        for problem in problems:
+            print(problem)
+        return 1
+    print(">>> OK: igual à base, a menos das diferenças aceitas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from app.core.xlsx_writer import EXCEL_MAX_ROWS
+
+# Gerador de bases sintéticas para todas as chaves do FILE_SCHEMAS (sem dados reais, reprodutível).
+# Os arquivos saem com o nome da chave ("cessao.xlsx", "frontAkrk.csv", ...): o diretório gerado
+# serve direto como um "dia" do python -m app.cli e como entrada do bench_pipeline.
+#
+#   python -m app.tests.synthetic_data saida/dia1 --rows 100000 --match-rate 0.9
+#
+# Controles:
+#   rows          linhas da base cessão (X)
+#   match_rate    fração das chaves da X que aparece em cada base de referência
+#   extra_ratio   linhas sem relação com a X nas bases de referência (x rows); as bases reais são
+#                 bem maiores que a X do dia
+#   dup_rate      fração de linhas repetidas (mesma chave) nas bases de referência
+#   file_format   "csv", "xlsx" ou "mixed" (X e bases pequenas em xlsx, FRONT/INICIADOS em csv)
+#   encodings     encodings dos CSV, em rodízio ("utf-8", "cp1252", "utf-8-sig")
+#   date formats  cada base usa um formato de data ("dd/mm/aaaa", ISO, ISO com hora, misturado)
+
+DEFAULT_ENCODINGS = ["utf-8", "cp1252", "utf-8-sig"]
+DATE_STYLES = ["br", "iso", "iso_time", "mixed"]
+CSV_SEP = ";"
+
+MIXED_XLSX_KEYS = {"cessao", "averbadosAkrk", "averbadosDig", "esteirasFunc"}
+
+NAMES = ["JOÃO DA SILVA", "MARIA CONCEIÇÃO", "JOSÉ ARAÚJO", "ANA PAULA", "FRANCISCO ASSUNÇÃO", "LUÍS GONÇALVES"]
+CONVENIOS = ["INSS", "SIAPE", "GOV SP", "PREF RJ", "FGTS", "CRED TRAB", "Inss "]
+OPERACOES_CRM = ["CAPITAL", "DIG", "AKRK", "GRUPO AKRK", "GDC", "SEM CESSAO", " grupo  akrk", "Dig", "OUTRA", "#N/D", ""]
+OPERACOES_FRONT = ["1ª", "2ª", "3ª", "REFIN", "PORT", ""]
+FUNDOS = ["FIDC ALFA", "FIDC BETA", "FIDC GAMA"]
+BANCOS = ["BANCO A", "BANCO B", "BANCO C"]
+TAXAS = ["2,5%", "1,99%", "0.025", "1,85", "3.1", "25", "", "#N/D"]
+
+
+def _dates(rng, n: int, style: str) -> np.ndarray:
+    days = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    if style == "mixed":
+        style_idx = rng.integers(0, 3, n)
+        out = np.empty(n, dtype=object)
+        for i, s in enumerate(["br", "iso", "iso_time"]):
+            mask = style_idx == i
+            out[mask] = _dates_fmt(days[mask], s)
+        return out
+    return _dates_fmt(days, style)
+
+
+def _dates_fmt(days: pd.DatetimeIndex, style: str) -> np.ndarray:
+    fmt = {"br": "%d/%m/%Y", "iso": "%Y-%m-%d", "iso_time": "%Y-%m-%d %H:%M:%S"}[style]
+    return np.asarray(days.strftime(fmt), dtype=object)
+
+
+def _br_money(rng, n: int, low: float, high: float) -> np.ndarray:
+    values = pd.Series(np.round(rng.uniform(low, high, n), 2))
+    swap = str.maketrans(",.", ".,")
+    return np.asarray([f"{v:,.2f}".translate(swap) for v in values], dtype=object)
+
+
+def _blank(rng, values: np.ndarray, rate: float, blank=None) -> np.ndarray:
+    values = np.asarray(values, dtype=object).copy()
+    values[rng.random(len(values)) < rate] = blank
+    return values
+
+
+def _pick(rng, keys: np.ndarray, match_rate: float, extra: int, key_range: tuple) -> np.ndarray:
+    # chaves da X que casam + chaves que não existem na X
+    matched = keys[rng.random(len(keys)) < match_rate]
+    others = rng.integers(key_range[0], key_range[1], extra)
+    out = np.concatenate([matched, others])
+    rng.shuffle(out)
+    return out
+
+
+def _with_duplicates(rng, df: pd.DataFrame, dup_rate: float) -> pd.DataFrame:
+    n_dup = int(len(df) * dup_rate)
+    if n_dup == 0:
+        return df
+    dup = df.iloc[rng.integers(0, len(df), n_dup)]
+    return pd.concat([df, dup], ignore_index=True).sample(frac=1, random_state=int(rng.integers(0, 2**31)))
+
+
+def _split(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # AKRK / DIG: mesma estrutura, metade das linhas em cada
+    half = len(df) // 2
+    return df.iloc[:half], df.iloc[half:]
+
+
+def build_frames(rows=10_000, match_rate=0.9, extra_ratio=1.0, dup_rate=0.01, seed=0) -> dict:
+    rng = np.random.default_rng(seed)
+    extra = int(rows * extra_ratio)
+
+    ccb_range = (100_000_000_000, 999_999_999_999)
+    contrato_range = (1_000_000, 99_999_999)
+    ccb = ccb_range[0] + rng.permutation(rows).astype(np.int64) * 7919 + rng.integers(0, 7919)
+    contrato = contrato_range[0] + rng.permutation(rows).astype(np.int64) * 97
+
+    # X: ~2% sem CONTRATO CRED ("-" -> LEFT(nrCCB, 9)), ~1% sem chave
+    contrato_cred = contrato.astype(str).astype(object)
+    contrato_cred[rng.random(rows) < 0.02] = "-"
+    contrato_cred = _blank(rng, contrato_cred, 0.01)
+    contrato_keys = np.where(contrato_cred == "-", (ccb // 1000).astype(str), contrato_cred.astype(str))
+    contrato_keys = pd.to_numeric(pd.Series(contrato_keys), errors="coerce").dropna().astype(np.int64).to_numpy()
+
+    frames = {}
+    frames["cessao"] = pd.DataFrame({
+        "X": "",
+        "DATA CESSÃO": _blank(rng, _dates(rng, rows, "br"), 0.01),
+        "ID": np.arange(rows),
+        "LOTE": rng.integers(1, 50, rows),
+        "CCB INVESTIDOR": _blank(rng, ccb.astype(str), 0.005),
+        "CONTRATO CRED": contrato_cred,
+        "STATUS": rng.choice(["OK", "PENDENTE"], rows),
+        "OPERACAO": _blank(rng, rng.choice(OPERACOES_FRONT, rows), 0.02, "nan"),
+        "FUNDO": rng.choice(FUNDOS, rows),
+        "cnpj": rng.choice(["12.345.678/0001-90", "98.765.432/0001-10"], rows),
+        "OBS": "",
+        "COD TABELAS": rng.integers(100, 999, rows).astype(str),
+        "TABELA": rng.choice(["TAB A", "TAB B", "TAB C"], rows),
+        "CONVENIO": _blank(rng, rng.choice(CONVENIOS, rows), 0.01),
+        "ORIGEM": rng.choice(["LOJA", "CORBAN", "DIGITAL"], rows),
+        "Taxa Cessão": rng.choice(TAXAS, rows),
+    })
+
+    front_keys = _pick(rng, ccb, match_rate, extra, ccb_range)
+    front = pd.DataFrame({
+        "idLinha": np.arange(len(front_keys)),
+        "nrCCB": front_keys.astype(str),
+        "dtCadastro": _dates(rng, len(front_keys), "iso_time"),
+        "dsOperacao": rng.choice(OPERACOES_CRM, len(front_keys)),
+    })
+    frames["frontAkrk"], frames["frontDig"] = _split(_with_duplicates(rng, front, dup_rate))
+
+    cred_keys = _pick(rng, contrato_keys, match_rate, extra, contrato_range)
+    n = len(cred_keys)
+    cred = pd.DataFrame({
+        "Codigo Credbase": _blank(rng, cred_keys.astype(str), 0.005),
+        "Esteira": rng.choice(["ESTEIRA 1", "ESTEIRA 2"], n),
+        "Tipo": rng.choice(["NOVO", "REFIN", "PORTABILIDADE"], n),
+        "Cliente": _blank(rng, rng.choice(NAMES, n), 0.01),
+        "CPF": rng.integers(10 ** 10, 10 ** 11 - 1, n).astype(str),
+        "Convenio": rng.choice(CONVENIOS, n),
+        "Banco": rng.choice(BANCOS, n),
+        "Parcela": _blank(rng, _br_money(rng, n, 30, 3000), 0.01, "#N/D"),
+        "Prazo": rng.choice(["84", "96", "72", "48"], n),
+    })
+    frames["credAkrk"], frames["credDig"] = _split(_with_duplicates(rng, cred, dup_rate))
+
+    averb_keys = _pick(rng, contrato_keys, match_rate, extra, contrato_range)
+    n = len(averb_keys)
+    averb = pd.DataFrame({
+        "Codigo Credbase": averb_keys.astype(str),
+        "Data Averbação": _blank(rng, _dates(rng, n, "iso"), 0.01),
+        "1º Vencimento": _blank(rng, _dates(rng, n, "mixed"), 0.05),
+    })
+    frames["averbadosAkrk"], frames["averbadosDig"] = _split(_with_duplicates(rng, averb, dup_rate))
+
+    integ_keys = _pick(rng, ccb, match_rate, extra, ccb_range)
+    n = len(integ_keys)
+    frames["integradosFunc"] = _with_duplicates(rng, pd.DataFrame({
+        "ID": np.arange(n),
+        "NR_OPER": integ_keys.astype(str),
+        "CPF": rng.integers(10 ** 10, 10 ** 11 - 1, n).astype(str),
+        "CLIENTE": rng.choice(NAMES, n),
+        "PARC": _br_money(rng, n, 30, 3000),
+        "VLR_OP": _br_money(rng, n, 1000, 90000),
+        "VLR_FINAL": _br_money(rng, n, 1000, 90000),
+        "VLR_PARC": _br_money(rng, n, 30, 3000),
+        "PRIM_VCTO": _dates(rng, n, "iso_time"),
+        "COD_PRODUTO": rng.integers(1, 30, n).astype(str),
+        "PRODUTO": rng.choice(["CONSIGNADO", "CARTAO", "REFIN"], n),
+        "ORIGEM_3": rng.choice(["A", "B", "C"], n),
+        "ORIGEM_4": rng.choice(["X", "Y"], n),
+    }), dup_rate)
+
+    rle_keys = _pick(rng, ccb, match_rate, extra, ccb_range)
+    n = len(rle_keys)
+    frames["esteirasFunc"] = _with_duplicates(rng, pd.DataFrame({
+        "Operação": rle_keys.astype(str),
+        "Matrícula": rng.integers(10 ** 6, 10 ** 8, n).astype(str),
+    }), dup_rate)
+
+    return {key: df.reset_index(drop=True) for key, df in frames.items()}
+
+
+def _file_format(key: str, file_format: str) -> str:
+    if file_format == "mixed":
+        return "xlsx" if key in MIXED_XLSX_KEYS else "csv"
+    return file_format
+
+
+def write_day(out_dir: str, rows=10_000, match_rate=0.9, extra_ratio=1.0, dup_rate=0.01, seed=0,
+              file_format="csv", encodings=None) -> dict:
+    encodings = encodings or DEFAULT_ENCODINGS
+    frames = build_frames(rows=rows, match_rate=match_rate, extra_ratio=extra_ratio, dup_rate=dup_rate, seed=seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = {}
+    csv_count = 0
+    for key, df in frames.items():
+        fmt = _file_format(key, file_format)
+        if fmt == "xlsx":
+            if len(df) >= EXCEL_MAX_ROWS:
+                raise ValueError(f"{key}: {len(df)} linhas não cabem numa aba do Excel; use file_format='csv'")
+            path = os.path.join(out_dir, f"{key}.xlsx")
+            df.to_excel(path, index=False)
+        else:
+            encoding = encodings[csv_count % len(encodings)]
+            csv_count += 1
+            path = os.path.join(out_dir, f"{key}.csv")
+            df.to_csv(path, sep=CSV_SEP, index=False, encoding=encoding)
+        paths[key] = path
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.tests.synthetic_data")
+    parser.add_argument("out_dir")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--match-rate", type=float, default=0.9)
+    parser.add_argument("--extra-ratio", type=float, default=1.0)
+    parser.add_argument("--dup-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", dest="file_format", default="csv", choices=["csv", "xlsx", "mixed"])
+    args = parser.parse_args()
+
+    paths = write_day(args.out_dir, rows=args.rows, match_rate=args.match_rate, extra_ratio=args.extra_ratio,
+                      dup_rate=args.dup_rate, seed=args.seed, file_format=args.file_format)
+    for key, path in paths.items():
+        print(f"{key:<16} {os.path.getsize(path) / 1e6:8.1f} MB  {path}")
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from app.core.br_numbers import parse_br_number, parse_percent_fraction, format_vl_taxa_cessao, format_br_number
+
+# Números no formato brasileiro e regras de taxa
+
+
+def test_parse_br_number():
+    out = parse_br_number(pd.Series(["1.234,56", "1,00", "0.025", "1.234", "R$ 10", "ISENTO", None]))
+
+    np.testing.assert_allclose(out.to_numpy(), [1234.56, 1.0, 0.025, 1234.0, 10.0, np.nan, np.nan])
+
+
+def test_parse_br_number_keeps_excel_numbers():
+    out = parse_br_number(pd.Series([1.234, "1.234"], dtype=object))
+
+    assert out.tolist() == [1.234, 1234.0]
+
+
+def test_parse_percent_fraction():
+    out = parse_percent_fraction(pd.Series(["2,5%", "1,99", "0.025"]))
+
+    np.testing.assert_allclose(out.to_numpy(), [0.025, 0.0199, 0.25])
+
+
+def test_format_vl_taxa_cessao():
+    out = format_vl_taxa_cessao(pd.Series([0.025, "2,5%", "25", None, "abc"], dtype=object))
+
+    assert out.tolist() == ["2.50", "2.50", "2.50", "#N/D", "#N/D"]
+
+
+def test_format_br_number():
+    out = format_br_number(pd.Series([1234.5, None]))
+
+    assert out.iloc[0] == "1.234,50"
+    assert pd.isna(out.iloc[1])
@@ -0,0 +1,38 @@
+import pandas as pd
+from app.core.categories import map_categories, fill_missing, unify_categories, categorize_low_cardinality
+
+# Transformações de texto sobre categorias: mesmo resultado do caminho em texto
+
+
+def test_map_categories_matches_text_path():
+    text = pd.Series([" a", "A ", None, "b"], dtype=object)
+    cat = map_categories(text.astype("category"), lambda v: v.str.strip().str.upper())
+
+    assert isinstance(cat.dtype, pd.CategoricalDtype)
+    assert list(cat.cat.categories) == ["A", "B"]
+    assert cat.astype(object).where(cat.notna(), None).tolist() == ["A", "A", None, "B"]
+
+
+def test_fill_missing_adds_category():
+    out = fill_missing(pd.Series(["A", None], dtype="category"), "#N/D")
+
+    assert out.tolist() == ["A", "#N/D"]
+
+
+def test_unify_categories_keeps_concat_categorical():
+    parts = unify_categories([
+        pd.DataFrame({"c": pd.Series(["A"], dtype="category")}),
+        pd.DataFrame({"c": pd.Series(["B"], dtype="category")}),
+        None,
+    ])
+    out = pd.concat(parts, ignore_index=True)
+
+    assert isinstance(out["c"].dtype, pd.CategoricalDtype)
+    assert out["c"].tolist() == ["A", "B"]
+
+
+def test_categorize_low_cardinality():
+    df = pd.DataFrame({"low": ["x", "y"] * 50, "high": [str(i) for i in range(100)]})
+
+    assert categorize_low_cardinality(df, ["low", "high"], max_ratio=0.1, min_rows=10) == ["low"]
+    assert isinstance(df["low"].dtype, pd.CategoricalDtype)
@@ -0,0 +1,35 @@
+import json
+import os
+from app import cli
+from app.tests.synthetic_data import write_day
+
+# Códigos de saída do processamento em lote
+
+
+def test_usage_errors(tmp_path, capsys):
+    manifest = tmp_path / "dias.json"
+    manifest.write_text(json.dumps({"d1": {"naoExiste": "x.csv"}}), encoding="utf-8")
+    broken = tmp_path / "quebrado.json"
+    broken.write_text("{", encoding="utf-8")
+
+    assert cli.main([]) == cli.EXIT_USAGE
+    assert cli.main([str(tmp_path), "--manifest", str(manifest)]) == cli.EXIT_USAGE
+    assert cli.main([str(tmp_path / "nao_existe")]) == cli.EXIT_USAGE
+    assert cli.main(["--manifest", str(manifest)]) == cli.EXIT_USAGE
+    assert cli.main(["--manifest", str(broken)]) == cli.EXIT_USAGE
+    assert "erro:" in capsys.readouterr().err
+
+
+def test_ok_and_failed_days(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    day = tmp_path / "entrada" / "2025-01-02"
+    write_day(str(day), rows=300)
+    empty = tmp_path / "entrada" / "2025-01-03"
+    empty.mkdir()
+    out = tmp_path / "saida"
+
+    args = ["--format", "csv", "--workers", "1", "--no-cache", "--output-dir", str(out)]
+    assert cli.main([str(day)] + args) == cli.EXIT_OK
+    assert any(name.endswith(".csv") for name in os.listdir(out / "2025-01-02"))
+
+    assert cli.main([str(day), str(empty)] + args) == cli.EXIT_FAILED
@@ -0,0 +1,27 @@
+import pandas as pd
+from app.core.date_normalizer import DateNormalizer
+
+# Datas: ISO como ISO, o resto com dia primeiro, formatos misturados na mesma coluna
+
+
+def test_mixed_formats():
+    out = DateNormalizer().normalize(pd.Series(["2024-11-06", "06/11/2024", "6/11/2024 13:45", "", None]))
+
+    assert out.dtype == "datetime64[ns]"
+    assert out.tolist()[:3] == [pd.Timestamp("2024-11-06")] * 3
+    assert out.isna().tolist()[3:] == [True, True]
+
+
+def test_ambiguous_iso_is_not_swapped():
+    out = DateNormalizer().normalize(pd.Series(["2024-11-06", "2024-11-30"]))
+
+    assert out.tolist() == [pd.Timestamp("2024-11-06"), pd.Timestamp("2024-11-30")]
+
+
+def test_distinct_texts_parsed_once():
+    normalizer = DateNormalizer()
+    normalizer.normalize(pd.Series(["01/02/2024"] * 5))
+    normalizer.normalize(pd.Series(["01/02/2024", "02/02/2024"]))
+
+    assert normalizer.parsed == 2
+    assert normalizer.reused == 1
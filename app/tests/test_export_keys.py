@@ -0,0 +1,76 @@
+import glob
+import os
+import pandas as pd
+from app.config.schemas import EXPORT_CSV_SEP, EXPORT_CSV_ENCODING
+from app.controller.robot_controller import RobotController, RobotStatus
+from app.core.file_manager import FileManager
+from app.logs.log_manager import LogManager
+
+# nrCCB/nrContrato saem no export como vieram no arquivo (zeros à esquerda inclusive); a chave
+# Int64 só decide o join ("00123" casa com "123" do INICIADOS)
+
+
+def _write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, sep=";", index=False, encoding="utf-8")
+    return str(path)
+
+
+def _run(tmp_path, files):
+    fm = FileManager()
+    for key, path in files.items():
+        fm.set_file(key, path)
+
+    robot = RobotController(
+        file_manager=fm,
+        export_format="csv",
+        use_parse_cache=False,
+        tracing=False,
+        incremental=False,
+        reference_store=False,
+        pipeline_executor="thread",
+        log_manager=LogManager(log_dir=str(tmp_path / "logs")),
+    )
+    robot.output_dir = str(tmp_path / "out")
+    assert robot.run() == RobotStatus.FINISHED
+
+    path = glob.glob(os.path.join(robot.output_dir, "*.csv"))[0]
+    return pd.read_csv(path, sep=EXPORT_CSV_SEP, encoding=EXPORT_CSV_ENCODING, dtype=str, keep_default_na=False)
+
+
+def test_zero_padded_keys_round_trip_to_export(tmp_path):
+    cessao = _write_csv(tmp_path / "cessao.csv", {
+        "DATA CESSÃO": ["01/02/2025", "01/02/2025", "01/02/2025"],
+        "CCB INVESTIDOR": ["000123456789012", "000987654321000", "000.555-1"],
+        "CONTRATO CRED": ["00123", "-", "0789"],
+        "OPERACAO": ["1ª", "1ª", "1ª"],
+        "FUNDO": ["FIDC", "FIDC", "FIDC"],
+        "cnpj": ["1", "1", "1"],
+        "COD TABELAS": ["1", "1", "1"],
+        "TABELA": ["T", "T", "T"],
+        "CONVENIO": ["INSS", "INSS", "INSS"],
+        "ORIGEM": ["LOJA", "LOJA", "LOJA"],
+        "TAXA CESSÃO": ["2,5%", "2,5%", "2,5%"],
+    })
+    front = _write_csv(tmp_path / "frontAkrk.csv", {
+        "nrCCB": ["123456789012", "987654321000", "5551"],
+        "dsOperacao": ["DIG", "DIG", "DIG"],
+    })
+    cred = _write_csv(tmp_path / "credAkrk.csv", {
+        "Codigo Credbase": ["123", "987654"],
+        "Esteira": ["E1", "E2"],
+        "Tipo": ["NOVO", "NOVO"],
+        "Cliente": ["ANA", "BIA"],
+        "CPF": ["1", "2"],
+        "Convenio": ["INSS", "INSS"],
+        "Banco": ["B", "B"],
+        "Parcela": ["10,00", "20,00"],
+        "Prazo": ["12", "24"],
+    })
+
+    y = _run(tmp_path, {"cessao": cessao, "frontAkrk": front, "credAkrk": cred})
+
+    # só os dígitos, zeros à esquerda mantidos (como a base exportava)
+    assert y["nrCCB"].tolist() == ["000123456789012", "000987654321000", "0005551"]
+    # "-" -> LEFT(nrCCB, 9) sobre o texto original
+    assert y["nrContrato"].tolist() == ["00123", "000987654", "0789"]
+    assert y["dsNome"].tolist() == ["ANA", "BIA", "#N/D"]
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from app.controller.robot_controller import RobotController
+from app.logs.log_manager import LogManager
+
+# Valores monetários (Y_VALUE_COLUMNS): export em texto devolve o texto do arquivo como veio;
+# só o export tipado (parquet/feather) converte para float
+
+
+def _frame(tmp_path, typed):
+    robot = RobotController(
+        export_format="csv",
+        use_parse_cache=False,
+        tracing=False,
+        incremental=False,
+        reference_store=False,
+        pipeline_executor="thread",
+        log_manager=LogManager(log_dir=str(tmp_path / "logs")),
+    )
+    df_y = pd.DataFrame({
+        "vlPrestacao": ["1.234,56", "1234.5", "R$ 10,00", None],
+        "vlPrincipal": ["84", "ISENTO", "0,5", "12.345.678,9"],
+    })
+    return robot._export_frame(df_y, typed=typed)
+
+
+def test_text_export_keeps_value_text(tmp_path):
+    out = _frame(tmp_path, typed=False)
+
+    assert out["vlPrestacao"].tolist() == ["1.234,56", "1234.5", "R$ 10,00", "#N/D"]
+    assert out["vlPrincipal"].tolist() == ["84", "ISENTO", "0,5", "12.345.678,9"]
+
+
+def test_typed_export_parses_values(tmp_path):
+    out = _frame(tmp_path, typed=True)
+
+    np.testing.assert_allclose(out["vlPrestacao"].to_numpy(), [1234.56, 1234.5, 10.0, np.nan])
+    np.testing.assert_allclose(out["vlPrincipal"].to_numpy(), [84.0, np.nan, 0.5, 12345678.9])
@@ -0,0 +1,48 @@
+import os
+import pandas as pd
+import pytest
+from app.core.export_writers import write_columnar, write_csv_stream
+
+# Export interrompido no meio (stop_check): o writer apaga o arquivo em vez de deixar um arquivo
+# truncado com rodapé válido
+
+
+def _frame():
+    return pd.DataFrame({"nrCCB": [str(i) for i in range(10)], "vlCessao": [float(i) for i in range(10)]})
+
+
+def _stop_after(blocks):
+    calls = []
+
+    def stop_check():
+        calls.append(1)
+        return len(calls) > blocks
+    return stop_check
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_stop_removes_file(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"out.{fmt}")
+
+    assert write_columnar(_frame(), path, fmt, block_rows=2, stop_check=_stop_after(1)) is False
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_columnar_full_write(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"out.{fmt}")
+    df = _frame()
+
+    assert write_columnar(df, path, fmt, block_rows=2, stop_check=lambda: False) is True
+    back = pd.read_parquet(path) if fmt == "parquet" else pd.read_feather(path)
+    assert back["nrCCB"].tolist() == df["nrCCB"].tolist()
+    assert back["vlCessao"].tolist() == df["vlCessao"].tolist()
+
+
+def test_csv_stop_removes_file(tmp_path):
+    path = str(tmp_path / "out.csv.gz")
+
+    assert write_csv_stream(_frame(), path, "gzip", ";", "utf-8", block_rows=2, stop_check=_stop_after(1)) is False
+    assert not os.path.exists(path)
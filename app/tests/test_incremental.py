@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from app.config.schemas import Y_COLUMNS_FULL
+from app.core.incremental import FP_COLUMN, IncrementalState, assemble_y, state_scope
+
+# Execução incremental: montagem da Y pelos fingerprints e estado em disco por pasta de saída
+
+
+def _y(fps, ccbs):
+    y = pd.DataFrame(None, index=range(len(fps)), columns=Y_COLUMNS_FULL, dtype=object)
+    y["nrCCB"] = ccbs
+    y[FP_COLUMN] = np.asarray(fps, dtype=np.uint64)
+    return y
+
+
+def test_assemble_y_follows_x_order():
+    previous = _y([1, 2, 3], ["a", "b", "velho"])
+    delta = _y([3, 4], ["novo", "d"])
+
+    y = assemble_y(np.array([4, 3, 1, 9], dtype=np.uint64), previous, delta)
+
+    # 9 = linha que o Step1 descartou (não entra); fingerprint repetido vale a Y nova
+    assert y["nrCCB"].tolist() == ["d", "novo", "a"]
+    assert y[FP_COLUMN].tolist() == [4, 3, 1]
+
+
+def test_assemble_y_empty():
+    y = assemble_y(np.array([1], dtype=np.uint64), None, None)
+
+    assert y.empty
+    assert list(y.columns) == Y_COLUMNS_FULL + [FP_COLUMN]
+
+
+def test_state_roundtrip_per_output_dir(tmp_path):
+    state = IncrementalState(str(tmp_path), scope=state_scope(str(tmp_path / "saida1")))
+    state.save(_y([1, 2], ["a", "b"]), np.array([7], dtype=np.uint64))
+
+    y, dropped = IncrementalState(str(tmp_path), scope=state_scope(str(tmp_path / "saida1"))).load()
+    assert y["nrCCB"].tolist() == ["a", "b"]
+    assert dropped.tolist() == [7]
+
+    other, _ = IncrementalState(str(tmp_path), scope=state_scope(str(tmp_path / "saida2"))).load()
+    assert other is None
+
+
+def test_state_invalidated_by_rules(tmp_path, monkeypatch):
+    IncrementalState(str(tmp_path)).save(_y([1], ["a"]), np.array([], dtype=np.uint64))
+
+    monkeypatch.setattr("app.core.incremental.INCREMENTAL_STATE_VERSION", -1)
+    y, dropped = IncrementalState(str(tmp_path)).load()
+    assert y is None
+    assert len(dropped) == 0
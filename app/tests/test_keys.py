@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from app.core.keys import normalize_key, digit_key, align_keys, build_key_set, in_key_set, key_set_size
+
+# Chaves de join: forma canônica, fallback de texto e o conjunto do semi-join
+
+
+def test_numeric_keys_become_int():
+    out = normalize_key(pd.Series(["00123", " 456 ", "789.0", "", "#N/D", None]))
+
+    assert out.dtype == "Int64"
+    assert out.tolist()[:3] == [123, 456, 789]
+    assert out.isna().tolist()[3:] == [True, True, True]
+
+
+def test_non_numeric_key_falls_back_to_text():
+    out = normalize_key(pd.Series(["00123", "ABC-1", "nan"]))
+
+    assert out.dtype == object
+    assert out.tolist()[:2] == ["123", "ABC-1"]
+    assert pd.isna(out.iloc[2])
+
+
+def test_digit_key_keeps_only_digits():
+    out = digit_key(pd.Series(["123.456.789", "CCB 123456789", "sem número", None]))
+
+    assert out.tolist()[:2] == ["123456789", "123456789"]
+    assert out.isna().tolist()[2:] == [True, True]
+
+
+def test_align_keys_uses_text_when_one_side_is_text():
+    left, right = align_keys(pd.Series(["1", "2"]), pd.Series(["2", "X"]))
+
+    assert left.tolist() == ["1", "2"]
+    assert right.tolist() == ["2", "X"]
+
+
+def test_semi_join_key_set():
+    key_set = build_key_set(pd.Series(["001", "2", None]), pd.Series(["X9", "3"]))
+
+    assert key_set_size(key_set) == 4
+    assert np.array_equal(in_key_set(pd.Series(["1", "4", None]), key_set), [True, False, False])
+    assert np.array_equal(in_key_set(pd.Series(["x9", "X9", "03"]), key_set), [False, True, True])
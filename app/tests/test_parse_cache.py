@@ -0,0 +1,40 @@
+import os
+import pandas as pd
+from app.core.parse_cache import ParseCache
+
+# Cache de leitura: a chave muda quando o arquivo (ou o schema) muda
+
+
+def test_key_changes_with_file(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+    src = tmp_path / "base.csv"
+    src.write_text("a;b\n1;2\n", encoding="utf-8")
+
+    key = cache.make_key(str(src), "cessao")
+    cache.put(key, pd.DataFrame({"a": [1]}))
+    assert cache.get(key)["a"].tolist() == [1]
+
+    assert cache.make_key(str(src), "frontAkrk") != key
+    src.write_text("a;b\n1;2\n3;4\n", encoding="utf-8")
+    new_key = cache.make_key(str(src), "cessao")
+    assert new_key != key
+    assert cache.get(new_key) is None
+
+
+def test_key_changes_with_schema(tmp_path, monkeypatch):
+    src = tmp_path / "base.csv"
+    src.write_text("a\n1\n", encoding="utf-8")
+    key = ParseCache(cache_dir=str(tmp_path / "cache")).make_key(str(src), "cessao")
+
+    monkeypatch.setattr("app.core.parse_cache.CACHE_FORMAT_VERSION", -1)
+    assert ParseCache(cache_dir=str(tmp_path / "cache")).make_key(str(src), "cessao") != key
+
+
+def test_corrupt_entry_is_discarded(tmp_path):
+    cache = ParseCache(cache_dir=str(tmp_path / "cache"))
+    entry = os.path.join(cache.cache_dir, "quebrada" + cache.ext)
+    with open(entry, "wb") as f:
+        f.write(b"lixo")
+
+    assert cache.get("quebrada") is None
+    assert not os.path.exists(entry)
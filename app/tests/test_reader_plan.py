@@ -0,0 +1,26 @@
+from app.core.reader_plan import get_plan, normalize_header
+
+# Plano de leitura compilado do FILE_SCHEMAS
+
+
+def test_normalize_header_collapses_spaces_and_aliases():
+    assert normalize_header("  Taxa   Cessão ") == "TAXA CESSÃO"
+    assert normalize_header("CONVENIO") == "CONVENIO"
+
+
+def test_cessao_plan():
+    plan = get_plan("cessao")
+
+    assert plan.targets["CCB INVESTIDOR"] == "nrCCB"
+    assert plan.kinds["CCB INVESTIDOR"] == "key"
+    assert plan.raw_cell("DATA CESSÃO")
+    assert not plan.raw_cell("cnpj")
+    assert plan.wants("Taxa Cessão")
+    assert not plan.wants("COLUNA QUALQUER")
+
+
+def test_locate_takes_first_occurrence():
+    plan = get_plan("cessao")
+    positions = plan.locate(["X", "CCB INVESTIDOR", None, "Taxa Cessão", "CCB INVESTIDOR"])
+
+    assert positions == {"CCB INVESTIDOR": 1, "TAXA CESSÃO": 3}
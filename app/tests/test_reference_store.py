@@ -0,0 +1,49 @@
+import pandas as pd
+from app.core.reference_store import ReferenceStore
+
+# Base de referência: ingestão incremental por chave e consulta com precedência entre as bases
+
+
+def _source(tmp_path, name, df):
+    path = tmp_path / f"{name}.csv"
+    df.to_csv(path, sep=";", index=False)
+    return str(path)
+
+
+def _iniciados(keys, nomes):
+    return pd.DataFrame({"nrContrato": keys, "dsNome": nomes, "dsEsteira": ["E"] * len(keys)})
+
+
+def test_ingest_and_lookup_precedence(tmp_path):
+    store = ReferenceStore(path=str(tmp_path / "ref.sqlite"))
+    akrk = _iniciados(["1", "2", None], ["akrk 1", "akrk 2", "sem chave"])
+    dig = _iniciados(["2"], ["dig 2"])
+
+    stats = store.ingest("credAkrk", _source(tmp_path, "akrk", akrk), akrk)
+    store.ingest("credDig", _source(tmp_path, "dig", dig), dig)
+
+    assert stats["rows"] == 2
+    out = store.lookup("iniciados", pd.Series(["0002", "1", "3"]))
+    assert out["nrContrato"].tolist() == [1, 2]
+    assert out["dsNome"].tolist() == ["akrk 1", "dig 2"]
+
+    only_akrk = store.lookup("iniciados", pd.Series(["2"]), sources=["credAkrk"])
+    assert only_akrk["dsNome"].tolist() == ["akrk 2"]
+
+
+def test_reingest_updates_and_removes(tmp_path):
+    store = ReferenceStore(path=str(tmp_path / "ref.sqlite"))
+    first = _iniciados(["1", "2", "3"], ["a", "b", "c"])
+    path = _source(tmp_path, "akrk", first)
+    store.ingest("credAkrk", path, first)
+    assert store.is_current("credAkrk", path)
+
+    second = _iniciados(["1", "2", "4"], ["a", "B", "d"])
+    path = _source(tmp_path, "akrk2", second)
+    assert not store.is_current("credAkrk", path)
+    stats = store.ingest("credAkrk", path, second)
+
+    assert (stats["inserted"], stats["updated"], stats["removed"]) == (1, 1, 1)
+    assert store.summary()["iniciados"] == 3
+    out = store.lookup("iniciados", pd.Series(["1", "2", "3", "4"]))
+    assert out["dsNome"].tolist() == ["a", "B", "d"]
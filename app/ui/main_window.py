@@ -4,7 +4,10 @@ from tkinter import filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
 from app.core.logger import UILogger
 from app.controller.robot_controller import RobotController, RobotStatus
+from app.controller.job_scheduler import JobScheduler
 from app.core.file_manager import FileManager
+from app.controller.prefetcher import Prefetcher, PrefetchState
+from app.config.robot_config import PREFETCH_ENABLED
 from app.config.ui_config import FILE_ROWS, EXPORT_FORMAT_OPTIONS, DEFAULT_EXPORT_FORMAT
 from tkinter import ttk
 
@@ -22,6 +25,12 @@ class MainWindow:
         self._reset_progress()
         self.status_labels = {}
         self.file_name_labels = {}
+        # resultado da checagem de cabeçalho de cada arquivo selecionado (DataLoader.preflight)
+        self.preflight_results = {}
+        # checagens ainda rodando: key -> path
+        self.preflight_pending = {}
+        # estado da pré-carga de cada arquivo: (PrefetchState, segundos)
+        self.prefetch_status = {}
         self.export_format_var = tk.StringVar(value=DEFAULT_EXPORT_FORMAT)
         self._build_layout()
 
@@ -38,6 +47,23 @@ class MainWindow:
             file_manager=self.file_manager
             )
 
+        # fila de execuções (ENFILEIRAR): cada conjunto de arquivos vira um job com execução própria
+        self.scheduler = JobScheduler(log_manager=self.robot.log_manager, log_callback=self._safe_log)
+
+        # pré-carga: cada arquivo é lido assim que selecionado. Com o pipeline em processo o
+        # resultado chega ao robô pelo ParseCache (sem cache não há como entregar, então fica desligada).
+        # O Prefetcher existe sempre: a checagem de cabeçalho da seleção roda nele, fora da thread do Tk
+        keep_frames = self.robot.pipeline_executor != "process"
+        self.prefetch_enabled = PREFETCH_ENABLED and (keep_frames or self.robot.loader.cache is not None)
+        self.prefetcher = Prefetcher(
+            cache=self.robot.loader.cache,
+            keep_frames=keep_frames,
+            log_callback=self._safe_log,
+            state_callback=self._on_prefetch_state,
+        )
+        if self.prefetch_enabled:
+            self.robot.prefetcher = self.prefetcher
+
     
     def _build_layout(self):
         if self._layout_built:
@@ -63,6 +89,14 @@ class MainWindow:
         )
         self.btn_stop.pack(side=tk.LEFT, padx=5)
         
+        self.btn_enqueue = tk.Button(
+            self.button_frame,
+            text="ENFILEIRAR",
+            width=12,
+            command=self._on_enqueue
+        )
+        self.btn_enqueue.pack(side=tk.LEFT, padx=5)
+
         self.btn_clear_logs = tk.Button(
         self.button_frame,
         text="LIMPAR LOGS",
@@ -131,16 +165,18 @@ class MainWindow:
         self.btn_stop.config(state=tk.DISABLED)
 
     def _clear_logs(self):
-        self.log_area.config(state=tk.NORMAL)
-        self.log_area.delete("1.0", tk.END)
-        self.log_area.config(state=tk.DISABLED)
+        self.logger.clear()
 
     def _reset_ui(self):
         self.file_manager.reset()
+        self.preflight_results = {}
+        self.preflight_pending = {}
+        self.prefetch_status = {}
+        self.prefetcher.clear()
         self._reset_progress()
 
         for key, label in self.status_labels.items():
-            label.config(text="Não selecionado")
+            label.config(text="Não selecionado", fg="black")
 
         for key, label in self.file_name_labels.items():
             label.config(text="-")
@@ -178,6 +214,10 @@ class MainWindow:
                 self._reset_ui()                
                 return
 
+        if not self._confirm_preflight():
+            self.logger.log("Execução cancelada: arquivos com cabeçalho inválido ou em verificação.", "WARNING")
+            return
+
         label_selected = self.export_format_var.get()
         export_format = dict(EXPORT_FORMAT_OPTIONS)[label_selected]
 
@@ -185,6 +225,47 @@ class MainWindow:
         self.robot.start()
         self.logger.log("Botão INICIAR acionado", "INFO")
 
+    def _on_enqueue(self):
+        files = self.file_manager.snapshot()
+        if not any(files.values()):
+            self.logger.log("Selecione os arquivos antes de enfileirar.", "WARNING")
+            return
+
+        missing = self.file_manager.get_missing_files()
+        if missing:
+            msg = "Faltam arquivos:\n\n" + "\n".join(missing) + "\n\nEnfileirar mesmo assim (execução parcial)?"
+            if not messagebox.askyesno("Execução parcial", msg):
+                return
+
+        if not self._confirm_preflight():
+            self.logger.log("Job não enfileirado: arquivos com cabeçalho inválido ou em verificação.", "WARNING")
+            return
+
+        label_selected = self.export_format_var.get()
+        export_format = dict(EXPORT_FORMAT_OPTIONS)[label_selected]
+        cessao = files.get("cessao")
+        name = os.path.splitext(os.path.basename(cessao))[0] if cessao else None
+
+        # pré-cargas desta seleção vão com o job (o robô do job usa como o do INICIAR)
+        self.scheduler.submit(
+            files,
+            name=name,
+            export_format=export_format,
+            log_callback=self._on_job_log,
+            progress_callback=self._on_job_progress,
+            prefetcher=self.prefetcher.detach() if self.prefetch_enabled else None,
+        )
+
+        # seleção liberada para montar o próximo job
+        self._reset_ui()
+
+    def _on_job_log(self, job, message, level="INFO"):
+        # logs do robô do job (inclusive traceback de erro) no mesmo painel, com o nome do job
+        self._safe_log(f"[{job.name}] {message}", level)
+
+    def _on_job_progress(self, job, current_step, total_steps, message):
+        self._safe_log(f"[{job.name}] Etapa {current_step} de {total_steps} - {message}", "INFO")
+
     def _on_stop(self):
         if self.robot:
             self.robot.stop()
@@ -205,7 +286,8 @@ class MainWindow:
         self.root.after(0, self._refresh_file_status_labels)
 
     def _safe_log(self, message, level="INFO"):
-        self.root.after(0, self.logger.log, message, level)
+        # UILogger só enfileira; o Tk drena em lote (ver UI_LOG_FLUSH_MS)
+        self.logger.log(message, level)
 
     def _select_file(self, key):
         path = filedialog.askopenfilename(
@@ -221,17 +303,97 @@ class MainWindow:
 
         self.file_name_labels[key].config(text=filename)
 
-        self.status_labels[key].config(text="Selecionado")
+        # pré-carga do arquivo anterior desta linha não serve mais; a nova só começa depois do cabeçalho OK
+        self.prefetcher.cancel(key)
+        self._preflight_file(key, path)
+
+    def _on_prefetch_state(self, key, state, seconds, error):
+        # vem da thread da pré-carga
+        self.root.after(0, self._update_prefetch_status, key, state, seconds)
+
+    def _update_prefetch_status(self, key, state, seconds):
+        self.prefetch_status[key] = (state, seconds)
+        if self.file_manager.files.get(key):
+            self._show_preflight(key)
+
+    def _preflight_file(self, key, path):
+        # só o cabeçalho: arquivo trocado/aba errada/coluna faltando aparece na hora, não no fim da leitura.
+        # Roda no executor do Prefetcher (xlsx grande leva segundos no load_workbook); o resultado volta pelo after
+        self.preflight_pending[key] = path
+        self._show_preflight(key)
+        self.prefetcher.preflight(key, path, lambda result: self.root.after(0, self._on_preflight_done, key, result))
+
+    def _on_preflight_done(self, key, result):
+        path = result["path"]
+        if self.preflight_pending.get(key) != path or self.file_manager.files.get(key) != path:
+            # arquivo trocado (ou seleção resetada) enquanto a checagem rodava
+            return
+        del self.preflight_pending[key]
+        self.preflight_results[key] = result
+        self._show_preflight(key)
 
-        if key in self.status_labels:
-            self.status_labels[key].config(text="Selecionado")
+        filename = os.path.basename(path)
+        for name, column in result["aliased"].items():
+            self.logger.log(f"[{key}] {filename}: coluna '{name}' lida como '{column}'", "INFO")
+
+        if result["status"] == "ok":
+            self.logger.log(f"[{key}] {filename}: cabeçalho OK ({result['seconds'] * 1000:.0f} ms)", "SUCCESS")
+        elif result["status"] == "warning":
+            self.logger.log(f"[{key}] {filename}: {result['message']}", "WARNING")
+        else:
+            self.logger.log(f"[{key}] {filename}: arquivo rejeitado - {result['message']}", "ERROR")
+
+        # arquivo rejeitado não é lido
+        if self.prefetch_enabled and result["status"] != "error":
+            self.prefetcher.submit(key, path)
+
+    def _show_preflight(self, key):
+        result = self.preflight_results.get(key)
+        if self.preflight_pending.get(key) == self.file_manager.files.get(key):
+            text, color = "Verificando...", "black"
+        elif result is None or result["path"] != self.file_manager.files.get(key):
+            text, color = "Selecionado", "black"
+        elif result["status"] == "ok":
+            text, color = "OK", "dark green"
+        elif result["status"] == "warning":
+            text, color = f"Faltam {len(result['missing'])} colunas", "dark orange"
+        else:
+            text, color = "Arquivo inválido", "red"
+
+        state, seconds = self.prefetch_status.get(key, (None, None))
+        if state in (PrefetchState.QUEUED, PrefetchState.LOADING):
+            text += " | lendo..."
+        elif state in (PrefetchState.READY, PrefetchState.USED):
+            text += f" | pronto {seconds:.1f}s"
+        elif state == PrefetchState.ERROR:
+            text += " | falha na leitura"
+
+        self.status_labels[key].config(text=text, fg=color)
+
+    def _confirm_preflight(self):
+        # checagem ainda rodando: não dá para saber se o arquivo é válido
+        pending = [key for key, path in self.preflight_pending.items() if self.file_manager.files.get(key) == path]
+        if pending:
+            messagebox.showinfo("Verificando arquivos", "Aguarde a verificação do cabeçalho de:\n\n" + "\n".join(pending))
+            return False
+
+        # arquivo com erro no cabeçalho (sem coluna chave / ilegível) não entra na execução
+        errors = [
+            f"{key}: {result['message']}"
+            for key, result in self.preflight_results.items()
+            if result["status"] == "error" and self.file_manager.files.get(key) == result["path"]
+        ]
+        if errors:
+            messagebox.showerror("Arquivos inválidos", "Corrija antes de iniciar:\n\n" + "\n".join(errors))
+            return False
+        return True
 
     def _refresh_file_status_labels(self):
         for key, label in self.status_labels.items():
             if self.file_manager.files.get(key):
-                label.config(text="Selecionado")
+                self._show_preflight(key)
             else:
-                label.config(text="Não Selecionado")
+                label.config(text="Não Selecionado", fg="black")
 
     def _reset_progress(self):
         self.progress_var.set(0)
@@ -252,10 +414,10 @@ class MainWindow:
         lbl_name = tk.Label(row, text=label_text, width=28, anchor="w")
         lbl_name.pack(side=tk.LEFT)
 
-        lbl_status = tk.Label(row, text="Não selecionado", width=18, anchor="w")
+        lbl_status = tk.Label(row, text="Não selecionado", width=30, anchor="w")
         lbl_status.pack(side=tk.LEFT, padx=5)
 
-        lbl_file = tk.Label(row, text="-", width=50, anchor="w")
+        lbl_file = tk.Label(row, text="-", width=38, anchor="w")
         lbl_file.pack(side=tk.LEFT, padx=5)
 
         self.status_labels[key] = lbl_status